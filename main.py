@@ -6,19 +6,78 @@ then launches the interactive menu interface for performing automated actions
 on the SIPD-RI web application.
 
 Usage:
-    python main.py [--dev]
+    python main.py [--dev] [--profile] [--trace] [--record-har FILE | --replay-har FILE]
+                   [--metrics-port PORT] [command]
 
 Arguments:
-    --dev : Run the tool in development mode with DEBUG-level logging.
+    --dev     : Run the tool in development mode with DEBUG-level logging.
+    --profile : Save a cProfile dump of each bot task to `logs/profiles/`.
+    --trace   : Save a Playwright trace of each bot task to `logs/traces/`.
+    --record-har FILE : Record the network traffic of the session to a HAR file.
+    --replay-har FILE : Replay a recorded HAR offline instead of using the network.
+    --har-latency MS  : Delay added to every replayed page and API request, one
+                        request at a time (a slow server, not network RTT).
+    --metrics-port PORT : Serve live metrics (Prometheus text format) on
+                          http://127.0.0.1:PORT/metrics while the tool runs.
+
+Commands:
+    ledger [--days N] : Report throughput and failures recorded in the ledger.
+    rekap-lampiran DIR [--workers N] : Extract totals and merge downloaded Lampiran PDF.
+    reconcile --jurnal FILE... --reference FILE... : Compare journals with SIPD-RI exports.
+    watch [--inbox DIR] [--interval SEC] [--until HH:MM] : Input journals dropped into a folder.
+    selftest-selectors [--repeat N] : Time the AKLAP screen selectors on stand-in pages.
+    dry-run {jurnal,pendapatan,belanja,lampiran} ... : Validate inputs and estimate a job's time.
+    export-posting {pendapatan,belanja} [--skpd NAME...] : Export the unposted transactions per SKPD.
+    queue submit {pendapatan,belanja,lampiran} ... : Split a job per SKPD into a shared queue.
+        The only broker is SQLite, so every worker must run on the same PC.
+    queue work [--job ID] [--cookie-file FILE] : Work on queued items, one per worker process.
+    queue report [--job ID] : Merge the results of every worker into one report.
 
 Logs:
-    Log files are stored in the `logs/` directory, named by date (e.g. 2025-06-10.log).
+    Log files are stored in the `logs/` directory as `sipd-bot.log` (queue workers:
+    `worker-<name>.log`), rotated daily and by size into gzipped files named by date
+    (e.g. sipd-bot.2025-06-10.1.log.gz). A command started while another process
+    owns `sipd-bot.log` (e.g. `watch` next to the menu) logs to `sipd-bot-<pid>.log`.
 """
 
+import sys
 import logging
 import argparse
-from src.menu import run_menu
+import multiprocessing
+from src.menu import (
+    run_menu,
+    handle_ledger_report,
+    handle_rekap_lampiran,
+    handle_reconcile,
+    handle_watch,
+    handle_selector_selftest,
+    handle_dry_run,
+    handle_export_posting,
+    handle_queue_submit,
+    handle_queue_work,
+    handle_queue_report,
+)
+from src.work_queue import DEFAULT_QUEUE_URL, worker_name
 from src.log_setup import setup_logging
+from src.sipd_bot.metrics import start_metrics_server
+from src.watcher import parse_time_of_day
+
+
+def _time_of_day(text: str):
+    try:
+        return parse_time_of_day(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time {text!r}, expected HH:MM")
+
+
+def _positive_int(text: str) -> int:
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"invalid count {text!r}, expected 1 or more")
+    return value
 
 
 # ---- CLI ARG PARSER ----
@@ -27,17 +86,288 @@ parser = argparse.ArgumentParser(description="Run SIPD-RI Helper")
 parser.add_argument(
     "--dev", action="store_true", help="Development mode with DEBUG logging"
 )
-args = parser.parse_args()
+parser.add_argument(
+    "--profile", action="store_true", help="Save a cProfile dump of each bot task"
+)
+parser.add_argument(
+    "--trace", action="store_true", help="Save a Playwright trace of each bot task"
+)
+parser.add_argument(
+    "--record-har", metavar="FILE", help="Record the session's network traffic to HAR"
+)
+parser.add_argument(
+    "--replay-har", metavar="FILE", help="Serve every request from a recorded HAR"
+)
+parser.add_argument(
+    "--har-latency",
+    type=float,
+    default=0,
+    metavar="MS",
+    help="Milliseconds added to every replayed page/API request, one request "
+    "at a time (default: 0)",
+)
+parser.add_argument(
+    "--metrics-port",
+    type=int,
+    metavar="PORT",
+    help="Serve live Prometheus metrics on http://127.0.0.1:PORT/metrics",
+)
+subparsers = parser.add_subparsers(
+    dest="command", help="Run a command instead of the menu"
+)
+
+parser_ledger = subparsers.add_parser(
+    "ledger", help="Report throughput and failures from the ledger"
+)
+parser_ledger.add_argument(
+    "--days", type=int, default=7, help="Number of days to report (default: 7)"
+)
+
+parser_rekap = subparsers.add_parser(
+    "rekap-lampiran", help="Extract totals and merge downloaded Lampiran PDF"
+)
+parser_rekap.add_argument("input_dir", help="Folder with the downloaded PDF files")
+parser_rekap.add_argument(
+    "--workers",
+    type=_positive_int,
+    default=None,
+    help="Worker processes (default: CPU count)",
+)
+
+parser_reconcile = subparsers.add_parser(
+    "reconcile", help="Compare Jurnal Umum workbooks with SIPD-RI exported data"
+)
+parser_reconcile.add_argument(
+    "--jurnal", nargs="+", required=True, help="Jurnal Umum input workbooks"
+)
+parser_reconcile.add_argument(
+    "--reference", nargs="+", required=True, help="Exported Lampiran or ledger data"
+)
+parser_reconcile.add_argument(
+    "--output", default="Rekonsiliasi Jurnal.xlsx", help="Report workbook path"
+)
+parser_reconcile.add_argument(
+    "--tolerance", type=float, default=0.5, help="Allowed difference (default: 0.5)"
+)
+
+parser_watch = subparsers.add_parser(
+    "watch", help="Input Jurnal Umum workbooks dropped into an inbox folder"
+)
+parser_watch.add_argument(
+    "--inbox", default="inbox", help="Folder to watch (default: inbox)"
+)
+parser_watch.add_argument(
+    "--interval", type=float, default=10, help="Seconds between polls (default: 10)"
+)
+parser_watch.add_argument(
+    "--until",
+    type=_time_of_day,
+    default=None,
+    help="Stop at this time of day, HH:MM (default: never)",
+)
+
+parser_selftest = subparsers.add_parser(
+    "selftest-selectors", help="Time the AKLAP screen selectors on stand-in pages"
+)
+parser_selftest.add_argument(
+    "--repeat", type=int, default=20, help="Resolutions per selector (default: 20)"
+)
+
+parser_dry_run = subparsers.add_parser(
+    "dry-run", help="Validate inputs and estimate a job's time without SIPD-RI"
+)
+parser_dry_run.add_argument(
+    "--workers",
+    type=_positive_int,
+    default=4,
+    help="Highest worker count (default: 4)",
+)
+parser_dry_run.add_argument(
+    "--days", type=int, default=30, help="Days of timing history (default: 30)"
+)
+parser_dry_run.add_argument(
+    "--deadline", default="16:00", help="End of the working day, HH:MM (default: 16:00)"
+)
+dry_run_tasks = parser_dry_run.add_subparsers(dest="dry_run_task", required=True)
+
+dry_run_jurnal = dry_run_tasks.add_parser("jurnal", help="Input Jurnal Umum")
+dry_run_jurnal.add_argument("files", nargs="+", help="Jurnal Umum workbooks")
+
+for kind in ("pendapatan", "belanja"):
+    dry_run_posting = dry_run_tasks.add_parser(kind, help=f"Posting {kind.title()}")
+    dry_run_posting.add_argument(
+        "--skpd", nargs="*", default=[], help="SKPD names (default: all in one run)"
+    )
+    dry_run_posting.add_argument(
+        "--items-per-skpd", type=int, help="Known documents per SKPD"
+    )
+
+dry_run_lampiran = dry_run_tasks.add_parser("lampiran", help="Download Lampiran I.1")
+dry_run_lampiran.add_argument(
+    "--skpd", nargs="*", default=[], help="SKPD names (default: every SKPD of --level)"
+)
+dry_run_lampiran.add_argument("--level", choices=["skpd", "unit"], default="skpd")
+dry_run_lampiran.add_argument(
+    "--formats", nargs="+", choices=["PDF", "Excel", "Word"], default=["PDF"]
+)
+dry_run_lampiran.add_argument("--output-dir", help="Download folder")
+
+parser_export_posting = subparsers.add_parser(
+    "export-posting", help="Export the unposted posting transactions per SKPD"
+)
+parser_export_posting.add_argument("kind", choices=["pendapatan", "belanja"])
+parser_export_posting.add_argument(
+    "--skpd", nargs="*", default=[], help="SKPD names (default: every SKPD of --level)"
+)
+parser_export_posting.add_argument("--level", choices=["skpd", "unit"], default="skpd")
+parser_export_posting.add_argument(
+    "--output-dir",
+    default="Antrean_Posting",
+    help="Snapshot folder (default: Antrean_Posting)",
+)
 
+parser_queue = subparsers.add_parser(
+    "queue",
+    help="Distribute a job over worker processes on this PC through a shared queue",
+    description="Single-host only: the SQLite broker cannot be shared by "
+    "workers on several PCs, not even through a network folder.",
+)
+parser_queue.add_argument(
+    "--queue",
+    default=DEFAULT_QUEUE_URL,
+    help="Work queue broker URL, only sqlite:// on this PC is available "
+    f"(default: {DEFAULT_QUEUE_URL})",
+)
+queue_commands = parser_queue.add_subparsers(dest="queue_command", required=True)
 
-# ---- LOGGING SETUP -----
-setup_logging(args.dev)
+queue_submit = queue_commands.add_parser("submit", help="Submit a job per SKPD")
+queue_submit.add_argument("task", choices=["pendapatan", "belanja", "lampiran"])
+queue_submit.add_argument(
+    "--skpd", nargs="*", default=[], help="SKPD names (lampiran: default every SKPD)"
+)
+queue_submit.add_argument("--level", choices=["skpd", "unit"], default="skpd")
+queue_submit.add_argument(
+    "--formats", nargs="+", choices=["PDF", "Excel", "Word"], default=["PDF"]
+)
+queue_submit.add_argument("--output-dir", help="Download folder (lampiran)")
 
-logger = logging.getLogger(__name__)
-if args.dev:
-    logger.debug("Running in development mode with DEBUG logging enabled")
+queue_work = queue_commands.add_parser("work", help="Work on queued items")
+queue_work.add_argument("--job", help="Only work on this job (default: any)")
+queue_work.add_argument(
+    "--name", default=None, help="Worker name (default: <hostname>-<random id>)"
+)
+queue_work.add_argument(
+    "--cookie-file",
+    default="cookies.json",
+    help="Session cookie file of this worker (default: cookies.json)",
+)
+queue_work.add_argument(
+    "--batch", type=int, default=2, help="Items leased per claim (default: 2)"
+)
+queue_work.add_argument(
+    "--lease", type=float, default=900, help="Lease in seconds (default: 900)"
+)
+queue_work.add_argument(
+    "--wait", action="store_true", help="Keep waiting for new jobs when idle"
+)
 
+queue_report = queue_commands.add_parser("report", help="Merge a job's results")
+queue_report.add_argument("--job", help="The job id (default: latest job)")
+queue_report.add_argument("--output", help="Report workbook path")
 
 # ---- MAIN EXECUTION ----
+# Everything runs under __main__: on Windows every multiprocessing child
+# (e.g. rekap-lampiran extraction workers) imports this module again, and must
+# not parse arguments, open log files or bind the metrics port.
 if __name__ == "__main__":
-    run_menu()
+    multiprocessing.freeze_support()
+
+    args = parser.parse_args()
+    if args.record_har and args.replay_har:
+        parser.error("--record-har and --replay-har cannot be used together")
+
+    # SIPDBot options of every bot session
+    bot_options = {
+        "profile": args.profile,
+        "trace": args.trace,
+        "record_har": args.record_har,
+        "replay_har": args.replay_har,
+        "har_latency": args.har_latency,
+    }
+
+    # ---- LOGGING SETUP -----
+    # Queue workers log to their own file, several may run from the same folder
+    worker = None
+    if args.command == "queue" and args.queue_command == "work":
+        worker = args.name = args.name or worker_name()
+    setup_logging(args.dev, worker=worker)
+
+    logger = logging.getLogger(__name__)
+    if args.dev:
+        logger.debug("Running in development mode with DEBUG logging enabled")
+
+    # ---- METRICS ----
+    if args.metrics_port is not None:
+        try:
+            start_metrics_server(args.metrics_port)
+        except OSError as e:
+            # Typically the port is taken by another running instance
+            logger.warning(
+                "Metrics server not started on port %d: %s", args.metrics_port, e
+            )
+            print(f"Metrik tidak aktif, port {args.metrics_port} tidak tersedia ({e})")
+        else:
+            print(f"Metrik: http://127.0.0.1:{args.metrics_port}/metrics")
+
+    if args.command == "ledger":
+        handle_ledger_report(args.days)
+    elif args.command == "rekap-lampiran":
+        sys.exit(0 if handle_rekap_lampiran(args.input_dir, args.workers) else 1)
+    elif args.command == "reconcile":
+        handle_reconcile(args.jurnal, args.reference, args.output, args.tolerance)
+    elif args.command == "watch":
+        handle_watch(args.inbox, args.interval, args.until, **bot_options)
+    elif args.command == "dry-run":
+        valid = handle_dry_run(
+            args.dry_run_task,
+            files=getattr(args, "files", None),
+            skpd_list=getattr(args, "skpd", None),
+            level=getattr(args, "level", "skpd"),
+            formats=getattr(args, "formats", None),
+            output_dir=getattr(args, "output_dir", None),
+            items_per_skpd=getattr(args, "items_per_skpd", None),
+            days=args.days,
+            max_workers=args.workers,
+            deadline=args.deadline,
+        )
+        sys.exit(0 if valid else 1)
+    elif args.command == "export-posting":
+        handle_export_posting(
+            args.kind, args.skpd, args.level, args.output_dir, **bot_options
+        )
+    elif args.command == "queue":
+        if args.queue_command == "submit":
+            handle_queue_submit(
+                args.task,
+                args.skpd,
+                args.level,
+                args.formats,
+                args.output_dir,
+                args.queue,
+            )
+        elif args.queue_command == "work":
+            handle_queue_work(
+                args.queue,
+                args.job,
+                name=args.name,
+                batch=args.batch,
+                lease=args.lease,
+                wait=args.wait,
+                bot_options={**bot_options, "cookie_file": args.cookie_file},
+            )
+        else:
+            sys.exit(0 if handle_queue_report(args.queue, args.job, args.output) else 1)
+    elif args.command == "selftest-selectors":
+        sys.exit(0 if handle_selector_selftest(args.repeat) else 1)
+    else:
+        run_menu(**bot_options)
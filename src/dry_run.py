@@ -0,0 +1,326 @@
+"""
+Dry-run planning of bot jobs, without opening a browser or touching SIPD-RI.
+
+A plan parses and validates the job inputs, counts the work items still to do
+(items the ledger already records as done are left out, exactly as the bot
+would skip them) and estimates the wall time for 1 to `max_workers` parallel
+bot sessions from the historical per-item timings in the ledger.
+
+Timing model, per operation:
+
+- Every successful ledger item is tagged with the number of runs of the same
+  operation that were active when it started. The median item duration per
+  concurrency level shows how much SIPD-RI slows down with more sessions.
+  Levels without history are extrapolated linearly from the observed ones.
+- Failed items are retried once, so the failure rate adds work.
+- Every worker pays `SESSION_OVERHEAD` seconds of browser start, login and
+  menu navigation.
+- Work is split per SKPD, so a job never uses more workers than SKPD. A
+  Jurnal Umum is one form and always runs in a single session.
+
+The recommended worker count is the smallest one within 5% of the fastest
+estimate.
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from src.watcher import validate_jurnal_workbook
+from src.sipd_bot.ledger import Ledger
+from src.sipd_bot.skpd_registry import SKPDRegistry
+from src.sipd_bot.aklap_jurnal_umum import SAVED_OPERATION, jurnal_row_keys
+from src.sipd_bot.aklap_lampiran import lppd_done_keys, lppd_file_path
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds per item used when the ledger has no history for an operation
+DEFAULT_STEP_SECONDS = {
+    "input_jurnal_umum": 6.0,
+    "posting_pendapatan": 30.0,
+    "posting_belanja": 8.0,
+    "export_lppd": 20.0,
+}
+DEFAULT_ITEMS_PER_SKPD = 50
+SESSION_OVERHEAD = 60.0
+MIN_SAMPLES = 5
+
+
+def load_step_history(ledger: Ledger, operation: str, days: int = 30) -> pd.DataFrame:
+    """
+    Load the finished items of an operation with their concurrency level.
+
+    Args:
+        ledger (Ledger): The ledger to read.
+        operation (str): The operation name.
+        days (int, optional): How many days back to read. Defaults to 30.
+
+    Returns:
+        pd.DataFrame: Columns `run_id`, `status`, `started_at`, `duration` and
+        `concurrency` (runs of the operation active when the item started).
+    """
+    history = pd.read_sql_query(
+        "SELECT run_id, status, started_at, finished_at, duration FROM operations "
+        "WHERE operation = ? AND status != 'skipped' AND started_at >= ?",
+        ledger.conn,
+        params=(operation, (datetime.now() - timedelta(days=days)).timestamp()),
+    )
+    if history.empty:
+        return history.assign(concurrency=pd.Series(dtype=int))
+
+    runs = history.groupby("run_id").agg(
+        start=("started_at", "min"), end=("finished_at", "max")
+    )
+    starts = np.sort(runs["start"].to_numpy())
+    ends = np.sort(runs["end"].to_numpy())
+    t = history["started_at"].to_numpy()
+    active = np.searchsorted(starts, t, side="right") - np.searchsorted(
+        ends, t, side="left"
+    )
+    return history.assign(concurrency=np.maximum(active, 1))
+
+
+def step_model(history: pd.DataFrame, operation: str, max_workers: int) -> dict:
+    """
+    Estimate the item duration per concurrency level and the failure rate.
+
+    Args:
+        history (pd.DataFrame): Output of `load_step_history`.
+        operation (str): The operation name, for the default timing.
+        max_workers (int): Highest concurrency level to estimate.
+
+    Returns:
+        dict: `seconds` (concurrency level -> median item seconds),
+        `observed` (levels backed by history), `failure_rate` and `samples`.
+    """
+    levels = np.arange(1, max_workers + 1)
+    success = history[history["status"] == "success"]
+    by_level = success.groupby("concurrency")["duration"].agg(["median", "size"])
+    by_level = by_level[by_level["size"] >= MIN_SAMPLES]
+
+    if by_level.empty:
+        seconds = np.full(len(levels), DEFAULT_STEP_SECONDS.get(operation, 10.0))
+    elif len(by_level) == 1:
+        seconds = np.full(len(levels), by_level["median"].iloc[0])
+    else:
+        slope, intercept = np.polyfit(by_level.index, by_level["median"], 1)
+        seconds = np.maximum(intercept + slope * levels, by_level["median"].min())
+        observed = by_level.index.intersection(levels)
+        seconds[observed.to_numpy() - 1] = by_level.loc[observed, "median"]
+
+    return {
+        "seconds": dict(zip(levels.tolist(), np.round(seconds, 2).tolist())),
+        "observed": by_level.index.tolist(),
+        "failure_rate": (
+            float((history["status"] == "failed").mean()) if len(history) else 0.0
+        ),
+        "samples": len(success),
+    }
+
+
+def estimate(items: int, groups: int, model: dict, max_workers: int) -> list:
+    """
+    Estimate the wall time of a job for every worker count.
+
+    Args:
+        items (int): Work items to do.
+        groups (int): Independent groups (SKPD) the items can be split into.
+        model (dict): Output of `step_model`.
+        max_workers (int): Highest worker count to estimate.
+
+    Returns:
+        list: One dict per worker count with `workers`, `item_seconds` and `seconds`.
+    """
+    work = items * (1 + model["failure_rate"])
+    estimates = []
+    for workers in range(1, min(max_workers, max(groups, 1)) + 1):
+        item_seconds = model["seconds"][workers]
+        seconds = SESSION_OVERHEAD + work * item_seconds / workers if items else 0.0
+        estimates.append(
+            {"workers": workers, "item_seconds": item_seconds, "seconds": seconds}
+        )
+    return estimates
+
+
+def _plan(
+    task: str,
+    operation: str,
+    items: int,
+    groups: int,
+    ledger: Ledger,
+    days: int,
+    max_workers: int,
+    **details,
+) -> dict:
+    model = step_model(
+        load_step_history(ledger, operation, days), operation, max_workers
+    )
+    estimates = estimate(items, groups, model, max_workers)
+    fastest = min(e["seconds"] for e in estimates)
+    best = next(e for e in estimates if e["seconds"] <= fastest * 1.05)
+    return {
+        "task": task,
+        "operation": operation,
+        "items": items,
+        "groups": groups,
+        "model": model,
+        "estimates": estimates,
+        "workers": best["workers"],
+        "seconds": best["seconds"],
+        "finish_at": datetime.now() + timedelta(seconds=best["seconds"]),
+        "errors": [],
+        **details,
+    }
+
+
+def plan_jurnal(
+    paths: list, ledger: Ledger, days: int = 30, max_workers: int = 4
+) -> dict:
+    """
+    Plan `input_jurnal_umum` for one or more journal workbooks.
+
+    Args:
+        paths (list): The journal workbooks, input one after another.
+        ledger (Ledger): The ledger with done rows and timings.
+        days (int, optional): Days of timing history. Defaults to 30.
+        max_workers (int, optional): Highest worker count. Defaults to 4.
+
+    Returns:
+        dict: The plan, see `plan_lampiran`.
+    """
+    done_keys = ledger.done_keys(SAVED_OPERATION)
+    items, skipped, errors = 0, 0, []
+    for path in paths:
+        jurnal_umum, _, file_errors = validate_jurnal_workbook(path)
+        errors += [f"{os.path.basename(path)}: {e}" for e in file_errors]
+        done = sum(key in done_keys for key in jurnal_row_keys(jurnal_umum))
+        items += len(jurnal_umum) - done
+        skipped += done
+
+    # One journal is one form, a single session enters every line
+    plan = _plan(
+        "Jurnal Umum", "input_jurnal_umum", items, 1, ledger, days, max_workers
+    )
+    plan.update(skipped=skipped, errors=errors)
+    return plan
+
+
+def plan_posting(
+    kind: str,
+    skpd_list: list,
+    ledger: Ledger,
+    items_per_skpd: int = None,
+    days: int = 30,
+    max_workers: int = 4,
+) -> dict:
+    """
+    Plan `posting_pendapatan` or `posting_belanja` for a list of SKPD.
+
+    The posting queue lives in SIPD-RI, so the number of Belanja documents per
+    SKPD is `items_per_skpd` or, by default, the median documents per past
+    posting run. Pendapatan posts one batch per SKPD.
+
+    Args:
+        kind (str): `pendapatan` or `belanja`.
+        skpd_list (list): SKPD names, checked against the SKPD registry. An
+            empty list posts every SKPD in one run.
+        ledger (Ledger): The ledger with timings.
+        items_per_skpd (int, optional): Known Belanja documents per SKPD.
+        days (int, optional): Days of timing history. Defaults to 30.
+        max_workers (int, optional): Highest worker count. Defaults to 4.
+
+    Returns:
+        dict: The plan, see `plan_lampiran`.
+    """
+    operation = f"posting_{kind}"
+    skpd_list, errors = _resolve_skpd(skpd_list)
+    groups = max(len(skpd_list), 1)
+
+    if kind == "pendapatan":
+        per_skpd = 1
+    elif items_per_skpd:
+        per_skpd = items_per_skpd
+    else:
+        per_run = pd.read_sql_query(
+            "SELECT COUNT(*) AS n FROM operations WHERE operation = ? "
+            "AND status = 'success' GROUP BY run_id",
+            ledger.conn,
+            params=(operation,),
+        )["n"]
+        per_skpd = int(per_run.median()) if len(per_run) else DEFAULT_ITEMS_PER_SKPD
+
+    plan = _plan(
+        f"Posting {kind.title()}",
+        operation,
+        per_skpd * groups,
+        groups,
+        ledger,
+        days,
+        max_workers,
+        items_per_skpd=per_skpd,
+    )
+    plan["errors"] = errors
+    return plan
+
+
+def plan_lampiran(
+    skpd_list: list,
+    reports: list,
+    output_dir: str,
+    ledger: Ledger,
+    days: int = 30,
+    max_workers: int = 4,
+) -> dict:
+    """
+    Plan `export_lppd` (and `download_lampiran_perkada`) for a list of SKPD.
+
+    Args:
+        skpd_list (list): SKPD names, checked against the SKPD registry.
+        reports (list): (lampiran row, format) pairs.
+        output_dir (str): The download folder, for already downloaded files.
+        ledger (Ledger): The ledger with done files and timings.
+        days (int, optional): Days of timing history. Defaults to 30.
+        max_workers (int, optional): Highest worker count. Defaults to 4.
+
+    Returns:
+        dict: `task`, `items`, `skipped`, `groups`, `errors`, the timing
+        `model`, one `estimates` entry per worker count, the recommended
+        `workers`, its `seconds` and `finish_at`.
+    """
+    skpd_list, errors = _resolve_skpd(skpd_list)
+    done_keys = lppd_done_keys(ledger)
+    paths = [
+        lppd_file_path(output_dir, lampiran, skpd, file_format)
+        for skpd in skpd_list
+        for lampiran, file_format in reports
+    ]
+    done = sum(path in done_keys and os.path.exists(path) for path in paths)
+
+    plan = _plan(
+        "Export LPPD",
+        "export_lppd",
+        len(paths) - done,
+        len(skpd_list),
+        ledger,
+        days,
+        max_workers,
+    )
+    plan.update(skipped=done, errors=errors)
+    return plan
+
+
+def _resolve_skpd(skpd_list: list) -> tuple:
+    registry = SKPDRegistry()
+    # Seed names resolve too, when nothing was synced for the year yet
+    if not registry.entries and not registry.seeded:
+        return skpd_list, ["SKPD registry kosong, jalankan sinkronisasi data SKPD"]
+
+    resolved, errors = [], []
+    for skpd in skpd_list:
+        try:
+            resolved.append(registry.resolve(skpd)["nama"])
+        except KeyError as e:
+            errors.append(str(e.args[0]))
+    return resolved, errors
@@ -0,0 +1,256 @@
+"""
+Post-processing pipeline for downloaded Lampiran PDF files.
+
+After `SIPDBot.export_lppd` has downloaded one `Lampiran I.1 - <SKPD>.pdf` per
+SKPD, this pipeline:
+
+1. Extracts the summary lines (JUMLAH ..., SURPLUS/DEFISIT, ...) and their
+   amounts from every PDF using a process pool.
+2. Consolidates them into `Rekap <label>.xlsx` (long and pivoted sheets).
+3. Merges every PDF into `<label> - Gabungan.pdf` with one bookmark per SKPD.
+
+Extraction is incremental: results are cached in `.lampiran-manifest.json`
+inside the input folder, keyed by file size and modification time, so only
+new or changed PDFs are read again. A PDF that cannot be read is recorded in
+the manifest with its error, left out of the rekap and the merged PDF, listed
+on the `Gagal` sheet and read again on the next run.
+
+Requires the optional `pypdf` dependency (`pip install pypdf`).
+"""
+
+import os
+import re
+import glob
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".lampiran-manifest.json"
+AMOUNT_COLUMNS = ["anggaran", "realisasi", "selisih", "persen"]
+
+SUMMARY_LINE = re.compile(
+    r"^(?P<uraian>(?:JUMLAH|SURPLUS|DEFISIT|PEMBIAYAAN NETTO|SISA LEBIH)"
+    r"(?:[^\d(]|\([^\d)]*\))*?)\s+"
+    r"(?P<amounts>\(?-?\d[\d.,()\s-]*)$",
+    re.IGNORECASE,
+)
+AMOUNT = re.compile(r"\(?-?\d{1,3}(?:\.\d{3})*(?:,\d+)?\)?")
+
+
+def _require_pypdf():
+    try:
+        import pypdf
+    except ImportError as exc:
+        raise ImportError(
+            "The Lampiran pipeline needs pypdf, install it with "
+            "`uv sync --extra pdf` or `pip install pypdf`"
+        ) from exc
+    return pypdf
+
+
+def parse_amount(text: str) -> float:
+    """
+    Parse an Indonesian formatted amount, e.g. `(1.234.567,89)` -> -1234567.89.
+
+    Args:
+        text (str): The amount as printed in the report.
+
+    Returns:
+        float: The amount, negative when written in parentheses or with a minus.
+    """
+    negative = text.startswith("(") or text.startswith("-")
+    value = float(text.strip("()-").replace(".", "").replace(",", "."))
+    return -value if negative else value
+
+
+def skpd_from_filename(path: str) -> str:
+    """
+    Get the SKPD name from a `<label> - <SKPD>.pdf` file name.
+
+    Args:
+        path (str): The PDF path.
+
+    Returns:
+        str: The SKPD name.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem.split(" - ", 1)[-1]
+
+
+def extract_lampiran_totals(path: str) -> list:
+    """
+    Extract the summary lines and amounts of a Lampiran PDF.
+
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Args:
+        path (str): The PDF path.
+
+    Returns:
+        list: One dict per summary line with `skpd`, `uraian`, `halaman` and
+        the amount columns (`anggaran`, `realisasi`, `selisih`, `persen`).
+    """
+    pypdf = _require_pypdf()
+    reader = pypdf.PdfReader(path)
+    skpd = skpd_from_filename(path)
+    rows = []
+
+    for page_number, page in enumerate(reader.pages, start=1):
+        for line in (page.extract_text() or "").splitlines():
+            match = SUMMARY_LINE.match(line.strip())
+            if not match:
+                continue
+            amounts = [parse_amount(a) for a in AMOUNT.findall(match["amounts"])]
+            row = {
+                "skpd": skpd,
+                "uraian": " ".join(match["uraian"].split()).upper(),
+                "halaman": page_number,
+            }
+            row.update(zip(AMOUNT_COLUMNS, amounts))
+            rows.append(row)
+
+    return rows
+
+
+def _file_signature(path: str) -> list:
+    stat = os.stat(path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def _load_manifest(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def merge_pdfs(pdf_files: list, output_path: str):
+    """
+    Merge PDFs into one file with a bookmark per SKPD.
+
+    Args:
+        pdf_files (list): The PDF paths, in bookmark order.
+        output_path (str): The merged PDF path.
+    """
+    pypdf = _require_pypdf()
+    writer = pypdf.PdfWriter()
+
+    for path in pdf_files:
+        start_page = len(writer.pages)
+        writer.append(path)
+        writer.add_outline_item(skpd_from_filename(path), start_page)
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    logger.info("Merged %d PDF into %s", len(pdf_files), output_path)
+
+
+def run_lampiran_pipeline(
+    input_dir: str, label: str = "Lampiran I.1", workers: int = None
+) -> pd.DataFrame:
+    """
+    Extract, consolidate and merge the downloaded Lampiran PDF of a folder.
+
+    Args:
+        input_dir (str): Folder holding `<label> - <SKPD>.pdf` files.
+        label (str, optional): The lampiran label. Defaults to "Lampiran I.1".
+        workers (int, optional): Worker processes. Defaults to the CPU count.
+
+    Returns:
+        pd.DataFrame: The consolidated summary lines of every SKPD. Files
+        that could not be read are in `df.attrs["failed"]`, file name ->
+        error message.
+
+    Raises:
+        ImportError: If pypdf is not installed.
+    """
+    # Fail once here rather than once per file in the workers
+    _require_pypdf()
+    pdf_files = sorted(glob.glob(os.path.join(input_dir, f"{label} - *.pdf")))
+    merged_path = os.path.join(input_dir, f"{label} - Gabungan.pdf")
+    pdf_files = [path for path in pdf_files if path != merged_path]
+    if not pdf_files:
+        logger.warning("No %s PDF found in %s", label, input_dir)
+        return pd.DataFrame()
+
+    manifest_path = os.path.join(input_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+    signatures = {os.path.basename(p): _file_signature(p) for p in pdf_files}
+
+    # Files that failed last time are read again, the error may be gone
+    changed = [
+        path
+        for path in pdf_files
+        if "error" in manifest.get(os.path.basename(path), {})
+        or manifest.get(os.path.basename(path), {}).get("signature")
+        != signatures[os.path.basename(path)]
+    ]
+    removed = set(manifest) - set(signatures)
+    logger.info(
+        "Lampiran pipeline: %d PDF, %d new or changed, %d removed",
+        len(pdf_files),
+        len(changed),
+        len(removed),
+    )
+
+    if changed:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                path: executor.submit(extract_lampiran_totals, path) for path in changed
+            }
+            for path, future in futures.items():
+                name = os.path.basename(path)
+                try:
+                    manifest[name] = {
+                        "signature": signatures[name],
+                        "rows": future.result(),
+                    }
+                except Exception as e:
+                    # A damaged PDF, or a crashed worker: keep the other files
+                    logger.error("Cannot extract %s: %s", path, e)
+                    manifest[name] = {
+                        "signature": signatures[name],
+                        "rows": [],
+                        "error": str(e) or repr(e),
+                    }
+
+    rekap_path = os.path.join(input_dir, f"Rekap {label}.xlsx")
+    outdated = bool(changed or removed)
+    failed = {
+        name: entry["error"] for name, entry in manifest.items() if "error" in entry
+    }
+
+    if outdated:
+        manifest = {name: manifest[name] for name in signatures}
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+    readable = [path for path in pdf_files if os.path.basename(path) not in failed]
+    if readable and (outdated or not os.path.exists(merged_path)):
+        merge_pdfs(readable, merged_path)
+
+    rows = [row for entry in manifest.values() for row in entry["rows"]]
+    df = pd.DataFrame(rows, columns=["skpd", "uraian", "halaman", *AMOUNT_COLUMNS])
+
+    if outdated or not os.path.exists(rekap_path):
+        pivot = df.pivot_table(
+            index="skpd", columns="uraian", values="realisasi", aggfunc="sum"
+        )
+        with pd.ExcelWriter(rekap_path) as writer:
+            df.to_excel(writer, sheet_name="Rincian", index=False)
+            pivot.to_excel(writer, sheet_name="Rekap Realisasi")
+            if failed:
+                pd.DataFrame(failed.items(), columns=["file", "error"]).to_excel(
+                    writer, sheet_name="Gagal", index=False
+                )
+        logger.info("Rekap saved: %s", rekap_path)
+
+    if failed:
+        logger.warning("%d PDF could not be read: %s", len(failed), sorted(failed))
+    df.attrs["failed"] = failed
+    return df
@@ -1,33 +1,274 @@
 """
 Sets up logging for SIPDBot with file and optional console output.
 
-Logs are saved daily in the `logs/` folder, and in dev mode,
+Log records never touch the disk on the automation thread: every logger
+writes to an in-memory queue (`QueueHandler`) and a `QueueListener` thread
+formats and writes them. Before a record is queued it is stamped with the
+log context (`worker`, plus anything set through `set_log_context`) and
+high-frequency DEBUG messages are sampled.
+
+Log files go to the `logs/` folder as `<name>.log` (`sipd-bot.log`, or
+`worker-<name>.log` for queue workers). The file is rotated at midnight and
+whenever it exceeds `MAX_BYTES`; rotated files are gzipped as
+`<name>.<YYYY-MM-DD>.<n>.log.gz` and deleted after `BACKUP_DAYS`. In dev mode,
 messages are also printed to the console.
+
+A log file has a single writing process, since rotating a file another
+process still writes to fails on Windows and loses records elsewhere. The
+process holding the lock of `<name>.log` (e.g. the menu) owns it; one started
+meanwhile (e.g. a watcher next to the menu) logs to `<name>-<pid>.log`.
+Nobody rotates those once their process exited, so they and their rotated
+files are deleted after `BACKUP_DAYS` too, at startup and on each rotation.
 """
 
 import os
+import re
+import glob
+import gzip
+import time
+import queue
+import atexit
+import shutil
 import logging
-from datetime import datetime
+import logging.handlers
+
+
+LOG_DIR = "logs"
+LOG_FORMAT = "%(asctime)s [%(levelname)s] [%(worker)s] %(name)s: %(message)s"
+MAX_BYTES = 20 * 1024**2
+BACKUP_DAYS = 30
+
+# Fields stamped on every record, see `set_log_context`
+_context = {"worker": "main"}
+
+
+def set_log_context(**fields):
+    """
+    Set fields stamped on every following log record, e.g. the current SKPD.
 
+    A field set to None is removed. Fields are process-wide.
 
-def setup_logging(dev_mode: bool):
+    Args:
+        **fields: Field values, available in the format as `%(<field>)s`.
+    """
+    for key, value in fields.items():
+        if value is None:
+            _context.pop(key, None)
+        else:
+            _context[key] = value
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamp the log context on each record, before it leaves the calling thread.
+    """
+
+    def filter(self, record):
+        for key, value in _context.items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Sample repetitive DEBUG records.
+
+    Per logger and message template, the first `burst` records of every
+    `window` seconds pass, then only one in `every`. Records above DEBUG
+    always pass.
+
+    Attributes:
+        burst (int): Records passed as is per window.
+        every (int): Pass one record in this many after the burst.
+        window (float): Seconds before the counts reset.
+        dropped (int): Records dropped since start.
+    """
+
+    def __init__(self, burst: int = 20, every: int = 50, window: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.every = every
+        self.window = window
+        self.dropped = 0
+        self._counts = {}
+        self._window_start = time.monotonic()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._counts.clear()
+            self._window_start = now
+
+        key = (record.name, record.msg)
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        if count <= self.burst or (count - self.burst) % self.every == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    File handler rotating at midnight and on size, gzipping rotated files.
+
+    Attributes:
+        max_bytes (int): Rotate when the file exceeds this size.
+        backup_days (int): Delete rotated files older than this many days.
+    """
+
+    def __init__(
+        self, filename: str, max_bytes: int = MAX_BYTES, backup_days: int = BACKUP_DAYS
+    ):
+        super().__init__(filename, when="midnight", encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+        self.backup_days = backup_days
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes and self.stream:
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        # Rotated files are named after the day their records belong to
+        day = time.strftime("%Y-%m-%d", time.localtime(self.rolloverAt - self.interval))
+        stem = os.path.splitext(self.baseFilename)[0]
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            index = len(glob.glob(f"{glob.escape(stem)}.{day}.*.log.gz")) + 1
+            with (
+                open(self.baseFilename, "rb") as source,
+                gzip.open(f"{stem}.{day}.{index}.log.gz", "wb") as target,
+            ):
+                shutil.copyfileobj(source, target)
+            os.remove(self.baseFilename)
+
+        now = time.time()
+        if now >= self.rolloverAt:
+            self.rolloverAt = self.computeRollover(now)
+            delete_expired_logs(stem, self.backup_days, now)
+        self.stream = self._open()
+
+
+def delete_expired_logs(stem: str, backup_days: int = BACKUP_DAYS, now: float = None):
+    """
+    Delete the rotated files of a log and its stale per-process logs.
+
+    Per-process logs are `<stem>-<pid>.log` and their rotated files. The live
+    `<stem>.log` is never deleted; a per-process log is once it was not
+    written to for `backup_days`, its process is gone by then.
+
+    Args:
+        stem (str): The log path without `.log`, e.g. `logs/sipd-bot`.
+        backup_days (int, optional): Age in days of the deleted files.
+        now (float, optional): The current time. Defaults to `time.time()`.
+    """
+    now = time.time() if now is None else now
+    directory, name = os.path.split(stem)
+    expired = re.compile(
+        rf"{re.escape(name)}(\.\d{{4}}-\d\d-\d\d\.\d+\.log\.gz"
+        rf"|-\d+(\.\d{{4}}-\d\d-\d\d\.\d+\.log\.gz|\.log))"
+    )
+    for entry in os.scandir(directory or "."):
+        if not entry.is_file() or not expired.fullmatch(entry.name):
+            continue
+        try:
+            if now - entry.stat().st_mtime > backup_days * 86_400:
+                os.remove(entry.path)
+        except OSError as e:
+            # Still open by a running process on Windows, next time then
+            logging.getLogger(__name__).debug("Cannot delete %s: %s", entry.path, e)
+
+
+def _lock_log(name: str):
+    """
+    Lock `<name>.log` for this process, until it exits.
+
+    Args:
+        name (str): The log name.
+
+    Returns:
+        file: The open lock file to keep, or None if another process holds it.
+    """
+    lock = open(f"{LOG_DIR}/{name}.lock", "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+# Lock of the log file owned by this process, released when it exits
+_log_lock = None
+
+
+def setup_logging(dev_mode: bool, worker: str = None):
     """
     Initialize logging with file and optional console output.
 
     Args:
         dev_mode (bool): Enables DEBUG level and console logging if True.
+        worker (str, optional): Queue worker name. The worker logs to its own
+            `worker-<name>.log` and stamps its name on every record.
+
+    Returns:
+        QueueListener: The running listener, stopped at exit.
     """
-    os.makedirs("logs", exist_ok=True)
-    log_level = logging.DEBUG if dev_mode else logging.INFO
-    log_filename = datetime.now().strftime("logs/%Y-%m-%d.log")
+    global _log_lock
 
-    handlers = [logging.FileHandler(log_filename, encoding="utf-8")]
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_level = logging.DEBUG if dev_mode else logging.INFO
+    log_name = f"worker-{worker}" if worker else "sipd-bot"
+    if worker:
+        set_log_context(worker=worker)
+    if _log_lock is None:
+        _log_lock = _lock_log(log_name)
+        if _log_lock is None:
+            # Another process writes and rotates <name>.log
+            log_name = f"{log_name}-{os.getpid()}"
+        else:
+            # The owner may have been down for days: catch up on expiry
+            delete_expired_logs(f"{LOG_DIR}/{log_name}")
 
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [SizedTimedRotatingFileHandler(f"{LOG_DIR}/{log_name}.log")]
     if dev_mode:
         handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(DebugSampler())
+
+    root = logging.getLogger()
+    root.setLevel(log_level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
 
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=handlers,
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
     )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
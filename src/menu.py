@@ -11,10 +11,15 @@ Main Menu:
 2. Download Lampiran I.1 (Perkada)
    ├─ 1. Semua OPD
    ├─ 2. Semua UPT
+   ├─ 3. Rekap & gabung PDF hasil download
    └─ 0. Kembali
+8. Sync SKPD registry
 9. Reset session cookies
 0. Keluar
 
+SKPD names come from the SKPD registry (`data/skpd-registry.json`), which is
+synced from SIPD-RI when it is older than its TTL.
+
 Usage:
 - Navigates using numeric input.
 - Submenus are shown when available.
@@ -26,12 +31,30 @@ Structure:
 
 import os
 import logging
-import pandas as pd
+from datetime import datetime
 from src.sipd_bot import SIPDBot
+from src.sipd_bot.ledger import Ledger
+from src.sipd_bot.session import SessionExpiredError
 from src.file_manager import FileManager
+from src.lampiran_pipeline import run_lampiran_pipeline
+from src.watcher import JurnalWatcher, validate_jurnal_workbook
+from src.selector_selftest import run_selector_selftest
+from src.sipd_bot.skpd_registry import SKPDRegistry, StaleSeedError
+from src.dry_run import plan_jurnal, plan_posting, plan_lampiran
+from src.work_queue import DEFAULT_QUEUE_URL
+from src.queue_worker import QueueWorker, submit_job, job_report, write_job_report
+from src.reconcile import (
+    load_jurnal_workbooks,
+    load_reference,
+    reconcile,
+    write_reconciliation_report,
+)
 
 logger = logging.getLogger(__name__)
 
+# SIPDBot keyword options from the CLI (e.g. profile, trace), set by `run_menu`
+BOT_OPTIONS = {}
+
 
 def clear_screen():
     """Clear the terminal screen."""
@@ -61,12 +84,23 @@ def handle_jurnal_umum():
             if not file_path:
                 continue
 
-            df = pd.read_excel(file_path, dtype=str)
-            jurnal_umum = df.values.tolist()
+            # Same loader as the watcher and dry-run, so ledger keys match
+            jurnal_umum, _, errors = validate_jurnal_workbook(file_path)
+            if errors:
+                print("\n".join(errors))
+                input("\nPerbaiki file jurnal! Tekan Enter untuk melanjutkan...")
+                continue
 
-            with SIPDBot() as bot:
-                bot.login()
-                bot.input_jurnal_umum(jurnal_umum)
+            try:
+                with SIPDBot(**BOT_OPTIONS) as bot:
+                    bot.login()
+                    bot.input_jurnal_umum(jurnal_umum)
+            except SessionExpiredError:
+                # The unsaved lines are gone with the form, nothing to resume
+                logger.exception("Session expired during Input Jurnal Umum")
+                print("\nSesi SIPD-RI berakhir, baris yang belum disimpan hilang.")
+                input("Ulangi Input Jurnal Umum. Tekan Enter untuk melanjutkan...")
+                continue
             break
 
         elif choice == "0":
@@ -91,16 +125,18 @@ def handle_posting_jurnal():
 
         if choice == "1":
             print(">>>>>>>>>>>>> Posting Jurnal Pendapatan")
-            with SIPDBot() as bot:
+            skpd = input("Nama SKPD: ").strip()
+            with SIPDBot(**BOT_OPTIONS) as bot:
                 bot.login()
-                bot.posting_pendapatan()
+                bot.posting_pendapatan(skpd)
             break
 
         elif choice == "2":
             print(">>>>>>>>>>>>> Posting Jurnal Belanja")
-            with SIPDBot() as bot:
+            skpd = input("Nama SKPD (kosongkan untuk semua): ").strip()
+            with SIPDBot(**BOT_OPTIONS) as bot:
                 bot.login()
-                bot.posting_belanja()
+                bot.posting_belanja(skpd)
             break
 
         elif choice == "0":
@@ -111,6 +147,38 @@ def handle_posting_jurnal():
 
 
 # ---------- 2. Download Lampiran I.1 (Perkada) ----------
+def select_lampiran_formats(lampiran: str) -> list:
+    """Ask for the download formats and return (lampiran, format) pairs."""
+    print("\nFormat: 1. PDF  2. Excel  3. PDF dan Excel")
+    choice = input("Pilih format [1]: ").strip() or "1"
+    formats = {"1": ["PDF"], "2": ["Excel"], "3": ["PDF", "Excel"]}.get(choice, ["PDF"])
+    return [(lampiran, file_format) for file_format in formats]
+
+
+def confirm_skpd_list(bot, level: str, label: str) -> list:
+    """Get the SKPD names of a level, asking before using an outdated seed list."""
+    try:
+        return bot.get_skpd_list(level=level)
+    except StaleSeedError as e:
+        print(f"\nPERINGATAN: daftar {label} tidak didapat dari SIPD-RI.")
+        print(f"Tersedia daftar lama: {', '.join(e.files)}")
+        if input("Gunakan daftar lama ini? (y/n): ").strip().lower() != "y":
+            return []
+        return bot.get_skpd_list(level=level, allow_seed=True)
+    except ValueError:
+        input(f"Daftar {label} kosong! Tekan Enter untuk kembali...")
+        return []
+
+
+def registry_names(level: str) -> list:
+    """List the SKPD names of a level offline, warning about an outdated seed list."""
+    registry = SKPDRegistry()
+    warning = registry.seed_warning(level)
+    if warning:
+        print(f"PERINGATAN: {warning}")
+    return registry.names(level)
+
+
 # TODO: update perkada (Sub-menu) to Lampiran (Menu) instead
 def handle_download_perkada():
     while True:
@@ -120,30 +188,38 @@ def handle_download_perkada():
         print("---------- Download Lampiran I.1 (Perkada) ----------")
         print("1. Semua OPD")
         print("2. Semua UPT")
+        print("3. Rekap & gabung PDF hasil download")
         print("0. Kembali")
 
         choice = input("\nPilih opsi: ").strip()
 
         if choice == "1":
             output_dir = "Lampiran_Perkada_OPD"
-            skpd_list = []
-            with open("data/SKPD-2024.txt", mode="r", encoding="utf-8") as f:
-                skpd_list = [line.strip() for line in f]
+            reports = select_lampiran_formats("Lampiran I.1 (Perkada)")
 
-            with SIPDBot() as bot:
+            with SIPDBot(**BOT_OPTIONS) as bot:
                 bot.login()
-                bot.download_lampiran_perkada(output_dir, skpd_list)
+                skpd_list = confirm_skpd_list(bot, "skpd", "OPD")
+                if skpd_list:
+                    bot.export_lppd(output_dir, skpd_list, reports)
             break
 
         elif choice == "2":
             output_dir = "Lampiran_Perkada_UPT"
-            skpd_kpa_list = []
-            with open("data/SKPD-KPA-2024.txt", mode="r", encoding="utf-8") as f:
-                skpd_kpa_list = [line.strip() for line in f]
+            reports = select_lampiran_formats("Lampiran I.1 (Perkada)")
 
-            with SIPDBot() as bot:
+            with SIPDBot(**BOT_OPTIONS) as bot:
                 bot.login()
-                bot.download_lampiran_perkada(output_dir, skpd_kpa_list)
+                skpd_kpa_list = confirm_skpd_list(bot, "unit", "UPT")
+                if skpd_kpa_list:
+                    bot.export_lppd(output_dir, skpd_kpa_list, reports)
+            break
+
+        elif choice == "3":
+            for output_dir in ["Lampiran_Perkada_OPD", "Lampiran_Perkada_UPT"]:
+                if os.path.isdir(output_dir) and not handle_rekap_lampiran(output_dir):
+                    break
+            input("\nTekan Enter untuk kembali...")
             break
 
         elif choice == "0":
@@ -153,14 +229,260 @@ def handle_download_perkada():
             input("Pilihan tidak valid! Tekan Enter untuk melanjutkan...")
 
 
+# ---------- Rekap Lampiran (menu 2.3 and CLI) ----------
+def handle_rekap_lampiran(input_dir: str, workers: int = None) -> bool:
+    """Extract totals and merge the downloaded Lampiran PDF of a folder."""
+    try:
+        df = run_lampiran_pipeline(input_dir, workers=workers)
+    except ImportError as e:
+        logger.error("Rekap Lampiran unavailable: %s", e)
+        print("Rekap Lampiran membutuhkan pypdf. Install dengan:")
+        print("  uv sync --extra pdf   (atau: pip install pypdf)")
+        return False
+    print(f"{input_dir}: {df['skpd'].nunique() if not df.empty else 0} SKPD direkap")
+    failed = df.attrs.get("failed", {})
+    if failed:
+        print(f"PERINGATAN: {len(failed)} PDF tidak dapat dibaca, dilewati:")
+        for name, error in sorted(failed.items()):
+            print(f"- {name}: {error}")
+    return True
+
+
+# ---------- Reconciliation (CLI) ----------
+def handle_reconcile(
+    jurnal_paths: list, reference_paths: list, output_path: str, tolerance: float
+):
+    """Reconcile journal workbooks with SIPD-RI exports and write a report."""
+    jurnal = load_jurnal_workbooks(jurnal_paths)
+    reference = load_reference(reference_paths)
+    result = reconcile(jurnal, reference, tolerance)
+    write_reconciliation_report(result, output_path)
+
+    print(result["status"].value_counts().to_string())
+    print(f"\nLaporan rekonsiliasi: {output_path}")
+
+
+# ---------- Watch inbox (CLI) ----------
+def handle_watch(inbox: str, interval: float, until=None, **bot_options):
+    """Input every journal workbook dropped into the inbox with one bot session."""
+    watcher = JurnalWatcher(inbox, interval, bot_options)
+    watcher.run(until)
+
+
+# ---------- Selector self-test (CLI) ----------
+def handle_selector_selftest(repeat: int = 20) -> bool:
+    """Time the screen selectors on the stand-in pages, return True if all pass."""
+    results = run_selector_selftest(repeat)
+
+    header = f"{'Screen':<24}{'Selector':<24}{'Match':>6}{'ms':>8}{'Lama ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        legacy = (
+            f"{r['legacy_ms']:>9.2f}" if r["legacy_ms"] is not None else f"{'-':>9}"
+        )
+        flag = "" if r["ok"] else "  GAGAL"
+        print(
+            f"{r['screen']:<24}{r['name']:<24}{r['matches']:>6}{r['ms']:>8.2f}{legacy}{flag}"
+        )
+    return all(r["ok"] for r in results)
+
+
+# ---------- Dry run (CLI) ----------
+def _format_duration(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}j {rest // 60:02d}m"
+
+
+def handle_dry_run(
+    task: str,
+    files: list = None,
+    skpd_list: list = None,
+    level: str = "skpd",
+    formats: list = None,
+    output_dir: str = None,
+    items_per_skpd: int = None,
+    days: int = 30,
+    max_workers: int = 4,
+    deadline: str = "16:00",
+) -> bool:
+    """Print a time estimate of a job without opening SIPD-RI, return True if valid."""
+    ledger = Ledger()
+    try:
+        if task == "jurnal":
+            plan = plan_jurnal(files, ledger, days, max_workers)
+        elif task in ("pendapatan", "belanja"):
+            plan = plan_posting(
+                task, skpd_list or [], ledger, items_per_skpd, days, max_workers
+            )
+        else:
+            skpd_list = skpd_list or registry_names(level)
+            reports = [("Lampiran I.1 (Perkada)", fmt) for fmt in formats or ["PDF"]]
+            output_dir = output_dir or (
+                "Lampiran_Perkada_OPD" if level == "skpd" else "Lampiran_Perkada_UPT"
+            )
+            plan = plan_lampiran(
+                skpd_list, reports, output_dir, ledger, days, max_workers
+            )
+    finally:
+        ledger.close()
+
+    model = plan["model"]
+    print(f"Simulasi: {plan['task']}")
+    print(f"Item dikerjakan : {plan['items']}")
+    if "skipped" in plan:
+        print(f"Item sudah selesai (dilewati): {plan['skipped']}")
+    if "items_per_skpd" in plan:
+        print(f"Perkiraan item per SKPD: {plan['items_per_skpd']}")
+    history = f"{model['samples']} item riwayat" if model["samples"] else "default"
+    print(f"Kegagalan historis: {model['failure_rate']:.1%} ({history})")
+
+    print(f"\n{'Worker':>6}{'Detik/item':>12}{'Estimasi':>12}")
+    for e in plan["estimates"]:
+        mark = "  <- disarankan" if e["workers"] == plan["workers"] else ""
+        observed = "" if e["workers"] in model["observed"] else "*"
+        print(
+            f"{e['workers']:>6}{e['item_seconds']:>11.1f}{observed:1}"
+            f"{_format_duration(e['seconds']):>12}{mark}"
+        )
+    print("* tanpa riwayat pada tingkat paralel ini, diekstrapolasi")
+
+    finish_at = f"{plan['finish_at']:%H:%M}"
+    print(f"\nPerkiraan selesai: {finish_at} ({plan['workers']} worker)")
+    if plan["finish_at"].date() > datetime.now().date() or finish_at > deadline:
+        print(f"PERINGATAN: melewati batas jam kerja {deadline}")
+
+    if plan["errors"]:
+        print(f"\n{len(plan['errors'])} masalah input:")
+        for error in plan["errors"]:
+            print(f"- {error}")
+    return not plan["errors"]
+
+
+# ---------- Posting queue export (CLI) ----------
+def handle_export_posting(
+    kind: str,
+    skpd_list: list = None,
+    level: str = "skpd",
+    output_dir: str = "Antrean_Posting",
+    **bot_options,
+):
+    """Export the unposted transactions of every SKPD without posting anything."""
+    skpd_list = skpd_list or registry_names(level)
+    if not skpd_list:
+        print(f"Daftar SKPD ({level}) kosong, sinkronkan registry SKPD dulu")
+        return
+    with SIPDBot(**bot_options) as bot:
+        bot.login()
+        counts = bot.export_posting_queue(kind, skpd_list, output_dir)
+
+    for skpd, rows in counts.items():
+        print(f"{skpd}: {rows} transaksi belum diposting")
+    print(f"\n{len(counts)}/{len(skpd_list)} SKPD diekspor ke {output_dir}/{kind}")
+
+
+# ---------- Distributed jobs (CLI) ----------
+def handle_queue_submit(
+    task: str,
+    skpd_list: list = None,
+    level: str = "skpd",
+    formats: list = None,
+    output_dir: str = None,
+    queue_url: str = DEFAULT_QUEUE_URL,
+) -> str:
+    """Split a task over the SKPD into work items of a new job, return the job id."""
+    task = {"pendapatan": "posting_pendapatan", "belanja": "posting_belanja"}.get(
+        task, "export_lppd"
+    )
+    params = {}
+    if task == "export_lppd":
+        skpd_list = skpd_list or registry_names(level)
+        params = {
+            "output_dir": output_dir
+            or ("Lampiran_Perkada_OPD" if level == "skpd" else "Lampiran_Perkada_UPT"),
+            "reports": [("Lampiran I.1 (Perkada)", fmt) for fmt in formats or ["PDF"]],
+        }
+
+    try:
+        job_id = submit_job(task, skpd_list, params, queue_url)
+    except ValueError as e:
+        print(f"Job tidak dapat dibuat: {e}")
+        return None
+    print(f"Job {job_id}: {task}, {len(set(skpd_list))} SKPD masuk antrean")
+    return job_id
+
+
+def handle_queue_work(
+    queue_url: str = DEFAULT_QUEUE_URL, job_id: str = None, **worker_options
+):
+    """Work on the queued items with one bot session until the queue is empty."""
+    worker = QueueWorker(queue_url, job_id, **worker_options)
+    processed = worker.run()
+    print(f"Worker {worker.name} selesai, {processed} SKPD dikerjakan")
+
+
+def handle_queue_report(
+    queue_url: str = DEFAULT_QUEUE_URL, job_id: str = None, output_path: str = None
+) -> bool:
+    """Print and save the merged results of a job, return True if every item is done."""
+    report = job_report(job_id, queue_url)
+    if report.empty:
+        print("Job tidak ditemukan")
+        return False
+
+    job_id = report["job_id"].iloc[0]
+    print(f"Job {job_id}: {report['task'].iloc[0]}")
+    print(report["status"].value_counts().to_string())
+
+    output_path = output_path or f"Laporan Job {job_id}.xlsx"
+    write_job_report(report, output_path)
+    print(f"\nLaporan job: {output_path}")
+    return bool((report["status"] == "done").all())
+
+
+# ---------- 8. Sync SKPD registry ----------
+def handle_sync_skpd():
+    with SIPDBot(**BOT_OPTIONS) as bot:
+        bot.login()
+        bot.sync_skpd_registry(force=True)
+
+
 # ---------- 9. Reset session cookies ----------
 def handle_reset_cookies():
-    with SIPDBot() as bot:
+    with SIPDBot(**BOT_OPTIONS) as bot:
         bot.reset_cookies()
 
 
+# ---------- Ledger report (CLI) ----------
+def handle_ledger_report(days: int = 7):
+    """Print throughput and failures per day and operation from the ledger."""
+    ledger = Ledger()
+    rows = ledger.report(days)
+    ledger.close()
+
+    if not rows:
+        print(f"Tidak ada data ledger dalam {days} hari terakhir.")
+        return
+
+    header = f"{'Tanggal':<12}{'Operasi':<28}{'Sukses':>8}{'Gagal':>8}{'Skip':>8}{'Durasi':>10}{'Item/jam':>10}"
+    print(header)
+    print("-" * len(header))
+    for day, operation, ok, failed, skipped, seconds, per_hour in rows:
+        print(
+            f"{day:<12}{operation:<28}{ok:>8}{failed:>8}{skipped:>8}"
+            f"{seconds:>9.0f}s{per_hour:>10.1f}"
+        )
+
+
 # ---------- MAIN MENU ----------
-def run_menu():
+def run_menu(**bot_options):
+    """
+    Run the interactive menu.
+
+    Args:
+        **bot_options: Keyword options passed to every SIPDBot session.
+    """
+    BOT_OPTIONS.update(bot_options)
     logger.info("SIPD-RI Helper Menu launched")
 
     while True:
@@ -173,6 +495,7 @@ def run_menu():
         print("3. Download Lampiran I.1 (Perkada)")
 
         print("\n---------- Lain-lain ----------")
+        print("8. Sinkronisasi data SKPD")
         print("9. Reset cookies")
         print("0. Keluar")
 
@@ -187,6 +510,9 @@ def run_menu():
         elif choice == "3":
             handle_download_perkada()
 
+        elif choice == "8":
+            handle_sync_skpd()
+
         elif choice == "9":
             handle_reset_cookies()
 
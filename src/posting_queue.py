@@ -0,0 +1,37 @@
+"""
+Reading back the posting queue snapshots written by `SIPDBot.export_posting_queue`.
+
+Snapshots are one file per SKPD, `<output_dir>/<kind>/<SKPD>.parquet`, or
+`.csv` when pyarrow was not installed. Building and writing them lives in
+`src.sipd_bot.posting_snapshot`, re-exported here.
+"""
+
+import glob
+import pandas as pd
+
+# The whole snapshot API in one place, writing included
+from src.sipd_bot.posting_snapshot import (
+    posting_queue_frame,
+    snapshot_path,
+    write_snapshot,
+)
+
+
+def load_snapshots(output_dir: str, kind: str = "*") -> pd.DataFrame:
+    """
+    Read the snapshots of every SKPD back into one DataFrame.
+
+    Args:
+        output_dir (str): The export folder.
+        kind (str, optional): `pendapatan`, `belanja` or `*` for both.
+
+    Returns:
+        pd.DataFrame: The concatenated snapshots, empty if there are none.
+    """
+    frames = []
+    for path in sorted(glob.glob(f"{output_dir}/{kind}/*.*")):
+        if path.endswith(".parquet"):
+            frames.append(pd.read_parquet(path))
+        elif path.endswith(".csv"):
+            frames.append(pd.read_csv(path))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,322 @@
+"""
+Coordinator and worker of distributed bot jobs.
+
+One PC running one SIPDBot is the ceiling of a normal run. A distributed job
+spreads the SKPD of a task over several workers, each a separate process with
+its own browser and session cookie file:
+
+    python main.py queue submit belanja --skpd "DINAS A" "DINAS B" ...
+    python main.py queue work --cookie-file cookies-2.json     # once per worker
+    python main.py queue report                                # merged report
+
+The job lives in a shared work queue (see `src.work_queue`), one item per
+SKPD. A worker leases items, runs the task for each SKPD and records the
+outcome with the item counts from its own ledger. A background thread renews
+the worker's leases, so items of a worker that died go back to the queue.
+`write_job_report` merges the results of every worker into one workbook.
+"""
+
+import json
+import time
+import logging
+import threading
+import pandas as pd
+from src.sipd_bot import SIPDBot
+from src.work_queue import DEFAULT_QUEUE_URL, open_queue, worker_name
+
+
+logger = logging.getLogger(__name__)
+
+# Task name -> runner called with (bot, skpd, job params)
+TASKS = {
+    "posting_pendapatan": lambda bot, skpd, params: bot.posting_pendapatan(
+        skpd, interactive=False
+    ),
+    "posting_belanja": lambda bot, skpd, params: bot.posting_belanja(skpd),
+    "export_lppd": lambda bot, skpd, params: bot.export_lppd(
+        params["output_dir"], [skpd], [tuple(report) for report in params["reports"]]
+    ),
+}
+
+
+def submit_job(
+    task: str, skpd_list: list, params: dict = None, queue_url: str = DEFAULT_QUEUE_URL
+) -> str:
+    """
+    Split a task over a list of SKPD into work items of a new job.
+
+    Args:
+        task (str): A task name of `TASKS`.
+        skpd_list (list): The SKPD names, one work item each.
+        params (dict, optional): Task parameters, e.g. `output_dir` and
+            `reports` for `export_lppd`.
+        queue_url (str, optional): The work queue broker URL.
+
+    Returns:
+        str: The job id.
+
+    Raises:
+        ValueError: If the task is unknown or the SKPD list is empty.
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown task: {task}")
+    if not skpd_list:
+        raise ValueError("A job needs at least one SKPD")
+
+    queue = open_queue(queue_url)
+    try:
+        return queue.submit(task, list(dict.fromkeys(skpd_list)), params)
+    finally:
+        queue.close()
+
+
+class QueueWorker:
+    """
+    Claim work items from the queue and run them with one SIPDBot session.
+
+    Attributes:
+        queue_url (str): The work queue broker URL.
+        job_id (str): Only work on this job, or on any job if None.
+        name (str): The worker name stored on its items.
+        batch (int): Items leased per claim.
+        lease (float): Lease duration in seconds, renewed every third of it.
+        max_attempts (int): Attempts of an item before it is marked failed.
+        wait (bool): Keep polling for new items when the queue is empty.
+        interval (float): Seconds between polls while waiting.
+        bot_options (dict): Keyword options for the SIPDBot session.
+    """
+
+    def __init__(
+        self,
+        queue_url: str = DEFAULT_QUEUE_URL,
+        job_id: str = None,
+        name: str = None,
+        batch: int = 2,
+        lease: float = 900,
+        max_attempts: int = 3,
+        wait: bool = False,
+        interval: float = 30,
+        bot_options: dict = None,
+    ):
+        self.queue_url = queue_url
+        self.job_id = job_id
+        self.name = name or worker_name()
+        self.batch = batch
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.wait = wait
+        self.interval = interval
+        self.bot_options = bot_options or {}
+        self.bot = None
+        self.queue = None
+        self._stop = threading.Event()
+        # Item being processed, watched by the heartbeat
+        self._item_id = None
+
+    def run(self) -> int:
+        """
+        Work until the queue is empty, or until interrupted when `wait` is set.
+
+        Returns:
+            int: Number of items processed by this worker.
+        """
+        self.queue = open_queue(self.queue_url)
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        logger.info("Worker %s started on %s", self.name, self.queue_url)
+        print(f"Worker {self.name} berjalan (Ctrl+C untuk berhenti)")
+
+        processed = 0
+        try:
+            while True:
+                items = self.queue.claim(self.name, self.job_id, self.batch, self.lease)
+                if not items:
+                    if not self.wait:
+                        break
+                    if self.bot and not self.bot.keep_alive():
+                        # Session dropped while idle, the next item logs in again
+                        self.close()
+                    time.sleep(self.interval)
+                    continue
+
+                for item in items:
+                    if not self.queue.start(item["item_id"], self.name, self.lease):
+                        logger.info("Item %s taken by another worker", item["item_id"])
+                        continue
+                    self.process(item)
+                    processed += 1
+        except KeyboardInterrupt:
+            logger.info("Worker %s interrupted", self.name)
+        finally:
+            self._stop.set()
+            heartbeat.join()
+            self.queue.release(self.name)
+            self.queue.close()
+            self.close()
+
+        logger.info("Worker %s stopped after %d item(s)", self.name, processed)
+        return processed
+
+    def process(self, item: dict):
+        """
+        Run the task of one work item and record its outcome in the queue.
+
+        The item fails when the task raises or leaves failed items in the
+        ledger; it is then queued again until `max_attempts`.
+
+        Args:
+            item (dict): A claimed item, see `WorkQueue.claim`.
+        """
+        started_at = time.time()
+        result = {"worker": self.name}
+        self._item_id = item["item_id"]
+        try:
+            bot = self._session()
+            result["run_id"] = bot.run_id
+            TASKS[item["task"]](bot, item["skpd"], item["params"])
+            result.update(bot.ledger.run_counts(since=started_at))
+            if result.get("failed"):
+                raise RuntimeError(f"{result['failed']} item gagal")
+        except Exception as e:
+            logger.exception("Work item %s (%s) failed", item["item_id"], item["skpd"])
+            result.update(error=str(e), duration=round(time.time() - started_at, 1))
+            recorded = self.queue.fail(
+                item["item_id"], self.name, result, self.max_attempts
+            )
+            self._check_session()
+            print(f"GAGAL: {item['skpd']} ({e})")
+        else:
+            result["duration"] = round(time.time() - started_at, 1)
+            recorded = self.queue.finish(item["item_id"], self.name, result)
+            print(f"SELESAI: {item['skpd']} ({result['duration']:.0f} detik)")
+        finally:
+            self._item_id = None
+
+        if not recorded:
+            print(f"PERINGATAN: {item['skpd']} sudah diambil worker lain")
+
+    def close(self):
+        """Close the SIPDBot session if one is open."""
+        if self.bot:
+            self.bot.__exit__(None, None, None)
+            self.bot = None
+
+    def _heartbeat(self):
+        # SQLite connections stay in their thread, the heartbeat opens its own.
+        # A failed renewal (e.g. database locked) is retried on the next beat.
+        queue, renewed_at = None, time.monotonic()
+        while not self._stop.wait(self.lease / 3):
+            item_id = self._item_id
+            try:
+                queue = queue or open_queue(self.queue_url)
+                held = queue.renew(self.name, self.lease)
+            except Exception:
+                logger.exception("Lease renewal of worker %s failed", self.name)
+                if queue:
+                    queue.close()
+                    queue = None
+                if time.monotonic() - renewed_at > self.lease:
+                    logger.error(
+                        "Leases of worker %s expired, its items may be claimed "
+                        "by another worker",
+                        self.name,
+                    )
+                continue
+
+            renewed_at = time.monotonic()
+            if item_id is not None and item_id == self._item_id and item_id not in held:
+                logger.error(
+                    "Worker %s lost the lease of item %s to another worker, "
+                    "its result will not be recorded",
+                    self.name,
+                    item_id,
+                )
+        if queue:
+            queue.close()
+
+    def _session(self) -> SIPDBot:
+        if self.bot is None:
+            bot = SIPDBot(**self.bot_options).__enter__()
+            try:
+                bot.login()
+            except Exception:
+                bot.__exit__(None, None, None)
+                raise
+            self.bot = bot
+        return self.bot
+
+    def _check_session(self):
+        # Start a fresh session for the next item if the browser went away
+        if self.bot and (
+            not self.bot.browser.is_connected() or self.bot.page.is_closed()
+        ):
+            logger.warning("Browser session lost, restarting on next item")
+            try:
+                self.close()
+            except Exception:
+                self.bot = None
+
+
+def job_report(job_id: str = None, queue_url: str = DEFAULT_QUEUE_URL) -> pd.DataFrame:
+    """
+    Merge the results of every worker of a job.
+
+    Args:
+        job_id (str, optional): The job id. Defaults to the latest job.
+        queue_url (str, optional): The work queue broker URL.
+
+    Returns:
+        pd.DataFrame: One row per item with its status, worker, attempts,
+        `success`/`failed`/`skipped` item counts, `duration` and `error`.
+    """
+    queue = open_queue(queue_url)
+    try:
+        job_id = job_id or queue.latest_job()
+        items = queue.items(job_id) if job_id else pd.DataFrame()
+    finally:
+        queue.close()
+    if items.empty:
+        return items
+
+    results = pd.json_normalize(
+        items["result"].map(lambda r: json.loads(r) if isinstance(r, str) else {})
+    )
+    columns = ["success", "failed", "skipped", "duration", "error", "run_id"]
+    results = results.reindex(columns=columns)
+    results[["success", "failed", "skipped"]] = (
+        results[["success", "failed", "skipped"]].fillna(0).astype(int)
+    )
+    return pd.concat(
+        [
+            items[["job_id", "task", "skpd", "status", "worker", "attempts"]],
+            results,
+        ],
+        axis=1,
+    )
+
+
+def write_job_report(report: pd.DataFrame, output_path: str):
+    """
+    Write the merged job results to an Excel workbook.
+
+    Args:
+        report (pd.DataFrame): Output of `job_report`.
+        output_path (str): The `.xlsx` report path.
+    """
+    summary = report.groupby("status").agg(
+        skpd=("skpd", "size"),
+        success=("success", "sum"),
+        failed=("failed", "sum"),
+        skipped=("skipped", "sum"),
+    )
+    per_worker = report.groupby("worker").agg(
+        skpd=("skpd", "size"),
+        success=("success", "sum"),
+        failed=("failed", "sum"),
+        detik=("duration", "sum"),
+    )
+    with pd.ExcelWriter(output_path) as writer:
+        summary.to_excel(writer, sheet_name="Ringkasan")
+        per_worker.to_excel(writer, sheet_name="Per Worker")
+        report.to_excel(writer, sheet_name="Rincian", index=False)
+    logger.info("Job report saved: %s", output_path)
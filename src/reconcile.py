@@ -0,0 +1,165 @@
+"""
+Reconciliation between Jurnal Umum input workbooks and SIPD-RI exported data.
+
+Journal workbooks are the files used by `SIPDBot.input_jurnal_umum`: the first
+three columns are kode rekening, debit and kredit. An optional `skpd` column
+sets the SKPD of each line; otherwise the SKPD is taken from the file name
+(`<anything> - <SKPD>.xlsx`, or the whole file name).
+
+Reference data is any Excel/CSV/Parquet export from SIPD-RI (Lampiran, Buku
+Besar, ...) with a kode rekening column, an optional SKPD column, and either
+debit/kredit or a single nilai column.
+
+The amount parsing and the comparison itself live in
+`src.sipd_bot.verification`, shared with the Jurnal Umum form verification.
+"""
+
+import os
+import logging
+import pandas as pd
+
+# `reconcile` is part of this module's API, the CLI compares with it
+from src.sipd_bot.verification import (
+    invalid_amounts,
+    normalize_columns,
+    parse_amounts,
+    reconcile,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _warn_invalid_amounts(path: str, column: str, values: pd.Series):
+    invalid = values[invalid_amounts(values)]
+    if not invalid.empty:
+        logger.warning(
+            "%s: %d unparseable %s amount(s), e.g. %s",
+            path,
+            len(invalid),
+            column,
+            ", ".join(repr(value) for value in invalid.head(3)),
+        )
+
+
+def _skpd_from_path(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem.split(" - ", 1)[-1].strip().upper()
+
+
+def _read_table(path: str, **kwargs) -> pd.DataFrame:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(path, **kwargs)
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_excel(path, **kwargs)
+
+
+def load_jurnal_workbooks(paths: list) -> pd.DataFrame:
+    """
+    Load Jurnal Umum input workbooks into one DataFrame.
+
+    Args:
+        paths (list): The workbook paths.
+
+    Returns:
+        pd.DataFrame: Columns `skpd`, `kode_rekening`, `debit`, `kredit`, `source`.
+    """
+    frames = []
+    for path in paths:
+        raw = pd.read_excel(path, dtype=str)
+        named = normalize_columns(raw)
+        _warn_invalid_amounts(path, "debit", raw.iloc[:, 1])
+        _warn_invalid_amounts(path, "kredit", raw.iloc[:, 2])
+        df = pd.DataFrame(
+            {
+                "skpd": (
+                    named["skpd"].str.strip().str.upper()
+                    if "skpd" in named
+                    else _skpd_from_path(path)
+                ),
+                "kode_rekening": raw.iloc[:, 0].astype("string").str.strip(),
+                "debit": parse_amounts(raw.iloc[:, 1]),
+                "kredit": parse_amounts(raw.iloc[:, 2]),
+                "source": os.path.basename(path),
+            }
+        )
+        frames.append(df.dropna(subset=["kode_rekening"]))
+
+    jurnal = pd.concat(frames, ignore_index=True)
+    logger.info("Loaded %d jurnal lines from %d workbook(s)", len(jurnal), len(paths))
+    return jurnal
+
+
+def load_reference(paths: list) -> pd.DataFrame:
+    """
+    Load exported SIPD-RI data into one DataFrame.
+
+    Args:
+        paths (list): Excel, CSV or Parquet exports.
+
+    Returns:
+        pd.DataFrame: Columns `kode_rekening`, `debit`, `kredit` and, when the
+        exports have one, `skpd`.
+
+    Raises:
+        ValueError: If an export has no kode rekening or amount columns.
+    """
+    frames = []
+    for path in paths:
+        df = normalize_columns(_read_table(path))
+        if "kode_rekening" not in df:
+            raise ValueError(f"No kode rekening column in {path}")
+
+        for column in ("debit", "kredit", "nilai"):
+            if column in df:
+                _warn_invalid_amounts(path, column, df[column])
+
+        if "debit" in df or "kredit" in df:
+            debit = parse_amounts(df["debit"]) if "debit" in df else 0.0
+            kredit = parse_amounts(df["kredit"]) if "kredit" in df else 0.0
+        elif "nilai" in df:
+            nilai = parse_amounts(df["nilai"])
+            debit, kredit = nilai.clip(lower=0), (-nilai).clip(lower=0)
+        else:
+            raise ValueError(f"No debit/kredit or nilai column in {path}")
+
+        reference = pd.DataFrame(
+            {
+                "kode_rekening": df["kode_rekening"].astype("string").str.strip(),
+                "debit": debit,
+                "kredit": kredit,
+            }
+        )
+        if "skpd" in df:
+            reference.insert(
+                0, "skpd", df["skpd"].astype("string").str.strip().str.upper()
+            )
+        frames.append(reference.dropna(subset=["kode_rekening"]))
+
+    reference = pd.concat(frames, ignore_index=True)
+    logger.info("Loaded %d reference lines from %d file(s)", len(reference), len(paths))
+    return reference
+
+
+def write_reconciliation_report(result: pd.DataFrame, output_path: str):
+    """
+    Write the mismatches and a per-status summary to an Excel workbook.
+
+    Args:
+        result (pd.DataFrame): Output of `reconcile`.
+        output_path (str): The `.xlsx` report path.
+    """
+    summary = result.groupby("status").agg(
+        baris=("status", "size"),
+        selisih_debit=("selisih_debit", "sum"),
+        selisih_kredit=("selisih_kredit", "sum"),
+    )
+    with pd.ExcelWriter(output_path) as writer:
+        summary.to_excel(writer, sheet_name="Ringkasan")
+        result[result["status"] != "ok"].to_excel(
+            writer, sheet_name="Selisih", index=False
+        )
+        result.to_excel(writer, sheet_name="Semua", index=False)
+    logger.info("Reconciliation report saved: %s", output_path)
@@ -0,0 +1,165 @@
+"""
+Self-test of the AKLAP screen selectors against local stand-in pages.
+
+Each page object of `src.sipd_bot.screens` is built on its stand-in page from
+`src/standin/`, which mirrors the AKLAP markup the selectors rely on (same
+form groups, dropdowns, tables and modals, with realistic list sizes). Every
+locator is resolved `repeat` times and the median resolution time is
+reported, next to the `:has-text` selector it replaced where there is one.
+
+A selector fails the test when it does not resolve to exactly one element.
+"""
+
+import time
+import logging
+import statistics
+from pathlib import Path
+from playwright.sync_api import sync_playwright
+from src.sipd_bot.screens import (
+    JurnalUmumScreen,
+    PostingBelanjaScreen,
+    PostingQueueScreen,
+    LampiranScreen,
+)
+
+
+logger = logging.getLogger(__name__)
+
+STANDIN_DIR = Path(__file__).parent / "standin"
+
+SAMPLE_KODE = "8.1.05.01.01.1426"
+
+# (stand-in page, screen, {name: (locator getter, replaced selector or None)})
+CHECKS = [
+    (
+        "jurnal_umum.html",
+        JurnalUmumScreen,
+        {
+            "tab_input": (lambda s: s.tab_input, None),
+            "kode_rekening": (
+                lambda s: s.kode_rekening,
+                'div.tab-content div.active fieldset:has-text("Kode Rekening") input',
+            ),
+            "kode_rekening_option": (
+                lambda s: s.kode_rekening_option(SAMPLE_KODE),
+                'fieldset:has-text("Kode Rekening") ul[role="listbox"] '
+                f'li:has-text("{SAMPLE_KODE}")',
+            ),
+            "debit": (
+                lambda s: s.debit,
+                'div.tab-content div.active fieldset:has-text("Debit") input',
+            ),
+            "kredit": (
+                lambda s: s.kredit,
+                'div.tab-content div.active fieldset:has-text("Kredit") input',
+            ),
+            "btn_tambah": (
+                lambda s: s.btn_tambah,
+                'div.tab-content div.active fieldset button:has-text("Tambah")',
+            ),
+            "btn_simpan": (lambda s: s.btn_simpan, None),
+            "lines_table": (lambda s: s.lines_table, None),
+        },
+    ),
+    (
+        "posting_belanja.html",
+        PostingBelanjaScreen,
+        {
+            "first_row": (lambda s: s.rows.first, None),
+            "aksi_dropdown": (
+                lambda s: s.aksi_dropdown(s.rows.first),
+                "div.card-body table.b-table tbody tr >> nth=0 >> td >> nth=7 >> div.dropdown",
+            ),
+            "posting_menu": (
+                lambda s: s.posting_menu(s.aksi_dropdown(s.rows.first)),
+                None,
+            ),
+            "metode_input": (lambda s: s.metode_input, None),
+            "metode_option": (
+                lambda s: s.metode_option("Metode Aset"),
+                'div.modal-body ul[role=listbox] li:has-text("Metode Aset")',
+            ),
+            "btn_posting": (lambda s: s.btn_posting, None),
+            "success_popup": (lambda s: s.success_popup, None),
+        },
+    ),
+    (
+        "posting_belanja.html",
+        PostingQueueScreen,
+        {
+            "table": (lambda s: s.table, None),
+            "per_page": (lambda s: s.per_page, None),
+            "next_page": (lambda s: s.next_page, None),
+        },
+    ),
+    (
+        "lampiran.html",
+        LampiranScreen,
+        {
+            "skpd": (lambda s: s.skpd, None),
+            "konsolidasi": (lambda s: s.konsolidasi, None),
+            "radio_per_skpd": (lambda s: s.radio.nth(1), None),
+            "cetak_toggle": (lambda s: s.cetak_toggle, None),
+            "cetak_option": (
+                lambda s: s.cetak_option("PDF"),
+                'footer.modal-footer a.dropdown-item:has-text("PDF")',
+            ),
+        },
+    ),
+]
+
+
+def _time_locator(locator, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        count = locator.count()
+        timings.append((time.perf_counter() - started_at) * 1_000)
+    return count, statistics.median(timings)
+
+
+def run_selector_selftest(repeat: int = 20) -> list:
+    """
+    Resolve every screen selector on its stand-in page and time it.
+
+    Args:
+        repeat (int, optional): Resolutions per selector. Defaults to 20.
+
+    Returns:
+        list: One dict per selector with `screen`, `name`, `matches`, `ms`,
+        `legacy_ms` and `ok`.
+    """
+    results = []
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        page = browser.new_page()
+
+        for standin, screen_cls, locators in CHECKS:
+            page.goto((STANDIN_DIR / standin).resolve().as_uri())
+            screen = screen_cls(page)
+
+            for name, (get_locator, legacy) in locators.items():
+                matches, ms = _time_locator(get_locator(screen), repeat)
+                legacy_ms = (
+                    _time_locator(page.locator(legacy), repeat)[1] if legacy else None
+                )
+                results.append(
+                    {
+                        "screen": screen_cls.__name__,
+                        "name": name,
+                        "matches": matches,
+                        "ms": round(ms, 2),
+                        "legacy_ms": round(legacy_ms, 2) if legacy else None,
+                        "ok": matches == 1,
+                    }
+                )
+                logger.debug(
+                    "Selector %s.%s: %s", screen_cls.__name__, name, results[-1]
+                )
+
+        browser.close()
+
+    failed = [r for r in results if not r["ok"]]
+    if failed:
+        logger.error("%d selector(s) failed the self-test", len(failed))
+    return results
@@ -11,7 +11,9 @@ Classes:
 
 from .base import SIPDBotBase
 from .login import LoginMixin
+from .session import SessionMixin
 from .utils import UtilsMixin
+from .aklap_skpd import AklapSKPDMixin
 from .aklap_jurnal_umum import AklapJurnalUmumMixin
 from .aklap_posting_jurnal import AklapPostingJurnalMixin
 from .aklap_lampiran import AklapLampiranMixin
@@ -20,7 +22,9 @@ from .aklap_lampiran import AklapLampiranMixin
 class SIPDBot(
     SIPDBotBase,
     LoginMixin,
+    SessionMixin,
     UtilsMixin,
+    AklapSKPDMixin,
     AklapJurnalUmumMixin,
     AklapPostingJurnalMixin,
     AklapLampiranMixin,
@@ -7,23 +7,91 @@ It encapsulates all functionality related to 'Jurnal Umum' menu in AKLAP.
 import logging
 import pandas as pd
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from .ledger import hash_key
+from .verification import verify_jurnal_lines
+from .task import bot_task
+from .session import SessionExpiredError
+from .screens import JurnalUmumScreen
+from .metrics import shared_metrics
 
 
 logger = logging.getLogger(__name__)
 
+# Ledger operation of the rows of a saved journal, see `input_jurnal_umum`
+SAVED_OPERATION = "save_jurnal_umum"
+
+# Kode rekening, debit and kredit of every line of the entered lines table.
+# Columns are found by header; without headers the kode is the first cell
+# shaped like a kode rekening and debit/kredit the last two amount cells.
+JURNAL_LINES_JS = """table => {
+    const headers = [...table.querySelectorAll("thead th")].map(
+        th => th.innerText.trim().toLowerCase()
+    );
+    const column = name => headers.findIndex(h => h.includes(name));
+    const [kode, debit, kredit] = [column("kode"), column("debit"), column("kredit")];
+    const isKode = text => /^\\d+(\\.\\d+)+(\\s|$)/.test(text);
+    const isAmount = text => /^\\(?-?[\\d.,\\s]+\\)?$/.test(text);
+
+    return [...table.querySelectorAll("tbody > tr")]
+        .map(tr => [...tr.cells].map(td => td.innerText.trim()))
+        .filter(cells => cells.some(isKode))
+        .map(cells => {
+            const amounts = cells.filter(isAmount);
+            return [
+                kode >= 0 ? cells[kode].split(/\\s/)[0] : cells.find(isKode).split(/\\s/)[0],
+                debit >= 0 ? cells[debit] : amounts[amounts.length - 2],
+                kredit >= 0 ? cells[kredit] : amounts[amounts.length - 1],
+            ];
+        });
+}"""
+
+
+def jurnal_row_keys(jurnal_umum: list) -> list:
+    """
+    Get the ledger keys of the rows of a journal.
+
+    Args:
+        jurnal_umum (list): The journal rows, `[kode_rekening, debit, kredit]`.
+
+    Returns:
+        list: One `<journal hash>:<row number>` key per row.
+    """
+    jurnal_hash = hash_key(*(tuple(jurnal[:3]) for jurnal in jurnal_umum))
+    return [f"{jurnal_hash}:{n}" for n in range(1, len(jurnal_umum) + 1)]
+
 
 class AklapJurnalUmumMixin:
     """
     Provides automation functionality for the 'Jurnal Umum' section of AKLAP.
     """
 
-    def input_jurnal_umum(self, jurnal_umum: list):
+    @bot_task
+    def input_jurnal_umum(
+        self,
+        jurnal_umum: list,
+        skip_done: bool = False,
+        interactive: bool = True,
+        header: dict = None,
+    ) -> dict:
         """
         Automates the process of inputting multiple 'Jurnal Umum' records into the AKLAP system.
 
         Parameters:
             jurnal_umum (list): A list of journal entries, where each entry is a list containing
                                 [kode_rekening, debit, kredit].
+            skip_done (bool): Skip rows the ledger records as saved with the same
+                              journal, to finish a journal that was saved with
+                              failed rows. Defaults to False.
+            interactive (bool): Prompt the user before and after the input. When False,
+                                the header form is filled from `header` and the
+                                journal is saved automatically. Defaults to True.
+            header (dict): Header form values keyed by fieldset label, e.g.
+                           `{"Tanggal": "31-12-2025", "Keterangan": "..."}`.
+                           Only used when `interactive` is False.
+
+        Returns:
+            dict: `entered`, `skipped` and `failed` row numbers, the
+                  `verification` summary and whether the journal was `saved`.
 
         Behavior:
             - Navigates to the Jurnal Umum menu and selects the 'Input Jurnal Umum' tab.
@@ -31,7 +99,20 @@ class AklapJurnalUmumMixin:
                 - Inputs 'Kode Rekening' with dropdown selection (with retry mechanism).
                 - Fills in Debit and/or Kredit values if present.
                 - Clicks the 'Tambah' button to add the entry.
-            - Prompts the user at the start and end of the process for manual confirmation.
+                - Records the entry in the ledger, keyed by journal hash and row number.
+            - Failed rows are captured (screenshot, DOM, error) and retried once at the end.
+            - Page memory and latency are monitored, but the page is never recycled
+              since that would drop the unsaved lines. For the same reason a
+              dropped session raises SessionExpiredError instead of resuming.
+            - Interactive: prompts the user at the start and end of the process for
+              manual confirmation.
+            - The entered lines are read back from the form and verified against
+              the rows (counts and totals per kode rekening, debit/kredit balance).
+            - Non-interactive: fills the header, enters the lines and clicks 'Simpan'
+              only if every line was entered and the verification passed.
+            - Rows only count as done (`save_jurnal_umum` in the ledger) once the
+              journal is saved: after 'Simpan' succeeded, or when the user
+              confirms saving in interactive mode.
         """
         self.to_aklap()
         menu_jurnal_umum = 'a.sidebar-link:has-text("Jurnal Umum")'
@@ -43,80 +124,280 @@ class AklapJurnalUmumMixin:
         logger.info("Menu Jurnal Umum opened")
 
         # Menu Jurnal Umum - Tab Input Jurnal Umum
-        tab_header = self.page.locator("div.card-header")
-        tablist_input = tab_header.locator('a:has-text("Input Jurnal Umum")')
-        tablist_input.click()
+        screen = self.screen(JurnalUmumScreen)
+        screen.tab_input.click()
 
         # Manual User Input
-        print("\nIsi form Jurnal Umum!")
-        input("Tekan Enter untuk mengisi Jurnal secara otomatis...")
-
-        # Input Start
-        tab_content = self.page.locator("div.tab-content")
-        tabpanel_input = tab_content.locator("div.active")
-
-        for jurnal in jurnal_umum:
-            kode_rekening = jurnal[0]
-            debit = jurnal[1]
-            kredit = jurnal[2]
-
-            # Kode Rekening
-            max_retries = 5
-            input_kode_rekening = tabpanel_input.locator(
-                'fieldset:has-text("Kode Rekening") input'
-            )
-            input_kode_rekening.scroll_into_view_if_needed()
+        if interactive:
+            print("\nIsi form Jurnal Umum!")
+            input("Tekan Enter untuk mengisi Jurnal secara otomatis...")
+        else:
+            self._fill_jurnal_header(screen, header or {})
+
+        operation = "input_jurnal_umum"
+        done_keys = self.ledger.done_keys(SAVED_OPERATION) if skip_done else set()
 
-            for attempt in range(max_retries):
-                input_kode_rekening.click()
-                input_kode_rekening.type(kode_rekening)
-                dropdown_kode_rekening = tabpanel_input.locator(
-                    f'fieldset:has-text("Kode Rekening") ul[role="listbox"] li:has-text("{kode_rekening}")'
+        rows = []
+        skipped = []
+        for row_number, (row_key, jurnal) in enumerate(
+            zip(jurnal_row_keys(jurnal_umum), jurnal_umum), start=1
+        ):
+            if row_key in done_keys:
+                logger.info("Row %d already saved, skipping: %s", row_number, jurnal[0])
+                self.ledger.record(operation, row_key, "skipped")
+                skipped.append(row_number)
+                continue
+            rows.append((row_number, row_key, jurnal))
+
+        if not rows:
+            logger.info("Every row of the journal is already saved")
+            if interactive:
+                input(
+                    "\nSemua baris sudah pernah disimpan. Tekan Enter untuk kembali..."
                 )
+            return {
+                "entered": [],
+                "skipped": skipped,
+                "failed": [],
+                "verification": None,
+                "saved": False,
+            }
 
-                try:
-                    dropdown_kode_rekening.wait_for(timeout=10_000, state="visible")
-                    dropdown_kode_rekening.click()
-                    break
-                except PlaywrightTimeoutError:
-                    logger.warning(
-                        "Dropdown not found for kode: %s, retrying attempt [%d/%d]",
-                        kode_rekening,
-                        attempt + 1,
-                        max_retries,
-                    )
-                    input_kode_rekening.fill("")
-                    check_dropdown = tabpanel_input.locator(
-                        'fieldset:has-text("Kode Rekening") ul[role="listbox"]'
-                    )
-                    check_dropdown.wait_for(timeout=3_000, state="visible")
-            else:
-                logger.error(
-                    "Skipping kode rekening: %s (After %d attempts)",
-                    kode_rekening,
-                    max_retries,
+        def enter_row(row):
+            _, row_key, jurnal = row
+            with self.ledger.track(operation, row_key):
+                self._input_jurnal_row(screen, *jurnal[:3])
+
+        def reset_form():
+            # Reloading would drop the lines entered so far, only clear the input
+            self.page.keyboard.press("Escape")
+            screen.kode_rekening.fill("")
+
+        def restore_form():
+            # Re-authentication opens a fresh page without the unsaved lines,
+            # entering the remaining rows would save an incomplete journal
+            if self.page is not screen.page or not screen.kode_rekening.is_visible():
+                raise SessionExpiredError(
+                    "Session expired, the unsaved Jurnal Umum form is lost"
                 )
-                continue
+            reset_form()
 
-            # Debit
-            if not pd.isna(debit):
-                input_debit = tabpanel_input.locator('fieldset:has-text("Debit") input')
-                input_debit.click()
-                input_debit.type(debit)
+        failed_rows = self.process_with_retry(
+            operation,
+            rows,
+            enter_row,
+            reset=reset_form,
+            restore=restore_form,
+            describe=lambda row: f"row {row[0]}: {row[2][0]}",
+        )
+        failed = {row_number for row_number, _, _ in failed_rows}
+        # The whole source journal is expected in the form, except the rows
+        # already saved in an earlier journal (skip_done)
+        verification = self._verify_jurnal(
+            screen,
+            [
+                jurnal
+                for row_number, jurnal in enumerate(jurnal_umum, start=1)
+                if row_number not in skipped
+            ],
+        )
+        result = {
+            "entered": [row[0] for row in rows if row[0] not in failed],
+            "skipped": skipped,
+            "failed": sorted(failed),
+            "verification": verification,
+            "saved": False,
+        }
 
-            # Kredit
-            if not pd.isna(kredit):
-                input_kredit = tabpanel_input.locator(
-                    'fieldset:has-text("Kredit") input'
+        if not interactive:
+            if failed_rows:
+                logger.error(
+                    "%d row(s) failed, journal not saved: %s",
+                    len(failed_rows),
+                    result["failed"],
                 )
-                input_kredit.click()
-                input_kredit.type(kredit)
+            elif not verification["ok"]:
+                logger.error("Verification failed, journal not saved")
+            else:
+                self._save_jurnal(screen)
+                result["saved"] = True
+                self._record_saved_rows(rows, failed)
+            return result
 
-            # Tambah
-            btn_tambah = tabpanel_input.locator('fieldset button:has-text("Tambah")')
-            btn_tambah.scroll_into_view_if_needed()
-            btn_tambah.click()
+        if failed_rows:
+            print(f"\n{len(failed_rows)} baris gagal diinput:")
+            for row_number, _, jurnal in failed_rows:
+                print(f"- Baris {row_number}: {jurnal[0]}")
+
+        print(
+            f"\nVerifikasi: {verification['lines_entered']} dari "
+            f"{verification['lines_expected']} baris tercatat di form, "
+            f"debit {verification['debit']:,.2f} / kredit {verification['kredit']:,.2f}"
+        )
+        if not verification["balanced"]:
+            print("PERINGATAN: debit dan kredit tidak seimbang")
+        if verification["invalid_amounts"]:
+            print(
+                f"PERINGATAN: {verification['invalid_amounts']} nilai debit/kredit "
+                "tidak dapat dibaca"
+            )
+        for issue in verification["issues"]:
+            print(
+                f"- {issue['kode_rekening']}: {issue['status']} "
+                f"(baris {issue['baris_jurnal']}/{issue['baris_sipd']}, "
+                f"selisih debit {issue['selisih_debit']:,.2f}, "
+                f"kredit {issue['selisih_kredit']:,.2f})"
+            )
 
         # Input Finished
         print("\nJangan lupa untuk tekan tombol Simpan!")
-        input("Tekan Enter untuk kembali...")
+        answer = input("Ketik 'y' jika jurnal sudah disimpan, lalu tekan Enter: ")
+        if answer.strip().lower() == "y":
+            result["saved"] = True
+            self._record_saved_rows(rows, failed)
+        else:
+            logger.warning("Journal not confirmed as saved, rows not marked as done")
+        return result
+
+    def _record_saved_rows(self, rows: list, failed: set):
+        """
+        Mark the entered rows of a saved journal as done in the ledger.
+
+        Args:
+            rows (list): The `(row_number, row_key, jurnal)` rows of this run.
+            failed (set): Row numbers that were not entered.
+        """
+        for row_number, row_key, _ in rows:
+            if row_number not in failed:
+                self.ledger.record(SAVED_OPERATION, row_key, "success")
+
+    def _verify_jurnal(self, screen, expected: list) -> dict:
+        """
+        Read back every entered line in one call and compare it with the source rows.
+
+        Args:
+            screen (JurnalUmumScreen): The Input Jurnal Umum screen.
+            expected (list): The rows that should be in the form.
+
+        Returns:
+            dict: The verification summary, see `reconcile.verify_jurnal_lines`.
+        """
+        entered = screen.lines_table.evaluate(JURNAL_LINES_JS)
+        verification = verify_jurnal_lines(expected, entered)
+        log = logger.info if verification["ok"] else logger.warning
+        log(
+            "Jurnal verification: %d/%d line(s), debit %.2f, kredit %.2f, %d issue(s)",
+            verification["lines_entered"],
+            verification["lines_expected"],
+            verification["debit"],
+            verification["kredit"],
+            len(verification["issues"]),
+        )
+        return verification
+
+    def _fill_jurnal_header(self, screen, header: dict):
+        """
+        Fill the 'Input Jurnal Umum' header form.
+
+        Args:
+            screen (JurnalUmumScreen): The Input Jurnal Umum screen.
+            header (dict): Values keyed by fieldset label. Dropdown fields are
+                typed and the matching option is picked.
+        """
+        for label, value in header.items():
+            value = str(value)
+            fieldset = screen.field(label)
+            field = fieldset.locator("input, textarea").first
+            field.click()
+            field.fill(value)
+
+            option = fieldset.locator('ul[role="listbox"] > li').filter(has_text=value)
+            if option.count():
+                option.first.click()
+            logger.debug("Header field filled: %s", label)
+
+    def _save_jurnal(self, screen):
+        """
+        Click 'Simpan' and confirm the result popup.
+
+        Args:
+            screen (JurnalUmumScreen): The Input Jurnal Umum screen.
+
+        Raises:
+            RuntimeError: If SIPD-RI does not answer with a success popup.
+        """
+        screen.btn_simpan.scroll_into_view_if_needed()
+        screen.btn_simpan.click()
+
+        popup_title = self.page.locator("h2.swal2-title")
+        with self.throttle.action(slow_threshold=15, step="jurnal_save"):
+            popup_title.wait_for(timeout=30_000)
+        title = popup_title.inner_text().strip()
+        self.page.locator("div.swal2-actions button.swal2-confirm").click()
+
+        if "success" not in title.lower() and "berhasil" not in title.lower():
+            raise RuntimeError(f"Jurnal Umum not saved: {title}")
+        logger.info("Jurnal Umum saved")
+
+    def _input_jurnal_row(self, screen, kode_rekening, debit, kredit):
+        """
+        Enter a single 'Jurnal Umum' line and click 'Tambah'.
+
+        Args:
+            screen (JurnalUmumScreen): The Input Jurnal Umum screen.
+            kode_rekening (str): The kode rekening to select.
+            debit (str): The debit amount, or NaN if empty.
+            kredit (str): The kredit amount, or NaN if empty.
+
+        Raises:
+            RuntimeError: If the kode rekening is not found in the dropdown.
+        """
+        # Kode Rekening
+        max_retries = 5
+        input_kode_rekening = screen.kode_rekening
+        input_kode_rekening.scroll_into_view_if_needed()
+
+        for attempt in range(max_retries):
+            if attempt:
+                shared_metrics().inc("sipd_retries_total", task="kode_rekening")
+            input_kode_rekening.click()
+            input_kode_rekening.type(kode_rekening)
+            dropdown_kode_rekening = screen.kode_rekening_option(kode_rekening)
+
+            try:
+                # Paced, but not fed back to the throttle: a kode missing from
+                # the list is a data error, not a sign that SIPD-RI is overloaded
+                with self.throttle.paced(step="kode_rekening"):
+                    dropdown_kode_rekening.wait_for(timeout=10_000, state="visible")
+                dropdown_kode_rekening.click()
+                break
+            except PlaywrightTimeoutError:
+                logger.warning(
+                    "Dropdown not found for kode: %s, retrying attempt [%d/%d]",
+                    kode_rekening,
+                    attempt + 1,
+                    max_retries,
+                )
+                input_kode_rekening.fill("")
+                screen.kode_rekening_listbox.wait_for(timeout=3_000, state="visible")
+        else:
+            logger.error(
+                "Skipping kode rekening: %s (After %d attempts)",
+                kode_rekening,
+                max_retries,
+            )
+            raise RuntimeError(f"Kode rekening not found in dropdown: {kode_rekening}")
+
+        # Debit
+        if not pd.isna(debit):
+            screen.debit.click()
+            screen.debit.type(debit)
+
+        # Kredit
+        if not pd.isna(kredit):
+            screen.kredit.click()
+            screen.kredit.type(kredit)
+
+        # Tambah
+        screen.btn_tambah.scroll_into_view_if_needed()
+        screen.btn_tambah.click()
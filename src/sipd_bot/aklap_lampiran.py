@@ -4,94 +4,262 @@ This module provides the AklapLampiranMixin class for the SIPDBot automation fra
 It encapsulates all functionality related to 'LPPD' menu in AKLAP.
 """
 
+import os
 import logging
+from .task import bot_task
+from .screens import LampiranScreen
 
 
 logger = logging.getLogger(__name__)
 
+# Cetak dropdown option -> file extension
+LPPD_FORMAT_EXTENSIONS = {"PDF": "pdf", "Excel": "xlsx", "Word": "docx"}
+
+LPPD_OPERATION = "export_lppd"
+# Earlier operation names of the same downloads, keyed by the same file path
+LEGACY_LPPD_OPERATIONS = ("download_lampiran_perkada",)
+
+
+def lampiran_label(lampiran: str) -> str:
+    """
+    Get the file name label of an LPPD lampiran row.
+
+    Args:
+        lampiran (str): The lampiran row name, e.g. `Lampiran I.1 (Perkada)`.
+
+    Returns:
+        str: The name without its parenthesized suffix, e.g. `Lampiran I.1`.
+    """
+    return lampiran.split(" (")[0].strip()
+
+
+def lppd_file_path(output_dir: str, lampiran: str, skpd: str, file_format: str) -> str:
+    """
+    Get the output path of a downloaded LPPD lampiran.
+
+    Args:
+        output_dir (str): The output directory.
+        lampiran (str): The lampiran row name.
+        skpd (str): The SKPD name.
+        file_format (str): The Cetak dropdown option, e.g. `PDF`.
+
+    Returns:
+        str: `<output_dir>/<Lampiran label> - <SKPD>.<ext>`.
+    """
+    ext = LPPD_FORMAT_EXTENSIONS.get(file_format, file_format.lower())
+    return f"{output_dir}/{lampiran_label(lampiran)} - {skpd}.{ext}"
+
+
+def lppd_done_keys(ledger) -> set:
+    """
+    Get the paths of every LPPD file the ledger records as downloaded.
+
+    Args:
+        ledger (Ledger): The ledger to read.
+
+    Returns:
+        set: The downloaded paths, including those recorded under the
+        legacy `download_lampiran_perkada` operation.
+    """
+    done_keys = ledger.done_keys(LPPD_OPERATION)
+    for operation in LEGACY_LPPD_OPERATIONS:
+        done_keys |= ledger.done_keys(operation)
+    return done_keys
+
 
 class AklapLampiranMixin:
     """
     Provides automation functionality for the 'LPPD' section of AKLAP.
     """
 
+    @bot_task
     def download_lampiran_perkada(self, output_dir: str, skpd_list: list):
         """
         Download Lampiran I.1 (Perkada) as PDF file for given SKPD in AKLAP LPPD menu.
 
         Args:
             output_dir (str): Output directory for the PDF file
-            skpd_list (list): A list of SKPD names
+            skpd_list (list): A list of SKPD names, resolved through the SKPD registry
 
         Note:
             - Output PDF name: `Lampiran I.1 - <SKPD_NAME>.pdf`
+            - See `export_lppd` for skipping and retry behavior.
+        """
+        self.export_lppd(output_dir, skpd_list, [("Lampiran I.1 (Perkada)", "PDF")])
+
+    @bot_task
+    def export_lppd(
+        self,
+        output_dir: str,
+        skpd_list: list,
+        reports: list,
+        konsolidasi: bool = False,
+        konsolidasi_skpd: str = "SKPD dan Unit",
+        timeout: int = 60_000,
+    ):
+        """
+        Download LPPD lampiran in one or more formats for given SKPD.
+
+        The Cetak modal is opened once per lampiran row. Each SKPD is selected
+        once in the modal, then every requested format of that lampiran is
+        downloaded before moving to the next SKPD.
+
+        Args:
+            output_dir (str): Output directory for the downloaded files.
+            skpd_list (list): A list of SKPD names, resolved through the SKPD registry.
+            reports (list): (lampiran row, format) pairs, e.g.
+                `[("Lampiran I.1 (Perkada)", "PDF"), ("Lampiran I.1 (Perkada)", "Excel")]`.
+            konsolidasi (bool, optional): Pick the konsolidasi radio option instead
+                of per SKPD. Defaults to False.
+            konsolidasi_skpd (str, optional): Konsolidasi SKPD dropdown value.
+                Defaults to "SKPD dan Unit".
+            timeout (int, optional): Download timeout in milliseconds.
+                Defaults to 60_000.
+
+        Note:
+            - Output name: `<Lampiran label> - <SKPD_NAME>.<ext>`, e.g.
+              `Lampiran I.1 - DINAS KESEHATAN.pdf`.
+            - Files already downloaded (in the ledger and on disk) are skipped.
+            - Failed SKPD are captured and retried once with a fresh modal.
+            - A degraded page is recycled between SKPD and the modal reopened.
+        """
+        skpd_list = [self.resolve_skpd(skpd) for skpd in skpd_list]
+        operation = LPPD_OPERATION
+        done_keys = lppd_done_keys(self.ledger)
+        os.makedirs(output_dir, exist_ok=True)
+
+        formats_by_lampiran = {}
+        for lampiran, file_format in reports:
+            formats_by_lampiran.setdefault(lampiran, []).append(file_format)
+
+        def is_done(path):
+            return path in done_keys and os.path.exists(path)
+
+        for lampiran, formats in formats_by_lampiran.items():
+            pending = []
+            for skpd in skpd_list:
+                paths = {
+                    fmt: lppd_file_path(output_dir, lampiran, skpd, fmt)
+                    for fmt in formats
+                }
+                todo = [fmt for fmt, path in paths.items() if not is_done(path)]
+                for fmt in formats:
+                    if fmt not in todo:
+                        logger.info("Already downloaded, skipping: %s", paths[fmt])
+                        self.ledger.record(operation, paths[fmt], "skipped")
+                if todo:
+                    pending.append((skpd, [(fmt, paths[fmt]) for fmt in todo]))
+
+            if not pending:
+                continue
+
+            self._open_lampiran_modal(lampiran)
+
+            def export_skpd(item):
+                skpd, downloads = item
+                self._select_lampiran_skpd(skpd, konsolidasi, konsolidasi_skpd)
+                for file_format, path in downloads:
+                    if is_done(path):
+                        continue
+                    with self.ledger.track(operation, path):
+                        self._download_lampiran(file_format, path, timeout)
+                    done_keys.add(path)
+                logger.info("Successful download: %s (%s)", skpd, lampiran)
+
+            def reopen_modal():
+                self.page.reload()
+                self._open_lampiran_modal(lampiran)
+
+            self.process_with_retry(
+                f"{operation}-{lampiran_label(lampiran)}",
+                pending,
+                export_skpd,
+                reset=reopen_modal,
+                describe=lambda item: item[0],
+                recycle=lambda: self._open_lampiran_modal(lampiran),
+            )
+
+        logger.debug("Export LPPD has successfully ran")
+
+    def _open_lampiran_modal(self, lampiran: str = "Lampiran I.1 (Perkada)"):
+        """
+        Navigate to AKLAP LPPD and open the Cetak modal of a lampiran row.
+
+        Args:
+            lampiran (str, optional): The lampiran row name.
+                Defaults to "Lampiran I.1 (Perkada)".
+
+        Returns:
+            Locator: The modal body.
         """
         self.to_aklap()
-        # TODO: add file select for skpd list
-        # TODO: implement self.ensure_element_visible in aklap_jurnal_umum.py
 
         # Dashboard AKLAP
         btn_lampiran = self.page.get_by_role("link", name="LPPD", exact=True)
         btn_lampiran.click()
-        logger.info("Menu Perkada opened")
-
-        # Lampiran I.1 (Perkada) Menu
-        lampiran_perkada_row = self.page.locator(
-            'tr:has-text("Lampiran I.1 (Perkada)")'
-        )
-        lampiran_perkada_row.wait_for()
-        btn_cetak = lampiran_perkada_row.locator('button:has-text("Cetak")')
+        logger.info("Menu LPPD opened")
+
+        # Lampiran Menu
+        lampiran_row = self.page.locator(f'tr:has-text("{lampiran}")')
+        lampiran_row.wait_for()
+        btn_cetak = lampiran_row.locator('button:has-text("Cetak")')
         btn_cetak.click()
 
         # Modal Pop-up
-        modal_body = self.page.locator("div.modal-body")
+        modal_body = self.screen(LampiranScreen).modal_body
         modal_body.wait_for()
+        return modal_body
+
+    def _select_lampiran_skpd(
+        self, skpd: str, konsolidasi: bool, konsolidasi_skpd: str
+    ):
+        """
+        Fill the SKPD, Konsolidasi SKPD and radio fieldsets of the Cetak modal.
+
+        Args:
+            skpd (str): The SKPD name.
+            konsolidasi (bool): Pick konsolidasi instead of per SKPD.
+            konsolidasi_skpd (str): Konsolidasi SKPD dropdown value.
+        """
+        screen = self.screen(LampiranScreen)
+
+        # 1. SKPD
+        dropdown_skpd = screen.skpd
+        dropdown_skpd.click()
+        dropdown_skpd.type(skpd)
+        dropdown_skpd.press("Enter")
+
+        # 2. Konsolidasi SKPD
+        dropdown_konsolidasi = screen.konsolidasi
+        dropdown_konsolidasi.click()
+        dropdown_konsolidasi.type(konsolidasi_skpd)
+        dropdown_konsolidasi.press("Enter")
+
+        # 3. Radio button - nth(0): Konsolidasi, nth(1): Per SKPD
+        radio = screen.radio.nth(0 if konsolidasi else 1)
+        radio.click()
+
+    def _download_lampiran(self, file_format: str, path: str, timeout: int):
+        """
+        Download the selected lampiran through the Cetak dropdown and save it.
+
+        Args:
+            file_format (str): The Cetak dropdown option, e.g. `PDF` or `Excel`.
+            path (str): Where to save the downloaded file.
+            timeout (int): Download timeout in milliseconds.
+        """
+        # 4. Cetak Button
+        screen = self.screen(LampiranScreen)
+        screen.cetak_toggle.click()
+
+        # 4.1 Cetak Button - Download
+        with (
+            self.throttle.action(slow_threshold=30, step="lampiran_download"),
+            self.page.expect_download(timeout=timeout) as download_info,
+        ):
+            option = screen.cetak_option(file_format)
+            option.wait_for()
+            option.click()
 
-        # Modal Fieldsets
-        fieldset_skpd = modal_body.locator("fieldset").nth(0)
-        fieldset_konsolidasi = modal_body.locator("fieldset").nth(1)
-        fieldset_radio = modal_body.locator("fieldset").nth(2)
-
-        for skpd in skpd_list:
-            # 1. SKPD
-            dropdown_skpd = fieldset_skpd.locator("input").first
-            dropdown_skpd.click()
-            dropdown_skpd.type(skpd)
-            dropdown_skpd.press("Enter")
-
-            # 2. Konsolidasi SKPD
-            dropdown_konsolidasi = fieldset_konsolidasi.locator("input").first
-            dropdown_konsolidasi.click()
-            dropdown_konsolidasi.type("SKPD dan Unit")
-            dropdown_konsolidasi.press("Enter")
-
-            # 3. Radio button
-            # TODO: add radio button logic
-            # radio_konsolidasi = fieldset_radio.locator("label").nth(0)
-            # radio_konsolidasi.click()
-
-            radio_per_skpd = fieldset_radio.locator("label").nth(1)
-            radio_per_skpd.click()
-
-            # 4. Cetak Button
-            modal_footer = self.page.locator("footer.modal-footer")
-            btn_cetak = modal_footer.locator("button.dropdown-toggle")
-            btn_cetak.click()
-
-            # 4.1 Cetak Button - Download PDF
-            with self.page.expect_download(
-                timeout=60_000
-            ) as download_info:  # TODO: set download timeout as method parameter
-                option_pdf = modal_footer.locator('a.dropdown-item:has-text("PDF")')
-                option_pdf.wait_for()
-                option_pdf.click()
-
-            download_name = f"Lampiran I.1 - {skpd}.pdf"
-            download_path = f"{output_dir}/{download_name}"
-
-            download_file = download_info.value
-            download_file.save_as(download_path)
-
-            logger.info("Successful download: %s", skpd)
-
-        logger.debug("Download Lampiran Perkada has successfully ran")
+        download_file = download_info.value
+        download_file.save_as(path)
@@ -6,22 +6,77 @@ It encapsulates all functionality related to 'Posting Jurnal' menu in AKLAP.
 
 import logging
 from playwright.sync_api import expect, TimeoutError as PlaywrightTimeoutError
+from .ledger import hash_key
+from .task import bot_task
+from .screens import PostingBelanjaScreen, PostingQueueScreen
+from .posting_snapshot import posting_queue_frame, snapshot_path, write_snapshot
 
 
 logger = logging.getLogger(__name__)
 
+# Posting methods of the Belanja posting modal, in order of preference
+POSTING_METODE = ["Metode Aset", "Tanpa Metode"]
+
+# Row text, Nomor and Jenis Dokumen of every row of the Belanja table, null
+# without a Nomor column. Rows that do not span every column are left out.
+BELANJA_ROWS_JS = """table => {
+    const headers = [...table.querySelectorAll("thead th")].map(
+        th => th.innerText.trim().toLowerCase()
+    );
+    const nomor = headers.findIndex(h => h.startsWith("nomor"));
+    const jenis = headers.findIndex(h => h.includes("jenis"));
+    if (nomor < 0) return null;
+    return [...table.querySelectorAll("tbody > tr")]
+        .filter(tr => tr.cells.length === headers.length)
+        .map(tr => {
+            const cells = [...tr.cells].map(td => td.innerText.trim());
+            return {
+                text: tr.innerText.trim(),
+                key: cells[nomor],
+                jenis: jenis >= 0 ? cells[jenis] : null,
+            };
+        });
+}"""
+
+
+# Header texts and cell texts of the rows of a posting table page, plus the
+# body text to notice the next page. Rows that do not span every column (e.g.
+# "no data") are left out.
+POSTING_TABLE_JS = """table => {
+    const headers = [...table.querySelectorAll("thead th")].map(th => th.innerText.trim());
+    const rows = [...table.querySelectorAll("tbody > tr")]
+        .map(tr => [...tr.cells].map(td => td.innerText.trim()))
+        .filter(cells => cells.length === headers.length);
+    const body = table.tBodies[0] ? table.tBodies[0].innerText.trim() : "";
+    return {headers, rows, body};
+}"""
+
+# True once the table body differs from the given text, i.e. the next page
+# rendered. The table is looked up again, Vue may replace the element.
+PAGE_CHANGED_JS = """([selector, previous]) => {
+    const table = document.querySelector(selector);
+    const body = table && table.tBodies[0];
+    return !!body && body.innerText.trim() !== previous;
+}"""
+
 
 class AklapPostingJurnalMixin:
     """
     Provides automation functionality for the 'Posting Jurnal' section of AKLAP.
     """
 
-    def posting_pendapatan(self, skpd: str):
+    # Belanja posting method per Jenis Dokumen, learned while posting
+    _posting_metode = None
+
+    @bot_task
+    def posting_pendapatan(self, skpd: str, interactive: bool = True):
         """
         TODO: add docstring
 
         Args:
-            skpd (str): The SKPD name
+            skpd (str): The SKPD name, resolved through the SKPD registry
+            interactive (bool, optional): Wait for ENTER once posted, so the
+                operator can check the result. Defaults to True.
 
         Note:
             Form group list:
@@ -32,6 +87,355 @@ class AklapPostingJurnalMixin:
             - nth(4): Tanggal Akhir
             - nth(5): Filter By Keyword
         """
+        skpd = self.resolve_skpd(skpd) if skpd else skpd
+        menu_body = self._open_posting_pendapatan(skpd)
+
+        def reopen():
+            nonlocal menu_body
+            menu_body = self._open_posting_pendapatan(skpd)
+
+        def post_all(skpd):
+            # Transaction table
+            self.page.wait_for_load_state("networkidle")
+            table = menu_body.locator("table")
+            rows = table.locator("tbody tr")
+            documents = rows.evaluate_all("rows => rows.map(r => r.innerText.trim())")
+
+            with self.ledger.track("posting_pendapatan", hash_key(skpd, *documents)):
+                check_all = table.locator("thead th div.custom-checkbox")
+                check_all.click()
+
+                # Posting button
+                btn_posting = menu_body.locator('button:has-text("Posting")')
+                expect(btn_posting).to_be_enabled()
+                btn_posting.click()
+
+                # Confirmation modal
+                confirmation_modal = self.page.locator("div.swal2-actions")
+                confirmation_modal.wait_for()
+
+                btn_yes = confirmation_modal.locator('button:has-text("Ya")')
+                btn_yes.wait_for()
+                btn_yes.click()
+
+                btn_ok = confirmation_modal.locator('button:has-text("OK")')
+                btn_ok.wait_for()
+                btn_ok.click()
+            logger.info("Posted %d Pendapatan documents for %s", len(documents), skpd)
+
+        self.process_with_retry(
+            "posting_pendapatan",
+            [skpd],
+            post_all,
+            reset=reopen,
+        )
+
+        # TODO: add checker when everything is posted
+
+        if interactive:
+            input(">>>>>>>>>>>>>>>>>>>> ENTER")
+
+    @bot_task
+    def posting_belanja(self, skpd: str):
+        """
+        TODO: add docstring
+
+        Args:
+            skpd (str): The SKPD name, resolved through the SKPD registry
+
+        Note:
+            Form group list:
+            - nth(0): SKPD
+            - nth(1): Filter By Keyword
+            - nth(2): Tanggal Awal
+            - nth(3): Tanggal Akhir
+            - nth(4): Status
+            - nth(5): Jenis Dokumen
+        """
+        skpd = self.resolve_skpd(skpd) if skpd else skpd
+        self._open_posting_belanja(skpd)
+
+        def reopen():
+            self._open_posting_belanja(skpd)
+
+        def reload():
+            self.page.reload()
+            reopen()
+
+        def post_document(document):
+            # Looked up per call, a recycle or re-authentication replaces the page
+            screen = self.screen(PostingBelanjaScreen)
+            # Close the modal a failed document may have left open
+            self.page.keyboard.press("Escape")
+            with self.ledger.track("posting_belanja", hash_key(skpd, document["text"])):
+                self._post_belanja_row(
+                    screen, screen.row_of(document["key"]), document["jenis"]
+                )
+
+        # Failed documents stay in the table, the retry pass finds them again
+        self.process_with_retry(
+            "posting_belanja",
+            self._pending_belanja_documents(),
+            post_document,
+            reset=reload,
+            describe=lambda document: document["key"],
+            recycle=reopen,
+        )
+
+    @bot_task
+    def export_posting_queue(self, kind: str, skpd_list: list, output_dir: str) -> dict:
+        """
+        Export the unposted transactions of every SKPD, without posting anything.
+
+        The posting menu is opened with the same filters as the posting tasks,
+        the table is switched to its largest page size and every page is read
+        in a single call. One typed snapshot per SKPD is written, see
+        `posting_snapshot`.
+
+        Args:
+            kind (str): `pendapatan` or `belanja`.
+            skpd_list (list): SKPD names, resolved through the SKPD registry.
+            output_dir (str): The export folder.
+
+        Returns:
+            dict: SKPD name -> number of unposted transactions, for the SKPD
+            that were exported.
+        """
+        open_menu = {
+            "pendapatan": self._open_posting_pendapatan,
+            "belanja": self._open_posting_belanja,
+        }[kind]
+        skpd_list = [self.resolve_skpd(skpd) for skpd in skpd_list]
+        counts = {}
+
+        def export_skpd(skpd):
+            with self.ledger.track(f"export_posting_{kind}", skpd):
+                open_menu(skpd)
+                headers, rows = self._read_posting_queue(
+                    self.screen(PostingQueueScreen)
+                )
+                df = posting_queue_frame(headers, rows, skpd, kind)
+                path = write_snapshot(df, snapshot_path(output_dir, kind, skpd))
+            counts[skpd] = len(df)
+            logger.info("Exported %d unposted %s row(s): %s", len(df), kind, path)
+
+        # Every item opens the menu itself, nothing to restore between items
+        self.process_with_retry(
+            f"export_posting_{kind}",
+            skpd_list,
+            export_skpd,
+            reset=lambda: None,
+            recycle=lambda: None,
+        )
+        return counts
+
+    def _read_posting_queue(
+        self, screen, max_pages: int = 1_000, page_timeout: float = 30_000
+    ) -> tuple:
+        """
+        Read every page of a posting table at its largest page size.
+
+        Args:
+            screen (PostingQueueScreen): The posting table screen.
+            max_pages (int, optional): Safety limit of pages. Defaults to 1_000.
+            page_timeout (float, optional): Milliseconds to wait for the next
+                page to render. Defaults to 30_000.
+
+        Returns:
+            tuple: `(headers, rows)`, the header texts and the cell texts of
+            every row of every page.
+
+        Raises:
+            RuntimeError: If the next page does not render in time, rather
+                than exporting part of the queue.
+        """
+        self.page.wait_for_load_state("networkidle")
+        if screen.per_page.count():
+            sizes = screen.per_page.first.evaluate(
+                "select => [...select.options].map(o => o.value)"
+            )
+            numeric = [size for size in sizes if size.isdigit()]
+            if numeric:
+                screen.per_page.first.select_option(max(numeric, key=int))
+                self.page.wait_for_load_state("networkidle")
+
+        headers, rows = [], []
+        for page_number in range(1, max_pages + 1):
+            table = screen.table.evaluate(POSTING_TABLE_JS)
+            headers = table["headers"]
+            rows += table["rows"]
+            logger.debug(
+                "Posting queue page %d: %d row(s)", page_number, len(table["rows"])
+            )
+
+            if not screen.next_page.count():
+                break
+            screen.next_page.first.click()
+            try:
+                self.page.wait_for_function(
+                    PAGE_CHANGED_JS,
+                    arg=[screen.selectors["table"], table["body"]],
+                    timeout=page_timeout,
+                )
+            except PlaywrightTimeoutError as exc:
+                raise RuntimeError(
+                    f"Posting queue page {page_number + 1} did not render"
+                ) from exc
+        else:
+            logger.warning(
+                "Stopped reading the posting queue after %d pages", max_pages
+            )
+
+        return headers, rows
+
+    def _pending_belanja_documents(self):
+        """
+        Yield the documents of the Belanja table, each one once.
+
+        The rows of the table page are read in one call (see
+        `_prefetch_belanja_rows`). Once every prefetched document was yielded,
+        the table is read again for documents not yielded yet, e.g. the next
+        page. When the page was replaced meanwhile (recycled, or a fresh page
+        after re-authentication), the remaining documents are read again from
+        the fresh table.
+
+        Yields:
+            dict: A row of `_prefetch_belanja_rows`.
+        """
+        attempted = set()
+
+        while True:
+            page = self.page
+            documents = [
+                document
+                for document in self._prefetch_belanja_rows(
+                    self.screen(PostingBelanjaScreen)
+                )
+                if document["text"] not in attempted
+            ]
+            if not documents:
+                return
+
+            for document in documents:
+                if self.page is not page:
+                    break
+                attempted.add(document["text"])
+                yield document
+
+    def _prefetch_belanja_rows(self, screen) -> list:
+        """
+        Read every row of the Belanja table page in a single call.
+
+        Args:
+            screen (PostingBelanjaScreen): The Posting Jurnal - Belanja screen.
+
+        Returns:
+            list: One dict per row with the row `text` (ledger key), the
+            Nomor `key` identifying the row and the `jenis` dokumen (None
+            without a Jenis column).
+
+        Raises:
+            RuntimeError: If the table has no Nomor column, since no other
+                cell identifies a document uniquely.
+        """
+        self.page.wait_for_load_state("networkidle")
+        rows = screen.table.evaluate(BELANJA_ROWS_JS)
+        if rows is None:
+            raise RuntimeError("No Nomor column in the Posting Belanja table")
+        return rows
+
+    def _post_belanja_row(self, screen, row, jenis: str = None):
+        """
+        Post a single Belanja document through its 'Aksi' dropdown and modal.
+
+        The posting method depends on the document type. Once the preferred
+        method (the first of `POSTING_METODE`) was offered for a `jenis`, it is
+        selected directly for the next documents of that type. The fallback
+        method is never cached, so every such document checks the offered
+        options again and still gets the preferred method when offered.
+
+        Args:
+            screen (PostingBelanjaScreen): The Posting Jurnal - Belanja screen.
+            row (Locator): The table row of the document.
+            jenis (str, optional): The document type, the method cache key.
+
+        Raises:
+            Exception: If neither posting method is offered in the modal.
+        """
+        aksi_dropdown = screen.aksi_dropdown(row)
+        aksi_dropdown.click()
+
+        posting_menu = screen.posting_menu(aksi_dropdown)
+        # Client-side dropdown, its timeout is not a sign of server load
+        with self.throttle.paced(step="posting_menu"):
+            posting_menu.wait_for(timeout=3_000, state="visible")
+        posting_menu.click()
+
+        # Posting modal
+        screen.metode_input.click()
+
+        if self._posting_metode is None:
+            self._posting_metode = {}
+        metode = self._posting_metode.get(jenis) if jenis else None
+        if metode:
+            try:
+                screen.metode_option(metode).click(timeout=3_000)
+            except PlaywrightTimeoutError:
+                logger.warning(
+                    "Cached posting method %s not offered for %s", metode, jenis
+                )
+                metode = None
+
+        if metode is None:
+            metode = self._pick_posting_metode(screen)
+            screen.metode_option(metode).click()
+            if jenis and metode == POSTING_METODE[0]:
+                self._posting_metode[jenis] = metode
+                logger.info("Posting method for %s: %s", jenis, metode)
+            elif jenis:
+                self._posting_metode.pop(jenis, None)
+
+        screen.btn_posting.click()
+
+        # Success modal
+        success_popup = screen.success_popup
+        with self.throttle.action(step="posting_success"):
+            success_popup.wait_for()
+        success_popup.click()
+        success_popup.press("Escape")
+
+    def _pick_posting_metode(self, screen) -> str:
+        """
+        Pick the posting method from the options of the opened method dropdown.
+
+        Args:
+            screen (PostingBelanjaScreen): The Posting Jurnal - Belanja screen.
+
+        Returns:
+            str: The first method of `POSTING_METODE` that is offered.
+
+        Raises:
+            Exception: If neither posting method is offered in the modal.
+        """
+        screen.metode_options.first.wait_for(timeout=3_000)
+        offered = screen.metode_options.evaluate_all(
+            "options => options.map(o => o.innerText.trim())"
+        )
+        for metode in POSTING_METODE:
+            if any(metode in option for option in offered):
+                return metode
+        raise Exception("Both dropdown options not found.")
+
+    def _open_posting_pendapatan(self, skpd: str):
+        """
+        Open Posting Jurnal - Pendapatan and apply the SKPD and status filters.
+
+        Args:
+            skpd (str): The SKPD name.
+
+        Returns:
+            Locator: The menu card body holding the filters and the table.
+        """
         self.to_aklap()
 
         # Dashboard AKLAP - Menu Posting Jurnal
@@ -55,18 +459,14 @@ class AklapPostingJurnalMixin:
         form_group_skpd = menu_body.locator("div.form-group").nth(0)
         input_skpd = form_group_skpd.locator("input")
 
-        dev_skpd = (
-            "DINAS LINGKUNGAN HIDUP DAN KEHUTANAN"  # TODO: replace with parameter
-        )
-
-        input_skpd.type(dev_skpd)
-        dropdown_skpd = menu_body.locator(f'ul[role=listbox] li:has-text("{dev_skpd}")')
+        input_skpd.type(skpd)
+        dropdown_skpd = menu_body.locator(f'ul[role=listbox] li:has-text("{skpd}")')
 
         try:
             dropdown_skpd.wait_for(timeout=3_000, state="visible")
             dropdown_skpd.click()
         except PlaywrightTimeoutError:
-            logger.warning("Dropdown not found for SKPD: %s", dev_skpd)
+            logger.warning("Dropdown not found for SKPD: %s", skpd)
             # TODO: add retry logic
 
         # Form Group - Transaksi
@@ -96,47 +496,17 @@ class AklapPostingJurnalMixin:
         btn_terapkan = menu_body.locator('button:has-text("Terapkan")')
         btn_terapkan.click()
 
-        # Transaction table
-        table = menu_body.locator("table")
-        check_all = table.locator("thead th div.custom-checkbox")
-        check_all.click()
-
-        # Posting button
-        btn_posting = menu_body.locator('button:has-text("Posting")')
-        expect(btn_posting).to_be_enabled()
-        btn_posting.click()
-
-        # Confirmation modal
-        confirmation_modal = self.page.locator("div.swal2-actions")
-        confirmation_modal.wait_for()
-
-        btn_yes = confirmation_modal.locator('button:has-text("Ya")')
-        btn_yes.wait_for()
-        btn_yes.click()
+        return menu_body
 
-        btn_ok = confirmation_modal.locator('button:has-text("OK")')
-        btn_ok.wait_for()
-        btn_ok.click()
-
-        # TODO: add checker when everything is posted
-
-        input(">>>>>>>>>>>>>>>>>>>> ENTER")
-
-    def posting_belanja(self, skpd: str):
+    def _open_posting_belanja(self, skpd: str):
         """
-        TODO: add docstring
+        Open Posting Jurnal - Belanja and apply the SKPD and status filters.
 
         Args:
-            skpd (str): The SKPD name
+            skpd (str): The SKPD name.
 
-        Note:
-            Form group list:
-            - nth(0): SKPD
-            - nth(1): Filter By Keyword
-            - nth(2): Tanggal Awal
-            - nth(3): Tanggal Akhir
-            - nth(4): Status
-            - nth(5): Jenis Dokumen
+        Returns:
+            Locator: The Belanja transaction table.
         """
         self.to_aklap()
 
@@ -161,16 +531,14 @@ class AklapPostingJurnalMixin:
         form_group_skpd = menu_body.locator("div.form-group").nth(0)
         input_skpd = form_group_skpd.locator("input")
 
-        dev_skpd = ""  # TODO: replace with parameter
-
-        input_skpd.type(dev_skpd)
-        dropdown_skpd = menu_body.locator(f'ul[role=listbox] li:has-text("{dev_skpd}")')
+        input_skpd.type(skpd)
+        dropdown_skpd = menu_body.locator(f'ul[role=listbox] li:has-text("{skpd}")')
 
         try:
             dropdown_skpd.wait_for(timeout=30_000, state="visible")
             dropdown_skpd.click()
         except PlaywrightTimeoutError:
-            logger.warning("Dropdown not found for SKPD: %s", dev_skpd)
+            logger.warning("Dropdown not found for SKPD: %s", skpd)
             # TODO: add retry logic
 
         # Form Group - Filter by Keyword (Unused)
@@ -196,48 +564,4 @@ class AklapPostingJurnalMixin:
         btn_terapkan.click()
 
         # Transaction table
-        table = menu_body.locator("table")
-
-        # Posting each row
-        while True:
-            rows = table.locator("tbody tr")
-
-            if rows.count() == 0:
-                break
-
-            first_row = rows.nth(0)
-            aksi_column = first_row.locator("td").nth(7)
-            aksi_dropdown = aksi_column.locator("div.dropdown")
-            aksi_dropdown.click()
-
-            posting_menu = aksi_dropdown.locator('a:has-text("Posting")')
-            posting_menu.wait_for(timeout=3_000, state="visible")
-            posting_menu.click()
-
-            # Posting modal
-            posting_body = self.page.locator("div.modal-body")
-            input_metode = posting_body.locator("input")
-            input_metode.click()
-
-            option_metode_aset = posting_body.locator(
-                'ul[role=listbox] li:has-text("Metode Aset")'
-            )
-            option_tanpa_metode = posting_body.locator(
-                'ul[role=listbox] li:has-text("Tanpa Metode")'
-            )
-
-            if option_metode_aset.count() > 0:
-                option_metode_aset.click()
-            elif option_tanpa_metode.count() > 0:
-                option_tanpa_metode.click()
-            else:
-                raise Exception("Both dropdown options not found.")
-
-            posting_footer = self.page.locator("footer.modal-footer")
-            btn_posting = posting_footer.locator("button.btn-success")
-            btn_posting.click()
-
-            # Success modal
-            success_popup = self.page.locator('h2.swal2-title:has-text("Success")')
-            success_popup.click()
-            success_popup.press("Escape")
+        return menu_body.locator("table")
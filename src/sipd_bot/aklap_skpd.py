@@ -0,0 +1,173 @@
+"""
+This module provides the AklapSKPDMixin class for the SIPDBot automation framework.
+
+It keeps the local SKPD registry in sync with SIPD-RI and resolves SKPD names
+before they are typed into any SKPD dropdown.
+"""
+
+import logging
+from .skpd_registry import (
+    SKPDRegistry,
+    StaleSeedError,
+    make_entry,
+    parse_skpd_option,
+)
+from .task import bot_task
+
+
+logger = logging.getLogger(__name__)
+
+
+class AklapSKPDMixin:
+    """
+    Provides SKPD registry synchronization and lookup for SIPDBot.
+    """
+
+    _skpd_registry = None
+
+    @property
+    def skpd_registry(self) -> SKPDRegistry:
+        """
+        The SKPD registry of the current fiscal year, loaded on first use.
+        """
+        if self._skpd_registry is None:
+            self._skpd_registry = SKPDRegistry()
+        return self._skpd_registry
+
+    @bot_task
+    def sync_skpd_registry(self, force: bool = False):
+        """
+        Pull the SKPD list from SIPD-RI into the local registry.
+
+        The list is read from the backing API response of the SKPD dropdown in
+        the LPPD Cetak modal when available (it carries the SIPD-RI ids), and
+        from the dropdown options otherwise.
+
+        Args:
+            force (bool, optional): Sync even if the registry is not stale.
+            Defaults to False.
+        """
+        registry = self.skpd_registry
+        if not force and not registry.is_stale():
+            logger.debug("SKPD registry is fresh, skipping sync")
+            return
+
+        logger.info("Syncing SKPD registry %s from SIPD-RI...", registry.year)
+        payloads = []
+
+        def capture_skpd_response(response):
+            if "skpd" not in response.url.lower():
+                return
+            try:
+                payloads.append(response.json())
+            except Exception:
+                logger.debug("Ignoring non JSON SKPD response: %s", response.url)
+
+        self.page.on("response", capture_skpd_response)
+        try:
+            modal_body = self._open_lampiran_modal()
+            fieldset_skpd = modal_body.locator("fieldset").nth(0)
+            fieldset_skpd.locator("input").first.click()
+
+            listbox = fieldset_skpd.locator('ul[role="listbox"]')
+            listbox.wait_for(state="visible")
+            options = listbox.locator("li").evaluate_all(
+                "items => items.map(li => li.innerText.trim()).filter(Boolean)"
+            )
+            self.page.keyboard.press("Escape")
+        finally:
+            self.page.remove_listener("response", capture_skpd_response)
+
+        entries = self._entries_from_payloads(payloads)
+        if not entries:
+            entries = [parse_skpd_option(text) for text in options]
+
+        if not entries:
+            logger.error("No SKPD found in SIPD-RI, keeping cached registry")
+            return
+
+        registry.update(entries)
+        logger.info(
+            "SKPD registry synced: %d SKPD, %d unit",
+            len(registry.names("skpd")),
+            len(registry.names("unit")),
+        )
+
+    def get_skpd_list(self, level: str = None, allow_seed: bool = False) -> list:
+        """
+        Get SKPD names from the registry, syncing from SIPD-RI if stale.
+
+        Args:
+            level (str, optional): `skpd` or `unit`. Defaults to every entry.
+            allow_seed (bool, optional): Accept names from a seed file when
+                SIPD-RI has none of the level. Defaults to False.
+
+        Returns:
+            list: The SKPD names.
+
+        Raises:
+            StaleSeedError: If the names come from a seed file and `allow_seed`
+                is False, so the operator can confirm the possibly outdated list.
+            ValueError: If neither the registry nor a seed file has entries of
+                the level.
+        """
+        self.sync_skpd_registry()
+        registry = self.skpd_registry
+        names = registry.names(level)
+        if not names:
+            raise ValueError(f"No {level or 'SKPD'} entries in the SKPD registry")
+        warning = registry.seed_warning(level)
+        if warning and not allow_seed:
+            raise StaleSeedError(warning, list(registry.seed_files.values()))
+        return names
+
+    def resolve_skpd(self, name: str) -> str:
+        """
+        Resolve an SKPD name to the exact name registered in SIPD-RI.
+
+        Args:
+            name (str): The SKPD name, kode, or an unambiguous part of the name.
+
+        Returns:
+            str: The registered SKPD name.
+
+        Raises:
+            KeyError: If the name is unknown or ambiguous after a registry sync.
+
+        Note:
+            A sync navigates the page, so resolve names before starting a task.
+        """
+        just_synced = self.skpd_registry.is_stale()
+        self.sync_skpd_registry()
+        try:
+            return self.skpd_registry.resolve(name)["nama"]
+        except KeyError:
+            if just_synced:
+                raise
+            logger.warning("SKPD %r not in registry, forcing a sync", name)
+
+        self.sync_skpd_registry(force=True)
+        return self.skpd_registry.resolve(name)["nama"]
+
+    @staticmethod
+    def _entries_from_payloads(payloads: list) -> list:
+        """
+        Extract registry entries from captured SKPD API responses.
+        """
+        entries = {}
+        for payload in payloads:
+            items = (
+                payload.get("data", payload) if isinstance(payload, dict) else payload
+            )
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                kode = item.get("kode_skpd") or item.get("kode_unit")
+                nama = item.get("nama_skpd") or item.get("nama_unit")
+                if not kode or not nama:
+                    continue
+                entry_id = item.get("id_skpd") or item.get("id_unit")
+                entries[kode] = make_entry(kode, " ".join(nama.split()), entry_id)
+        return list(entries.values())
@@ -5,12 +5,24 @@ browser, context, and page objects, allowing derived classes to focus on automat
 without managing browser lifecycle details.
 """
 
+import os
+import time
+import uuid
 import logging
 import traceback as tb
+from datetime import datetime
 from playwright.sync_api import sync_playwright
+from .ledger import Ledger
+from .throttle import shared_throttle
+from .page_health import PageHealth
+from .metrics import shared_metrics
 
 logger = logging.getLogger(__name__)
 
+REPLAY_LEDGER_PATH = "data/ledger-replay.db"
+# Request types slowed down by `har_latency` during a replay
+DELAYED_RESOURCE_TYPES = ("document", "xhr", "fetch")
+
 
 class SIPDBotBase:
     """
@@ -25,14 +37,51 @@ class SIPDBotBase:
         context: The browser context for managing settings and cookies.
         page: The active page for navigation and interaction.
         playwright: The Playwright instance.
+        run_id: Unique id of this session, stamped on ledger records and artifacts.
+        ledger: The SQLite ledger recording the work done by the bot.
+        throttle: The process-wide throttle pacing every bot action.
+        page_health: Memory and latency monitor deciding when to recycle the page.
+        profile: Record a cProfile dump of every bot task under `logs/profiles/`.
+        trace: Record a Playwright trace of every bot task under `logs/traces/`.
+        record_har: Record the session's network traffic to this HAR file.
+        replay_har: Serve every request from this HAR file instead of the network.
+            The ledger is then kept apart in `data/ledger-replay.db`.
+        har_latency: Milliseconds added to every replayed page and API request.
+            Delays are serialized, see `_delay_route`.
+        cookie_file: The session cookie file. Parallel workers each use their own.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        profile: bool = False,
+        trace: bool = False,
+        record_har: str = None,
+        replay_har: str = None,
+        har_latency: float = 0,
+        cookie_file: str = "cookies.json",
+    ):
+        if record_har and replay_har:
+            raise ValueError("Cannot record and replay a HAR in the same session")
         self.browser = None
         self.context = None
         self.page = None
         self.playwright = None
-        logger.debug("SIPDBotBase initialized")
+        self.profile = profile
+        self.trace = trace
+        self.record_har = record_har
+        self.replay_har = replay_har
+        self.har_latency = har_latency
+        self.cookie_file = cookie_file
+        self._current_task = None
+        self.run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.ledger = Ledger(
+            REPLAY_LEDGER_PATH if replay_har else Ledger.DEFAULT_PATH,
+            run_id=self.run_id,
+        )
+        self.throttle = shared_throttle()
+        self.page_health = PageHealth()
+        self._screens = {}
+        logger.debug("SIPDBotBase initialized (run_id=%s)", self.run_id)
 
     def __enter__(self):
         """
@@ -58,13 +107,121 @@ class SIPDBotBase:
         self.browser = self.playwright.chromium.launch(
             headless=headless, args=browser_args
         )
-        self.context = self.browser.new_context(no_viewport=True)
-        self.page = self.context.new_page()
+        self.context = self._new_context()
+        self.page = self._new_page()
         logger.info(
             "Browser launched with headless=%s and args=%s", headless, browser_args
         )
         return self
 
+    def screen(self, screen_cls):
+        """
+        Get the page object of an AKLAP screen, built once per page.
+
+        Args:
+            screen_cls (type): A screen class from `screens`, e.g. `JurnalUmumScreen`.
+
+        Returns:
+            object: The screen bound to the current page.
+        """
+        screen = self._screens.get(screen_cls)
+        if screen is None or screen.page is not self.page:
+            screen = self._screens[screen_cls] = screen_cls(self.page)
+        return screen
+
+    def recycle_page(self, reason: str = None, storage_state: dict = None):
+        """
+        Replace the page with a fresh one, keeping the logged-in session.
+
+        A new browser context is created from the current storage state
+        (cookies and local storage), which releases the old page's memory and
+        caches. While a Playwright trace or a HAR is recording on the context,
+        only the page is replaced.
+
+        Args:
+            reason (str, optional): Why the page is recycled, for the log.
+            storage_state (dict, optional): Session to start from instead of
+                the current one, e.g. the last known state after a logout.
+        """
+        logger.warning("Recycling page: %s", reason or "requested")
+        old_context, old_page = self.context, self.page
+
+        if (self.trace and self._current_task) or self.record_har:
+            if storage_state:
+                self.context.clear_cookies()
+                self.context.add_cookies(storage_state["cookies"])
+            self.page = self._new_page()
+            old_page.close()
+        else:
+            state = storage_state or self.context.storage_state()
+            self.context = self._new_context(storage_state=state)
+            self.page = self._new_page()
+            old_context.close()
+
+        self.page_health.recycles += 1
+        self.page_health.reset()
+        shared_metrics().inc("sipd_page_recycles_total")
+
+    def _new_page(self):
+        """
+        Open a page in the current context, watched for session drops.
+
+        Returns:
+            Page: The new page.
+        """
+        page = self.context.new_page()
+        self.watch_session(page)
+        return page
+
+    def _new_context(self, storage_state: dict = None):
+        """
+        Create a browser context, recording or replaying a HAR when enabled.
+
+        Args:
+            storage_state (dict, optional): Cookies and local storage to start with.
+
+        Returns:
+            BrowserContext: The new context.
+        """
+        options = {"no_viewport": True, "storage_state": storage_state}
+        if self.record_har:
+            os.makedirs(os.path.dirname(self.record_har) or ".", exist_ok=True)
+            options["record_har_path"] = self.record_har
+            logger.info("Recording network traffic to %s", self.record_har)
+
+        context = self.browser.new_context(**options)
+
+        if self.replay_har:
+            # Requests missing from the HAR are aborted, a replay never hits the network
+            context.route_from_har(self.replay_har, not_found="abort")
+            if self.har_latency:
+                # Registered last, so it runs first and falls back to the HAR route
+                context.route("**/*", self._delay_route)
+            logger.info(
+                "Replaying network traffic from %s (+%sms)",
+                self.replay_har,
+                self.har_latency,
+            )
+        return context
+
+    def _delay_route(self, route):
+        """
+        Delay a replayed document or API request, then serve it from the HAR.
+
+        Playwright's sync API runs route handlers one at a time on the
+        automation thread, so delays do not overlap: N concurrent requests
+        take N times the latency, like a server answering them in sequence.
+        Static assets are not delayed, so a page load costs about one latency
+        per API call, which makes the replay a pessimistic model of a slow
+        SIPD-RI rather than of network round-trip time.
+
+        Args:
+            route (Route): The intercepted request.
+        """
+        if route.request.resource_type in DELAYED_RESOURCE_TYPES:
+            time.sleep(self.har_latency / 1_000)
+        route.fallback()
+
     def __exit__(self, exc_type, exc_value, traceback):
         """
         Closes the browser and cleans up resources when exiting the context.
@@ -79,6 +236,7 @@ class SIPDBotBase:
             logger.debug("Stopping Playwright...")
             self.playwright.stop()
             logger.info("Browser closed")
+        self.ledger.close()
         if exc_type:
             logger.warning("Exception occurred during session: %s", exc_value)
             logger.debug("Traceback:\n%s", "".join(tb.format_tb(traceback)))
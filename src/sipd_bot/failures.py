@@ -0,0 +1,160 @@
+"""
+This module provides the FailureQueue class for the SIPDBot automation framework.
+
+Bot tasks put failed work items into a FailureQueue instead of aborting the
+run. Each failure keeps the exception, a screenshot and a DOM snippet of the
+page at the time of failure, stored under `logs/failures/<run_id>/<task>-<n>/`,
+where `n` counts the invocations of the task in the run (a watcher or worker
+runs the same task many times with one run id). After the main pass the task
+retries the queued items once with fresh page state.
+"""
+
+import os
+import json
+import logging
+import traceback as tb
+from datetime import datetime
+
+
+logger = logging.getLogger(__name__)
+
+FAILURE_DIR = "logs/failures"
+
+
+class FailureQueue:
+    """
+    Collects failed work items of a bot task.
+
+    Attributes:
+        task (str): The task name.
+        run_id (str): The SIPDBot run id.
+        output_dir (str): Where screenshots, DOM snippets and the report go,
+            None until the first failure.
+        failures (list): Every failure record of the task, see `add`.
+        pending (list): Failed items waiting for a retry.
+    """
+
+    def __init__(self, task: str, run_id: str):
+        self.task = task
+        self.run_id = run_id
+        self.output_dir = None
+        self.failures = []
+        self.pending = []
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __bool__(self):
+        return bool(self.pending)
+
+    def add(
+        self, item, exc: Exception, page=None, attempt: int = 1, label: str = None
+    ) -> dict:
+        """
+        Record a failed item with a screenshot and DOM snippet of `page`.
+
+        Args:
+            item: The failed work item, kept as is for the retry pass.
+            exc (Exception): The exception raised while processing the item.
+            page (Page, optional): The page to capture. Skipped if None.
+            attempt (int, optional): 1 for the main pass, 2 for the retry pass.
+            label (str, optional): How the item appears in logs and the report.
+            Defaults to `str(item)`.
+
+        Returns:
+            dict: The failure record.
+        """
+        index = len(self.failures) + 1
+        base_name = f"{self._reserve_output_dir()}/{self.task}-{attempt}-{index:03d}"
+        failure = {
+            "task": self.task,
+            "item": label if label is not None else str(item),
+            "attempt": attempt,
+            "error": repr(exc),
+            "traceback": "".join(tb.format_exception(exc)),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "url": None,
+            "screenshot": None,
+            "dom": None,
+        }
+
+        if page is not None:
+            try:
+                failure["url"] = page.url
+                page.screenshot(path=f"{base_name}.png", full_page=True)
+                failure["screenshot"] = f"{base_name}.png"
+                with open(f"{base_name}.html", "w", encoding="utf-8") as f:
+                    f.write(self._dom_snippet(page))
+                failure["dom"] = f"{base_name}.html"
+            except Exception as capture_exc:
+                logger.warning("Failed to capture failure artifacts: %s", capture_exc)
+
+        self.failures.append(failure)
+        self.pending.append(item)
+        logger.error(
+            "[%s] Item failed (attempt %d): %s -> %s",
+            self.task,
+            attempt,
+            failure["item"],
+            failure["error"],
+        )
+        return failure
+
+    def drain(self) -> list:
+        """
+        Take every pending item out of the queue, e.g. for the retry pass.
+
+        Returns:
+            list: The failed items in failure order.
+        """
+        items, self.pending = self.pending, []
+        return items
+
+    def save_report(self) -> str:
+        """
+        Write every failure record to `<output_dir>/<task>.json`.
+
+        Returns:
+            str: The report path, or None if nothing is pending.
+        """
+        if not self.pending:
+            return None
+        path = f"{self._reserve_output_dir()}/{self.task}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.failures, f, indent=2, ensure_ascii=False, default=str)
+        logger.warning(
+            "[%s] %d item(s) still failed, report: %s", self.task, len(self), path
+        )
+        return path
+
+    def _reserve_output_dir(self) -> str:
+        """
+        Create the next free `<run_id>/<task>-<n>` folder, once per queue.
+        """
+        if self.output_dir is None:
+            run_dir = f"{FAILURE_DIR}/{self.run_id}"
+            os.makedirs(run_dir, exist_ok=True)
+            sequence = 1
+            while True:
+                output_dir = f"{run_dir}/{self.task}-{sequence:03d}"
+                try:
+                    # Atomic, two queues of the run never share a folder
+                    os.mkdir(output_dir)
+                    break
+                except FileExistsError:
+                    sequence += 1
+            self.output_dir = output_dir
+        return self.output_dir
+
+    @staticmethod
+    def _dom_snippet(page, max_length: int = 200_000) -> str:
+        """
+        Get the outer HTML of the open modal, or of the page body otherwise.
+        """
+        snippet = page.evaluate(
+            """() => {
+                const modal = document.querySelector('.modal.show, .swal2-container');
+                return (modal || document.body).outerHTML;
+            }"""
+        )
+        return snippet[:max_length]
@@ -0,0 +1,231 @@
+"""
+This module provides the Ledger class for the SIPDBot automation framework.
+
+The ledger is a local SQLite database (`data/ledger.db`) recording every unit
+of work done by the bot: journal rows entered, documents posted and files
+downloaded. It makes re-runs idempotent and lets us report on past runs.
+
+Table `operations`:
+    - run_id: The SIPDBot session that did the work.
+    - operation: The task, e.g. `input_jurnal_umum` or `download_lampiran_perkada`.
+    - key: The work item key (row hash, document id, SKPD name).
+    - status: `success`, `failed` or `skipped`.
+    - started_at, finished_at, duration: Unix timestamps and seconds.
+    - detail: Free text, e.g. the error message of a failed item.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from contextlib import contextmanager
+from .metrics import shared_metrics
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_operations_key ON operations (operation, key, status);
+CREATE INDEX IF NOT EXISTS idx_operations_started ON operations (started_at);
+CREATE INDEX IF NOT EXISTS idx_operations_run ON operations (run_id);
+"""
+
+
+def hash_key(*parts) -> str:
+    """
+    Build a stable work item key from its parts.
+
+    Args:
+        *parts: Values identifying the item, e.g. the journal row values.
+
+    Returns:
+        str: A SHA-1 hex digest of the parts.
+    """
+    raw = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class Ledger:
+    """
+    SQLite backed record of the work done by SIPDBot.
+
+    Attributes:
+        path (str): The SQLite database file.
+        run_id (str): The run id stamped on every record.
+    """
+
+    DEFAULT_PATH = "data/ledger.db"
+
+    def __init__(self, path: str = DEFAULT_PATH, run_id: str = None):
+        self.path = path
+        self.run_id = run_id
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        logger.debug("Ledger opened: %s (run_id=%s)", path, run_id)
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        self.conn.close()
+
+    def done_keys(self, operation: str) -> set:
+        """
+        Get the keys of every successful item of an operation.
+
+        Load this once per task and check items against the returned set.
+
+        Args:
+            operation (str): The operation name.
+
+        Returns:
+            set: The keys that have a `success` record.
+        """
+        rows = self.conn.execute(
+            "SELECT DISTINCT key FROM operations WHERE operation = ? AND status = 'success'",
+            (operation,),
+        )
+        return {row[0] for row in rows}
+
+    def run_counts(self, since: float = None) -> dict:
+        """
+        Count the items of this run by their final status.
+
+        An item that failed and then succeeded on retry counts as `success`.
+
+        Args:
+            since (float, optional): Only count items started at or after this
+                Unix time. Defaults to the whole run.
+
+        Returns:
+            dict: Status -> item count, e.g. `{"success": 12, "failed": 1}`.
+        """
+        rows = self.conn.execute(
+            """
+            SELECT status, COUNT(*) FROM operations AS o
+            WHERE run_id = ? AND started_at >= ? AND id = (
+                SELECT MAX(id) FROM operations
+                WHERE run_id = o.run_id AND operation = o.operation AND key = o.key
+            )
+            GROUP BY status
+            """,
+            (self.run_id, since or 0),
+        )
+        return dict(rows.fetchall())
+
+    def record(
+        self,
+        operation: str,
+        key: str,
+        status: str,
+        started_at: float = None,
+        detail: str = None,
+    ):
+        """
+        Record a finished work item.
+
+        Args:
+            operation (str): The operation name.
+            key (str): The work item key.
+            status (str): `success`, `failed` or `skipped`.
+            started_at (float, optional): Unix start time. Defaults to now.
+            detail (str, optional): Free text detail.
+        """
+        finished_at = time.time()
+        started_at = started_at or finished_at
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO operations (run_id, operation, key, status, started_at, "
+                "finished_at, duration, detail) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.run_id,
+                    operation,
+                    key,
+                    status,
+                    started_at,
+                    finished_at,
+                    finished_at - started_at,
+                    detail,
+                ),
+            )
+        metrics = shared_metrics()
+        metrics.inc("sipd_items_total", task=operation, status=status)
+        if status != "skipped":
+            metrics.observe(
+                "sipd_item_duration_seconds", finished_at - started_at, task=operation
+            )
+
+    @contextmanager
+    def track(self, operation: str, key: str):
+        """
+        Record the enclosed block as a work item.
+
+        The item is recorded as `success` when the block completes and as
+        `failed` when it raises; the exception is re-raised.
+
+        Args:
+            operation (str): The operation name.
+            key (str): The work item key.
+        """
+        started_at = time.time()
+        try:
+            yield
+        except Exception as exc:
+            self.record(operation, key, "failed", started_at, repr(exc))
+            raise
+        self.record(operation, key, "success", started_at)
+
+    def report(self, days: int = 7) -> list:
+        """
+        Summarize throughput and failures per day and operation.
+
+        Args:
+            days (int, optional): How many days back to report. Defaults to 7.
+
+        Returns:
+            list: Tuples of (date, operation, success, failed, skipped,
+            total_seconds, items_per_hour).
+        """
+        since = time.time() - days * 86_400
+        rows = self.conn.execute(
+            """
+            SELECT
+                date(started_at, 'unixepoch', 'localtime') AS day,
+                operation,
+                SUM(status = 'success'),
+                SUM(status = 'failed'),
+                SUM(status = 'skipped'),
+                SUM(duration)
+            FROM operations
+            WHERE started_at >= ?
+            GROUP BY day, operation
+            ORDER BY day, operation
+            """,
+            (since,),
+        ).fetchall()
+
+        return [
+            (
+                day,
+                op,
+                ok,
+                failed,
+                skipped,
+                seconds,
+                ok * 3600 / seconds if seconds else 0.0,
+            )
+            for day, op, ok, failed, skipped, seconds in rows
+        ]
@@ -8,7 +8,7 @@ SIPD-RI web application. It supports two login mechanisms:
 
 Features:
 - Automatically determines whether to log in manually or restore from session cookies.
-- Saves session cookies to `cookies.json` after manual login.
+- Saves session cookies to `cookies.json` (or the bot's `cookie_file`) after manual login.
 - Loads cookies from file and injects them into the browser context.
 - Handles invalid or expired cookies gracefully by falling back to manual login.
 
@@ -37,13 +37,14 @@ class LoginMixin:
         """
         Log in to SIPD-RI. Log in method is picked based on the existence of session cookie file.
         """
-        if self.is_cookies_exist():
+        if self.is_cookies_exist(self.cookie_file):
             logger.info("Cookie file found, logging in with cookies")
             self.login_with_cookies()
         else:
             logger.info("Cookie file not found, performing manual login")
             self.login_manual()
             self.save_cookies()
+        self.remember_session()
 
     @staticmethod
     def is_cookies_exist(cookie_file="cookies.json") -> bool:
@@ -69,9 +70,9 @@ class LoginMixin:
             cookies.json (file): A JSON file containing the session cookies.
         """
         cookies = self.context.cookies()
-        with open("cookies.json", "w", encoding="utf-8") as f:
+        with open(self.cookie_file, "w", encoding="utf-8") as f:
             json.dump(cookies, f)
-        logger.info("Cookies saved to cookies.json")
+        logger.info("Cookies saved to %s", self.cookie_file)
 
     def reset_cookies(self):
         """
@@ -89,7 +90,7 @@ class LoginMixin:
             FileNotFoundError: If `cookies.json` does not exist (handled silently).
         """
         try:
-            os.remove("cookies.json")
+            os.remove(self.cookie_file)
             logger.info("Existing cookies removed")
         except FileNotFoundError:
             logger.warning("No existing cookies to remove")
@@ -124,8 +125,8 @@ class LoginMixin:
             - If cookies are expired or invalid, the method will fall back to manual login.
         """
         try:
-            logger.debug("Loading cookies from cookies.json...")
-            with open("cookies.json", "r", encoding="utf-8") as f:
+            logger.debug("Loading cookies from %s...", self.cookie_file)
+            with open(self.cookie_file, "r", encoding="utf-8") as f:
                 cookies = json.load(f)
                 self.context.add_cookies(cookies)
 
@@ -137,9 +138,10 @@ class LoginMixin:
 
         except json.JSONDecodeError:
             logger.warning(
-                "Invalid or expired cookies. Deleting cookies.json and retrying manual login"
+                "Invalid or expired cookies. Deleting %s and retrying manual login",
+                self.cookie_file,
             )
-            os.remove("cookies.json")
+            os.remove(self.cookie_file)
             self.login()
 
         except FileNotFoundError:
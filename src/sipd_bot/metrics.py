@@ -0,0 +1,252 @@
+"""
+This module provides the Metrics registry for the SIPDBot automation framework.
+
+During long unattended runs the bot can expose live metrics on a local HTTP
+endpoint in the Prometheus text format (`--metrics-port`), instead of tailing
+the log to follow progress. Like the throttle, the registry is shared by every
+SIPDBot in the process:
+
+- `sipd_items_total{task,status}`: work items recorded in the ledger.
+- `sipd_step_duration_seconds{step}`: histogram of paced bot actions.
+- `sipd_item_duration_seconds{task}`: histogram of work items.
+- `sipd_retries_total{task}`: items retried after failing the main pass, and
+  kode rekening lookups retried in Jurnal Umum (`task="kode_rekening"`).
+- `sipd_selector_reloads_total`, `sipd_aklap_reloads_total`: page reloads of
+  `ensure_element_visible` and `to_aklap`.
+- `sipd_page_recycles_total`, `sipd_session_reauths_total`.
+- Gauges of the throttle rate and of the last
+  page health sample (JS heap, DOM nodes).
+
+The page cannot be read from the server thread (Playwright's sync API is
+bound to the automation thread), so memory gauges show the latest sample
+taken by `PageHealth`.
+"""
+
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HELP = {
+    "sipd_items_total": "Work items recorded in the ledger, by task and status.",
+    "sipd_item_duration_seconds": "Duration of work items, by task.",
+    "sipd_step_duration_seconds": "Duration of paced bot actions, by step.",
+    "sipd_retries_total": "Retried work items and kode rekening lookups, by task.",
+    "sipd_selector_reloads_total": "Page reloads while waiting for a selector.",
+    "sipd_selector_failures_total": "Selectors still missing after every reload.",
+    "sipd_aklap_reloads_total": "AKLAP reloads after a 404 page.",
+    "sipd_page_recycles_total": "Pages replaced after degrading or a session drop.",
+    "sipd_session_reauths_total": "Re-authentications after the session dropped.",
+    "sipd_throttle_events_total": "Throttle outcomes of bot actions, by kind.",
+    "sipd_throttle_rate": "Current throttle rate, in actions per second.",
+    "sipd_page_heap_bytes": "JS heap of the page at its last health sample.",
+    "sipd_page_dom_nodes": "DOM elements of the page at its last health sample.",
+}
+
+
+def _labels(labels: dict, **extra) -> str:
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+        )
+        for key, value in sorted(labels.items())
+    )
+    return "{" + pairs + "}"
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters, gauges and histograms.
+
+    Metrics are identified by name and label values. Collectors are called
+    on every scrape to set gauges from live state, e.g. the throttle.
+    """
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): The metric name, ending in `_total`.
+            amount (float, optional): The increment. Defaults to 1.
+            **labels: Label values of the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        """
+        Set a gauge.
+
+        Args:
+            name (str): The metric name.
+            value (float): The current value.
+            **labels: Label values of the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """
+        Record a duration in a histogram.
+
+        Args:
+            name (str): The metric name, ending in `_seconds`.
+            seconds (float): The observed duration.
+            **labels: Label values of the series.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram["buckets"][index] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    def add_collector(self, collect):
+        """
+        Register a callable run before every scrape, typically setting gauges.
+
+        Args:
+            collect (callable): Called with this registry.
+        """
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        for collect in self._collectors:
+            try:
+                collect(self)
+            except Exception:
+                logger.exception("Metrics collector failed")
+
+        with self._lock:
+            series = [
+                (name, "counter", labels, value)
+                for (name, labels), value in self._counters.items()
+            ]
+            series += [
+                (name, "gauge", labels, value)
+                for (name, labels), value in self._gauges.items()
+            ]
+            histograms = {
+                key: {**value, "buckets": list(value["buckets"])}
+                for key, value in self._histograms.items()
+            }
+
+        lines, typed = [], set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for name, kind, labels, value in sorted(series):
+            header(name, kind)
+            lines.append(f"{name}{_labels(dict(labels))} {value:.10g}")
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            header(name, "histogram")
+            labels, cumulative = dict(labels), 0
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_labels(labels, le=f'{bound:g}')} {cumulative}"
+                )
+            lines.append(
+                f"{name}_bucket{_labels(labels, le='+Inf')} {histogram['count']}"
+            )
+            lines.append(f"{name}_sum{_labels(labels)} {histogram['sum']:.10g}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("Metrics scrape: " + format, *args)
+
+
+def start_metrics_server(
+    port: int, host: str = "127.0.0.1", metrics: Metrics = None
+) -> ThreadingHTTPServer:
+    """
+    Serve the metrics on `http://<host>:<port>/metrics` from a daemon thread.
+
+    Args:
+        port (int): The TCP port, 0 for any free port.
+        host (str, optional): The interface. Defaults to localhost only.
+        metrics (Metrics, optional): The registry. Defaults to the shared one.
+
+    Returns:
+        ThreadingHTTPServer: The running server, see `server_address`.
+    """
+    handler = type(
+        "MetricsHandler", (_MetricsHandler,), {"metrics": metrics or shared_metrics()}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    logger.info("Metrics served on http://%s:%d/metrics", *server.server_address[:2])
+    return server
+
+
+_shared_metrics = Metrics()
+
+
+def shared_metrics() -> Metrics:
+    """
+    Get the process-wide metrics registry shared by every SIPDBot.
+
+    Returns:
+        Metrics: The shared registry.
+    """
+    return _shared_metrics
@@ -0,0 +1,151 @@
+"""
+This module provides the PageHealth class for the SIPDBot automation framework.
+
+A single AKLAP page used for hours (thousands of posted documents or journal
+lines) slowly grows its JS heap and DOM, and every interaction gets slower.
+PageHealth watches the page's JS heap, DOM size and interaction latency
+trend, and tells the bot when the page should be recycled. Work already done
+is checkpointed in the ledger, so a long loop can swap in a fresh page,
+reopen its screen and continue where it was.
+"""
+
+import time
+import logging
+import statistics
+from collections import deque
+from .metrics import shared_metrics
+
+
+logger = logging.getLogger(__name__)
+
+PAGE_METRICS_JS = """() => ({
+    heap: performance.memory ? performance.memory.usedJSHeapSize : null,
+    nodes: document.getElementsByTagName("*").length,
+})"""
+
+
+class PageHealth:
+    """
+    Memory and latency monitor of the bot's page.
+
+    Attributes:
+        max_heap_mb (float): JS heap size, in MB, that triggers a recycle.
+        max_dom_nodes (int): DOM element count that triggers a recycle.
+        latency_factor (float): Recycle when the recent median item latency
+            exceeds the baseline median (measured on a fresh page) this many times.
+        window (int): Number of items in the baseline and recent latency windows.
+        check_every (int): Sample the page every this many items.
+        recycles (int): Number of recycles since the bot started.
+        last_sample (dict): Latest `heap_mb`, `nodes` and latency medians.
+    """
+
+    def __init__(
+        self,
+        max_heap_mb: float = 512,
+        max_dom_nodes: int = 50_000,
+        latency_factor: float = 2.0,
+        window: int = 20,
+        check_every: int = 25,
+    ):
+        self.max_heap_mb = max_heap_mb
+        self.max_dom_nodes = max_dom_nodes
+        self.latency_factor = latency_factor
+        self.window = window
+        self.check_every = check_every
+        self.recycles = 0
+        self.last_sample = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Start monitoring a fresh page.
+        """
+        self._baseline = []
+        self._recent = deque(maxlen=self.window)
+        self._items = 0
+        self._started_at = time.monotonic()
+
+    def record(self, latency: float):
+        """
+        Record the duration of one work item on the page.
+
+        Args:
+            latency (float): Duration of the item in seconds.
+        """
+        self._items += 1
+        if len(self._baseline) < self.window:
+            self._baseline.append(latency)
+        else:
+            self._recent.append(latency)
+
+    def sample(self, page) -> dict:
+        """
+        Read the JS heap and DOM size of a page.
+
+        Args:
+            page (Page): The page to sample.
+
+        Returns:
+            dict: `heap_mb` (None when the browser does not expose it) and `nodes`.
+        """
+        metrics = page.evaluate(PAGE_METRICS_JS)
+        heap = metrics["heap"]
+        return {
+            "heap_mb": round(heap / 1024**2, 1) if heap is not None else None,
+            "nodes": metrics["nodes"],
+        }
+
+    def check(self, page) -> str:
+        """
+        Check whether the page should be recycled.
+
+        The page is only sampled every `check_every` items.
+
+        Args:
+            page (Page): The page to check.
+
+        Returns:
+            str: The reason to recycle, or None while the page is healthy.
+        """
+        if self._items == 0 or self._items % self.check_every:
+            return None
+
+        sample = self.sample(page)
+        if self._recent:
+            sample["baseline_latency"] = round(statistics.median(self._baseline), 2)
+            sample["recent_latency"] = round(statistics.median(self._recent), 2)
+        self.last_sample = sample
+        logger.debug("Page health after %d item(s): %s", self._items, sample)
+        metrics = shared_metrics()
+        metrics.set("sipd_page_dom_nodes", sample["nodes"])
+        if sample["heap_mb"] is not None:
+            metrics.set("sipd_page_heap_bytes", sample["heap_mb"] * 1024**2)
+
+        if sample["heap_mb"] is not None and sample["heap_mb"] > self.max_heap_mb:
+            return f"JS heap {sample['heap_mb']} MB > {self.max_heap_mb} MB"
+        if sample["nodes"] > self.max_dom_nodes:
+            return f"{sample['nodes']} DOM nodes > {self.max_dom_nodes}"
+        if (
+            len(self._recent) == self.window
+            and sample["recent_latency"]
+            > sample["baseline_latency"] * self.latency_factor
+        ):
+            return (
+                f"item latency {sample['recent_latency']}s "
+                f"> {self.latency_factor}x baseline {sample['baseline_latency']}s"
+            )
+        return None
+
+    def stats(self) -> dict:
+        """
+        Get the monitor state.
+
+        Returns:
+            dict: Items and age of the current page, recycles and the last sample.
+        """
+        return {
+            "items": self._items,
+            "page_age": round(time.monotonic() - self._started_at),
+            "recycles": self.recycles,
+            **self.last_sample,
+        }
@@ -0,0 +1,106 @@
+"""
+Typed snapshots of the AKLAP posting queue (Pendapatan and Belanja).
+
+`SIPDBot.export_posting_queue` reads the unposted transactions of every SKPD
+page by page; this module turns the raw table into a typed DataFrame and
+writes one snapshot per SKPD:
+
+    <output_dir>/<kind>/<SKPD>.parquet
+
+Snapshots are written as Parquet when the optional `pyarrow` dependency is
+installed (`pip install pyarrow`), otherwise as CSV next to where the Parquet
+file would be. `src.posting_queue.load_snapshots` reads either back.
+
+Column typing, by normalized header name:
+- `tanggal*`: datetime (day first).
+- `nilai`, `jumlah`, `total`, `nominal`: float, Indonesian amount formatting.
+- `jenis*`, `status*`: category.
+- everything else: string. Action and checkbox columns are dropped.
+"""
+
+import os
+import logging
+from datetime import datetime
+import pandas as pd
+from .verification import normalize_columns, parse_amounts
+
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_COLUMNS = ("nilai", "jumlah", "total", "nominal")
+CATEGORY_COLUMNS = ("jenis", "status")
+DROP_COLUMNS = ("aksi", "", "_")
+
+
+def posting_queue_frame(
+    headers: list, rows: list, skpd: str, kind: str
+) -> pd.DataFrame:
+    """
+    Build a typed DataFrame from the raw posting queue table.
+
+    Args:
+        headers (list): The table header texts.
+        rows (list): The cell texts of every row, same length as `headers`.
+        skpd (str): The SKPD name.
+        kind (str): `pendapatan` or `belanja`.
+
+    Returns:
+        pd.DataFrame: One row per transaction, plus `skpd`, `jenis_posting`
+        and `exported_at` columns.
+    """
+    df = normalize_columns(pd.DataFrame(rows, columns=headers, dtype="string"))
+    df = df.loc[:, ~df.columns.isin(DROP_COLUMNS)]
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    typed = {}
+    for column in df.columns:
+        if column.startswith("tanggal"):
+            typed[column] = pd.to_datetime(df[column], dayfirst=True, errors="coerce")
+        elif column.startswith(AMOUNT_COLUMNS):
+            typed[column] = parse_amounts(df[column])
+        elif column.startswith(CATEGORY_COLUMNS):
+            typed[column] = df[column].str.strip().astype("category")
+        else:
+            typed[column] = df[column].str.strip()
+
+    return pd.DataFrame(typed, index=df.index).assign(
+        skpd=skpd,
+        jenis_posting=kind,
+        exported_at=pd.Timestamp(datetime.now()),
+    )
+
+
+def snapshot_path(output_dir: str, kind: str, skpd: str) -> str:
+    """
+    Get the Parquet snapshot path of an SKPD.
+
+    Args:
+        output_dir (str): The export folder.
+        kind (str): `pendapatan` or `belanja`.
+        skpd (str): The SKPD name.
+
+    Returns:
+        str: `<output_dir>/<kind>/<SKPD>.parquet`.
+    """
+    return f"{output_dir}/{kind}/{skpd.replace('/', '-')}.parquet"
+
+
+def write_snapshot(df: pd.DataFrame, path: str) -> str:
+    """
+    Write a snapshot as Parquet, or as CSV when pyarrow is not installed.
+
+    Args:
+        df (pd.DataFrame): Output of `posting_queue_frame`.
+        path (str): The `.parquet` path.
+
+    Returns:
+        str: The path actually written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        df.to_parquet(path, index=False)
+    except ImportError:
+        path = os.path.splitext(path)[0] + ".csv"
+        df.to_csv(path, index=False)
+        logger.warning("pyarrow not installed, snapshot saved as CSV: %s", path)
+    return path
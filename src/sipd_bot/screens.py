@@ -0,0 +1,243 @@
+"""
+This module provides the page objects of the AKLAP screens used by SIPDBot.
+
+Every selector the hot loops need lives in `SELECTORS`, one entry per screen.
+A screen object builds its locators once for a page (see
+`SIPDBotBase.screen`), so the per-row code only picks prebuilt locators
+instead of rebuilding selector strings.
+
+The selectors avoid `:has-text` scans over large subtrees. AKLAP forms are
+Bootstrap-Vue form groups: a `fieldset` is labelled by its `legend`, so a
+field is found by its legend text only, not by the text of every dropdown
+option inside it. Buttons are found by role. Data tables are Bootstrap-Vue
+`b-table`s, told apart from other tables of the same card (e.g. totals).
+
+`python main.py selftest-selectors` resolves every selector against the
+stand-in pages in `src/standin/` and reports its timing.
+"""
+
+SELECTORS = {
+    "jurnal_umum": {
+        "tab_input": 'div.card-header a:has-text("Input Jurnal Umum")',
+        "tabpanel": "div.tab-content > div.active",
+        "field": 'fieldset:has(legend:has-text("{label}"))',
+        "listbox": 'ul[role="listbox"]',
+        "option": 'ul[role="listbox"] > li',
+        "lines_table": "table",
+    },
+    "posting_belanja": {
+        "table": "div.card-body table.b-table",
+        "rows": "tbody > tr",
+        "aksi_dropdown": "td:nth-child(8) div.dropdown",
+        "posting_menu": 'a:has-text("Posting")',
+        "modal_body": "div.modal-body",
+        "metode_input": "input",
+        "metode_option": 'ul[role="listbox"] > li',
+        "btn_posting": "footer.modal-footer button.btn-success",
+        "success_popup": 'h2.swal2-title:has-text("Success")',
+    },
+    "posting_queue": {
+        "table": "div.card-body table.b-table",
+        "per_page": "div.card-body select",
+        "next_page": 'ul.pagination li:not(.disabled) > [aria-label="Go to next page"]',
+    },
+    "lampiran": {
+        "modal_body": "div.modal-body",
+        "fieldsets": "div.modal-body fieldset",
+        "cetak_toggle": "footer.modal-footer button.dropdown-toggle",
+        "cetak_option": "footer.modal-footer a.dropdown-item",
+    },
+}
+
+
+class JurnalUmumScreen:
+    """
+    Input Jurnal Umum tab of the Jurnal Umum menu.
+
+    Attributes:
+        tab_input (Locator): The 'Input Jurnal Umum' tab.
+        tabpanel (Locator): The active tab panel.
+        kode_rekening (Locator): The Kode Rekening dropdown input.
+        kode_rekening_listbox (Locator): The Kode Rekening dropdown list.
+        debit (Locator): The Debit input.
+        kredit (Locator): The Kredit input.
+        btn_tambah (Locator): The 'Tambah' button adding a line.
+        btn_simpan (Locator): The 'Simpan' button saving the journal.
+        lines_table (Locator): The table of the lines entered so far.
+    """
+
+    selectors = SELECTORS["jurnal_umum"]
+
+    def __init__(self, page):
+        self.page = page
+        self.tab_input = page.locator(self.selectors["tab_input"])
+        self.tabpanel = page.locator(self.selectors["tabpanel"])
+
+        fieldset_kode = self.field("Kode Rekening")
+        self.kode_rekening = fieldset_kode.locator("input").first
+        self.kode_rekening_listbox = fieldset_kode.locator(self.selectors["listbox"])
+        self._kode_options = fieldset_kode.locator(self.selectors["option"])
+        self.debit = self.field("Debit").locator("input").first
+        self.kredit = self.field("Kredit").locator("input").first
+        self.btn_tambah = self.tabpanel.get_by_role("button", name="Tambah")
+        self.btn_simpan = self.tabpanel.get_by_role("button", name="Simpan").last
+        self.lines_table = self.tabpanel.locator(self.selectors["lines_table"]).last
+
+    def field(self, label: str):
+        """
+        Get a form field by its legend.
+
+        Args:
+            label (str): The legend text, e.g. `Kode Rekening`.
+
+        Returns:
+            Locator: The field's fieldset.
+        """
+        return self.tabpanel.locator(self.selectors["field"].format(label=label)).first
+
+    def kode_rekening_option(self, kode_rekening: str):
+        """
+        Get the Kode Rekening dropdown option of a kode.
+
+        Args:
+            kode_rekening (str): The kode rekening.
+
+        Returns:
+            Locator: The dropdown option.
+        """
+        return self._kode_options.filter(has_text=kode_rekening)
+
+
+class PostingBelanjaScreen:
+    """
+    Posting Jurnal - Belanja menu and its posting modal.
+
+    Attributes:
+        table (Locator): The transaction table.
+        rows (Locator): The table body rows.
+        modal_body (Locator): The posting modal body.
+        metode_input (Locator): The posting method dropdown input.
+        metode_options (Locator): The options of the opened method dropdown.
+        btn_posting (Locator): The modal 'Posting' button.
+        success_popup (Locator): The success popup title.
+    """
+
+    selectors = SELECTORS["posting_belanja"]
+
+    def __init__(self, page):
+        self.page = page
+        self.table = page.locator(self.selectors["table"])
+        self.rows = self.table.locator(self.selectors["rows"])
+        self.modal_body = page.locator(self.selectors["modal_body"])
+        self.metode_input = self.modal_body.locator(self.selectors["metode_input"])
+        self.metode_options = self.modal_body.locator(self.selectors["metode_option"])
+        self.btn_posting = page.locator(self.selectors["btn_posting"])
+        self.success_popup = page.locator(self.selectors["success_popup"])
+
+    def row_of(self, cell_text: str):
+        """
+        Get the table row holding a cell with exactly this text.
+
+        Args:
+            cell_text (str): A cell identifying the row, e.g. the document number.
+
+        Returns:
+            Locator: The table row.
+        """
+        return self.rows.filter(
+            has=self.page.get_by_role("cell", name=cell_text, exact=True)
+        )
+
+    def aksi_dropdown(self, row):
+        """
+        Get the 'Aksi' dropdown of a table row.
+
+        Args:
+            row (Locator): The table row.
+
+        Returns:
+            Locator: The dropdown.
+        """
+        return row.locator(self.selectors["aksi_dropdown"])
+
+    def posting_menu(self, aksi_dropdown):
+        """
+        Get the 'Posting' item of an opened 'Aksi' dropdown.
+
+        Args:
+            aksi_dropdown (Locator): The row's dropdown.
+
+        Returns:
+            Locator: The menu item.
+        """
+        return aksi_dropdown.locator(self.selectors["posting_menu"])
+
+    def metode_option(self, metode: str):
+        """
+        Get a posting method option of the opened method dropdown.
+
+        Args:
+            metode (str): The method, e.g. `Metode Aset` or `Tanpa Metode`.
+
+        Returns:
+            Locator: The dropdown option.
+        """
+        return self.metode_options.filter(has_text=metode)
+
+
+class PostingQueueScreen:
+    """
+    Transaction table of Posting Jurnal - Pendapatan or Belanja, for reading.
+
+    Attributes:
+        table (Locator): The transaction table.
+        per_page (Locator): The rows per page select.
+        next_page (Locator): The enabled 'next page' button, absent on the
+            last page.
+    """
+
+    selectors = SELECTORS["posting_queue"]
+
+    def __init__(self, page):
+        self.page = page
+        self.table = page.locator(self.selectors["table"])
+        self.per_page = page.locator(self.selectors["per_page"])
+        self.next_page = page.locator(self.selectors["next_page"])
+
+
+class LampiranScreen:
+    """
+    Cetak modal of the LPPD menu.
+
+    Attributes:
+        modal_body (Locator): The modal body.
+        skpd (Locator): The SKPD dropdown input (fieldset 0).
+        konsolidasi (Locator): The Konsolidasi SKPD dropdown input (fieldset 1).
+        radio (Locator): The radio labels (fieldset 2), nth(0): Konsolidasi,
+            nth(1): Per SKPD.
+        cetak_toggle (Locator): The Cetak dropdown button.
+    """
+
+    selectors = SELECTORS["lampiran"]
+
+    def __init__(self, page):
+        self.page = page
+        self.modal_body = page.locator(self.selectors["modal_body"])
+        fieldsets = page.locator(self.selectors["fieldsets"])
+        self.skpd = fieldsets.nth(0).locator("input").first
+        self.konsolidasi = fieldsets.nth(1).locator("input").first
+        self.radio = fieldsets.nth(2).locator("label")
+        self.cetak_toggle = page.locator(self.selectors["cetak_toggle"])
+        self._cetak_options = page.locator(self.selectors["cetak_option"])
+
+    def cetak_option(self, file_format: str):
+        """
+        Get a format of the opened Cetak dropdown.
+
+        Args:
+            file_format (str): The format, e.g. `PDF` or `Excel`.
+
+        Returns:
+            Locator: The dropdown item.
+        """
+        return self._cetak_options.filter(has_text=file_format)
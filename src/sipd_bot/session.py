@@ -0,0 +1,169 @@
+"""
+This module provides the SessionMixin class for the SIPDBot automation framework.
+
+Multi-hour runs can outlive the SIPD-RI session. SessionMixin keeps the
+session alive and recovers it when it drops anyway:
+
+- Keep-alive: every `KEEP_ALIVE_INTERVAL` seconds a lightweight request is
+  sent with the session cookies, outside the page. Playwright's sync API is
+  single-threaded, so the keep-alive is cooperative: work loops call
+  `keep_alive` between items and idle loops (watcher, queue worker) call it
+  while waiting. The storage state is refreshed at the same time.
+- Detection: every page reports a main-frame navigation to `URL_LOGIN`.
+- Recovery: `reauthenticate` starts a fresh context from the last known
+  storage state, or falls back to the login flow, and the task's `restore`
+  callback reopens its screen (AKLAP menu, filters, modal) before the
+  interrupted item is run again.
+"""
+
+import time
+import logging
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from .metrics import shared_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class SessionExpiredError(RuntimeError):
+    """
+    The session dropped and the task's screen cannot be restored.
+    """
+
+
+class SessionMixin:
+    """
+    Keeps the SIPD-RI session alive and re-authenticates when it drops.
+
+    Attributes:
+        session_reauths (int): Number of re-authentications since the bot started.
+    """
+
+    KEEP_ALIVE_URL = "https://sipd.kemendagri.go.id/penatausahaan/aklap"
+    KEEP_ALIVE_INTERVAL = 300
+
+    _session_state = None
+    _session_lost = False
+    _last_keep_alive = 0.0
+    session_reauths = 0
+
+    def watch_session(self, page):
+        """
+        Flag the session as lost when a page is redirected to the login page.
+
+        Args:
+            page (Page): The page to watch.
+        """
+
+        def on_navigated(frame):
+            if frame is page.main_frame and frame.url.startswith(self.URL_LOGIN):
+                logger.warning("Redirected to the login page: %s", frame.url)
+                self._session_lost = True
+
+        page.on("framenavigated", on_navigated)
+
+    def remember_session(self):
+        """
+        Keep the current storage state (cookies, local storage) for re-authentication.
+        """
+        self._session_state = self.context.storage_state()
+        self._session_lost = False
+        self._last_keep_alive = time.monotonic()
+
+    def session_lost(self) -> bool:
+        """
+        Check whether the session dropped.
+
+        Returns:
+            bool: True if a page was redirected to the login page.
+        """
+        return self._session_lost or self.page.url.startswith(self.URL_LOGIN)
+
+    def keep_alive(self, force: bool = False) -> bool:
+        """
+        Refresh the session if `KEEP_ALIVE_INTERVAL` passed since the last refresh.
+
+        Args:
+            force (bool, optional): Refresh now. Defaults to False.
+
+        Returns:
+            bool: False if the session dropped.
+        """
+        if self._session_state is None or self.replay_har:
+            # Not logged in yet, or a replay that never expires
+            return True
+        if self.session_lost():
+            return False
+        if (
+            not force
+            and time.monotonic() - self._last_keep_alive < self.KEEP_ALIVE_INTERVAL
+        ):
+            return True
+
+        try:
+            response = self.context.request.get(self.KEEP_ALIVE_URL, timeout=30_000)
+        except Exception as e:
+            logger.warning("Keep-alive request failed: %s", e)
+            return True
+
+        if response.url.startswith(self.URL_LOGIN) or response.status in (401, 403):
+            logger.warning("Keep-alive: session expired (HTTP %s)", response.status)
+            self._session_lost = True
+            return False
+
+        self.remember_session()
+        logger.debug("Keep-alive: session refreshed")
+        return True
+
+    def reauthenticate(self):
+        """
+        Log in again after the session dropped, on a fresh page.
+
+        The last known storage state is tried first; when SIPD-RI rejects it
+        too, the regular login flow runs (cookie file, then manual login).
+        """
+        logger.warning("Session lost, re-authenticating...")
+        self.recycle_page("session lost", storage_state=self._session_state)
+
+        try:
+            self.page.goto(self.URL_LOGIN, timeout=120_000)
+            self.page.wait_for_url("**/dashboard", timeout=30_000)
+        except PlaywrightTimeoutError:
+            logger.warning("Saved session rejected, logging in again")
+            self.context.clear_cookies()
+            self.login()
+
+        self.session_reauths += 1
+        shared_metrics().inc("sipd_session_reauths_total")
+        self.save_cookies()
+        self.remember_session()
+        logger.info("Re-authenticated (%d time(s) this run)", self.session_reauths)
+
+    def resume_after_reauth(self, action, restore=None):
+        """
+        Run an action; if it failed because the session dropped, log in again,
+        restore the screen and run it once more.
+
+        Args:
+            action (callable): The interrupted work, e.g. one item.
+            restore (callable, optional): Reopens the task's screen after the
+                re-authentication. Without it the task cannot resume.
+
+        Returns:
+            The return value of `action`.
+
+        Raises:
+            SessionExpiredError: If the session dropped and there is no `restore`.
+        """
+        try:
+            return action()
+        except Exception:
+            if not self.session_lost():
+                raise
+
+        self.reauthenticate()
+        if restore is None:
+            raise SessionExpiredError("Session expired, the screen cannot be restored")
+        restore()
+        logger.info("Screen restored, resuming the interrupted item")
+        return action()
@@ -0,0 +1,382 @@
+"""
+This module provides the SKPDRegistry class for the SIPDBot automation framework.
+
+The registry is a local cache of the SKPD and unit (UPT/KPA) list of SIPD-RI,
+stored per fiscal year in `data/skpd-registry.json`. It is refreshed from
+SIPD-RI once the cached data is older than the configured TTL.
+
+Dropdown options without a kode cannot tell units from SKPD by their kode.
+They are classified by the static yearly name lists (`data/SKPD-<year>.txt`,
+`data/SKPD-KPA-<year>.txt`), then by a `UPT`/`UPTD` name prefix; the rest is
+left without a level, so it is never listed as an SKPD or unit.
+
+The same files seed a level the synced data has no entries for. The latest
+file up to the registry year is used, and since it may be outdated, callers
+are told (`seed_warning`, `StaleSeedError`) instead of using it silently.
+
+Features:
+- Stores the kode, nama, level (`skpd` or `unit`) and parent SKPD of every entry.
+- Indexes entries by normalized name and by kode for constant-time lookup.
+- Resolves user supplied names to the exact name shown in the SIPD-RI dropdown.
+"""
+
+import os
+import re
+import glob
+import json
+import logging
+from datetime import datetime, timedelta
+
+
+logger = logging.getLogger(__name__)
+
+KODE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)+)\s*[-–]?\s*(.+?)\s*$")
+UNIT_NAME_PATTERN = re.compile(r"^UPTD?\b", re.IGNORECASE)
+
+# Level -> static name list of a fiscal year
+SEED_FILES = {"skpd": "data/SKPD-{year}.txt", "unit": "data/SKPD-KPA-{year}.txt"}
+
+
+class StaleSeedError(ValueError):
+    """
+    The only entries of a level come from a seed file, which may be outdated.
+
+    Attributes:
+        files (list): The seed files in use.
+    """
+
+    def __init__(self, message: str, files: list):
+        super().__init__(message)
+        self.files = files
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize an SKPD name for lookup (uppercase, single spaces).
+
+    Args:
+        name (str): The SKPD name.
+
+    Returns:
+        str: The normalized name.
+    """
+    return " ".join(name.upper().split())
+
+
+def parse_skpd_option(text: str) -> dict:
+    """
+    Parse a dropdown option text into a registry entry.
+
+    Options are either `<kode> <nama>` or just `<nama>`. SKPD kode end with a
+    `0000` segment, while units keep the SKPD prefix with their own sequence.
+    Without a kode the level is unknown (None), see `SKPDRegistry.classify`.
+
+    Args:
+        text (str): The dropdown option text.
+
+    Returns:
+        dict: The registry entry with `id`, `kode`, `nama`, `level` and `parent`.
+    """
+    match = KODE_PATTERN.match(text)
+    if not match:
+        nama = " ".join(text.split())
+        return {"id": nama, "kode": None, "nama": nama, "level": None, "parent": None}
+
+    kode, nama = match.group(1), " ".join(match.group(2).split())
+    return make_entry(kode, nama)
+
+
+def make_entry(kode: str, nama: str, entry_id=None) -> dict:
+    """
+    Build a registry entry and derive its hierarchy from the kode.
+
+    Args:
+        kode (str): The SKPD or unit kode.
+        nama (str): The SKPD or unit name.
+        entry_id (optional): The SIPD-RI id, defaults to the kode.
+
+    Returns:
+        dict: The registry entry.
+    """
+    head, _, tail = kode.rpartition(".")
+    is_unit = bool(head) and tail.strip("0") != ""
+    return {
+        "id": entry_id if entry_id is not None else kode,
+        "kode": kode,
+        "nama": nama,
+        "level": "unit" if is_unit else "skpd",
+        "parent": f"{head}.{'0' * len(tail)}" if is_unit else None,
+    }
+
+
+class SKPDRegistry:
+    """
+    Local, TTL-refreshed cache of SKPD and unit data for a fiscal year.
+
+    Attributes:
+        path (str): The JSON file holding every cached year.
+        year (int): The fiscal year this registry works on.
+        ttl (timedelta): Maximum age before the cache needs a refresh.
+        seeded (list): Entries from the seed files, for the levels the cached
+            entries lack. Never saved to the registry file.
+        seed_files (dict): Level -> seed file path of the `seeded` entries.
+    """
+
+    DEFAULT_PATH = "data/skpd-registry.json"
+    DEFAULT_TTL_DAYS = 7
+
+    def __init__(
+        self, path: str = DEFAULT_PATH, year: int = None, ttl_days: int = None
+    ):
+        self.path = path
+        self.year = year or datetime.now().year
+        self.ttl = timedelta(days=ttl_days or self.DEFAULT_TTL_DAYS)
+        self.synced_at = None
+        self.entries = []
+        self.seeded = []
+        self.seed_files = {}
+        self._by_name = {}
+        self._by_kode = {}
+        self.load()
+
+    def load(self):
+        """
+        Load the cached entries for `self.year` and rebuild the indexes.
+        """
+        data = self._read_file()
+        cached = data.get(str(self.year), {})
+        synced_at = cached.get("synced_at")
+        self.synced_at = datetime.fromisoformat(synced_at) if synced_at else None
+        # Kode-less entries are classified again, the seed files may have changed
+        self.entries = self.classify(
+            [
+                e if e.get("kode") else {**e, "level": None}
+                for e in cached.get("entries", [])
+            ]
+        )
+        self._build_index()
+        logger.debug(
+            "SKPD registry loaded: year=%s entries=%d", self.year, len(self.entries)
+        )
+
+    def save(self):
+        """
+        Write the entries for `self.year` back to the registry file.
+        """
+        data = self._read_file()
+        data[str(self.year)] = {
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+            "entries": self.entries,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        logger.info(
+            "SKPD registry saved: %s (%d entries)", self.path, len(self.entries)
+        )
+
+    def update(self, entries: list):
+        """
+        Replace the cached entries and mark the registry as freshly synced.
+
+        Args:
+            entries (list): Registry entries, see `make_entry`. Entries without
+                a level are classified first, see `classify`.
+        """
+        self.entries = self.classify(entries)
+        self.synced_at = datetime.now()
+        self._build_index()
+        self.save()
+
+    def is_stale(self) -> bool:
+        """
+        Check whether the registry is empty or older than the TTL.
+
+        Returns:
+            bool: True if the registry needs to be synced from SIPD-RI.
+        """
+        if not self.entries or self.synced_at is None:
+            return True
+        return datetime.now() - self.synced_at > self.ttl
+
+    def classify(self, entries: list) -> list:
+        """
+        Set the level of the entries without one (dropdown options without kode).
+
+        A name listed in a seed file gets that file's level, then a name
+        starting with `UPT`/`UPTD` is a unit. Other entries keep no level and
+        are logged, they are left out of `names(level)`.
+
+        Args:
+            entries (list): Registry entries.
+
+        Returns:
+            list: The entries, classified where possible.
+        """
+        if all(e["level"] for e in entries):
+            return entries
+
+        seed_levels = {
+            normalize_name(e["nama"]): level
+            for level in SEED_FILES
+            for e in self.seed_entries(level)
+        }
+        unknown = []
+        for entry in entries:
+            if entry["level"]:
+                continue
+            level = seed_levels.get(normalize_name(entry["nama"]))
+            if level is None and UNIT_NAME_PATTERN.match(entry["nama"]):
+                level = "unit"
+            entry["level"] = level
+            if level is None:
+                unknown.append(entry["nama"])
+
+        if unknown:
+            logger.warning(
+                "%d SKPD option(s) without kode could not be classified as SKPD "
+                "or unit, left out of the lists: %s",
+                len(unknown),
+                ", ".join(unknown),
+            )
+        return entries
+
+    def names(self, level: str = None) -> list:
+        """
+        List the names in the registry, optionally filtered by level.
+
+        Args:
+            level (str, optional): `skpd` or `unit`. Defaults to every entry.
+
+        Returns:
+            list: The names in SIPD-RI order.
+        """
+        return [
+            e["nama"]
+            for e in self.entries + self.seeded
+            if level is None or e["level"] == level
+        ]
+
+    def get(self, name_or_kode: str):
+        """
+        Look up an entry by exact name (case and spacing insensitive) or kode.
+
+        Args:
+            name_or_kode (str): The SKPD name or kode.
+
+        Returns:
+            dict | None: The entry, or None if it is not registered.
+        """
+        key = name_or_kode.strip()
+        return self._by_kode.get(key) or self._by_name.get(normalize_name(key))
+
+    def resolve(self, name: str) -> dict:
+        """
+        Resolve a name to a registry entry, allowing a unique partial match.
+
+        Args:
+            name (str): The SKPD name, kode, or an unambiguous part of the name.
+
+        Returns:
+            dict: The matching entry.
+
+        Raises:
+            KeyError: If no entry or more than one entry matches.
+        """
+        entry = self.get(name)
+        if entry:
+            return entry
+
+        needle = normalize_name(name)
+        matches = [e for key, e in self._by_name.items() if needle in key]
+        if len(matches) == 1:
+            return matches[0]
+        if not matches:
+            raise KeyError(f"SKPD not found in registry {self.year}: {name}")
+        raise KeyError(f"Ambiguous SKPD name {name!r}: {len(matches)} matches")
+
+    def seed_warning(self, level: str = None) -> str:
+        """
+        Describe the seed files the names of a level come from.
+
+        Args:
+            level (str, optional): `skpd` or `unit`. Defaults to every level.
+
+        Returns:
+            str | None: The warning, or None if no seed file is used.
+        """
+        seeds = {
+            seed_level: path
+            for seed_level, path in self.seed_files.items()
+            if level in (None, seed_level)
+        }
+        if not seeds:
+            return None
+        return (
+            f"No {'/'.join(seeds)} entries synced from SIPD-RI for {self.year}, "
+            f"only the possibly outdated list {', '.join(seeds.values())}"
+        )
+
+    def seed_file(self, level: str) -> str:
+        """
+        Get the latest seed file of a level up to `self.year`.
+
+        Args:
+            level (str): `skpd` or `unit`.
+
+        Returns:
+            str | None: The file path, or None if there is no seed file.
+        """
+        files = {
+            int(os.path.basename(path)[-8:-4]): path
+            for path in glob.glob(SEED_FILES[level].format(year="[0-9]" * 4))
+        }
+        years = sorted(year for year in files if year <= self.year) or sorted(files)
+        return files[years[-1]] if years else None
+
+    def seed_entries(self, level: str) -> list:
+        """
+        Read the entries of a level from its latest seed file up to `self.year`.
+
+        Args:
+            level (str): `skpd` or `unit`.
+
+        Returns:
+            list: Registry entries without kode, empty if there is no seed file.
+        """
+        path = self.seed_file(level)
+        if path is None:
+            return []
+
+        with open(path, "r", encoding="utf-8") as f:
+            names = [" ".join(line.split()) for line in f]
+        return [
+            {"id": nama, "kode": None, "nama": nama, "level": level, "parent": None}
+            for nama in names
+            if nama
+        ]
+
+    def _build_index(self):
+        levels = {e["level"] for e in self.entries}
+        self.seeded, self.seed_files = [], {}
+        for level in SEED_FILES:
+            seeded = [] if level in levels else self.seed_entries(level)
+            if seeded:
+                self.seeded += seeded
+                self.seed_files[level] = self.seed_file(level)
+        if self.seed_files:
+            logger.warning(self.seed_warning())
+        self._by_name = {
+            normalize_name(e["nama"]): e for e in self.seeded + self.entries
+        }
+        self._by_kode = {e["kode"]: e for e in self.entries if e.get("kode")}
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.warning("Invalid SKPD registry file, ignoring: %s", self.path)
+            return {}
@@ -0,0 +1,111 @@
+"""
+This module provides the `bot_task` decorator for the SIPDBot automation framework.
+
+Every public automation method of a mixin (journal input, posting, downloads)
+is a bot task. Wrapping them with `bot_task` gives each task the same
+instrumentation, controlled by the SIPDBot options:
+
+- `profile`: Record a cProfile dump of the Python side to
+  `logs/profiles/<task>-<run_id>-<n>.prof`.
+- `trace`: Record a Playwright trace (screenshots, DOM snapshots, network) of
+  the browser context to `logs/traces/<task>-<run_id>-<n>.zip`.
+
+`<n>` counts the tasks of the session, so a long-lived session (watcher,
+queue worker) keeps one artifact per task.
+
+Nested tasks (a task calling another task) are captured by the outermost one.
+"""
+
+import os
+import cProfile
+import logging
+import functools
+from contextlib import ExitStack, contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = "logs/profiles"
+TRACE_DIR = "logs/traces"
+
+
+@contextmanager
+def profile_capture(path: str):
+    """
+    Profile the enclosed block with cProfile and dump the stats to `path`.
+
+    Args:
+        path (str): Output `.prof` file, readable with `pstats` or snakeviz.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        logger.info("Profile saved: %s", path)
+
+
+@contextmanager
+def trace_capture(context, path: str, title: str = None):
+    """
+    Record a Playwright trace of the enclosed block and save it to `path`.
+
+    Args:
+        context (BrowserContext): The browser context to trace.
+        path (str): Output `.zip` file, viewable with `playwright show-trace`.
+        title (str, optional): Trace title shown in the trace viewer.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    context.tracing.start(title=title, screenshots=True, snapshots=True, sources=True)
+    try:
+        yield
+    finally:
+        context.tracing.stop(path=path)
+        logger.info("Trace saved: %s", path)
+
+
+def bot_task(func):
+    """
+    Decorate a SIPDBot method as a bot task.
+
+    Args:
+        func (callable): The mixin method implementing the task.
+
+    Returns:
+        callable: The wrapped method.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if getattr(self, "_current_task", None):
+            return func(self, *args, **kwargs)
+
+        task_name = func.__name__
+        self._task_count = getattr(self, "_task_count", 0) + 1
+        artifact_name = f"{task_name}-{self.run_id}-{self._task_count}"
+        self._current_task = task_name
+        logger.info("Task started: %s (run_id=%s)", task_name, self.run_id)
+
+        try:
+            with ExitStack() as stack:
+                if self.trace and self.context:
+                    stack.enter_context(
+                        trace_capture(
+                            self.context,
+                            f"{TRACE_DIR}/{artifact_name}.zip",
+                            title=artifact_name,
+                        )
+                    )
+                if self.profile:
+                    stack.enter_context(
+                        profile_capture(f"{PROFILE_DIR}/{artifact_name}.prof")
+                    )
+                return func(self, *args, **kwargs)
+        finally:
+            self._current_task = None
+            logger.info("Task finished: %s", task_name)
+
+    return wrapper
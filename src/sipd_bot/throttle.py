@@ -0,0 +1,203 @@
+"""
+This module provides the Throttle class for the SIPDBot automation framework.
+
+SIPD-RI answers load with 404 pages, slow pages and slow dropdowns. The
+throttle is shared by every SIPDBot in the process and paces bot actions with
+a token bucket. It adapts the request rate AIMD-style: additive increase while
+actions succeed quickly, multiplicative decrease on errors (404 pages,
+navigation and network timeouts) and slow responses.
+
+Only server-bound actions feed the throttle (`action`). Waits whose failure
+says nothing about server load, e.g. a selector or kode rekening that is
+simply absent, are paced and timed without feedback (`paced`).
+
+Each process has its own throttle: queue workers pace themselves
+independently.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from .metrics import shared_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class Throttle:
+    """
+    Token bucket rate limiter with AIMD rate control.
+
+    Attributes:
+        rate (float): Current actions per second.
+        slow_threshold (float): Seconds after which an action counts as slow.
+        counters (dict): Number of successes, slow actions and errors per kind.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        slow_threshold: float = 5.0,
+        cooldown: float = 5.0,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.slow_threshold = slow_threshold
+        self.cooldown = cooldown
+        self.counters = {"success": 0, "slow": 0}
+
+        self._tokens = 1.0
+        self._refilled_at = time.monotonic()
+        self._decreased_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until the token bucket allows the next action.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    max(self.rate, 1.0),
+                    self._tokens + (now - self._refilled_at) * self.rate,
+                )
+                self._refilled_at = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def success(self, latency: float, slow_threshold: float = None):
+        """
+        Record a successful action; slow ones count as a congestion signal.
+
+        Args:
+            latency (float): Duration of the action in seconds.
+            slow_threshold (float, optional): Override `self.slow_threshold` for
+            actions that are slow by nature, e.g. report generation.
+        """
+        if latency > (slow_threshold or self.slow_threshold):
+            with self._lock:
+                self.counters["slow"] += 1
+            shared_metrics().inc("sipd_throttle_events_total", kind="slow")
+            self._decrease("slow", latency)
+            return
+
+        shared_metrics().inc("sipd_throttle_events_total", kind="success")
+        with self._lock:
+            self.counters["success"] += 1
+            self.rate = min(self.max_rate, self.rate + 0.1)
+
+    def error(self, kind: str = "error"):
+        """
+        Record a failed action, e.g. `404` or `timeout`.
+
+        Args:
+            kind (str, optional): The error kind. Defaults to "error".
+        """
+        with self._lock:
+            self.counters[kind] = self.counters.get(kind, 0) + 1
+        shared_metrics().inc("sipd_throttle_events_total", kind=kind)
+        self._decrease(kind)
+
+    @contextmanager
+    def action(self, slow_threshold: float = None, step: str = "action"):
+        """
+        Pace the enclosed bot action and feed its outcome back to the throttle.
+
+        Playwright timeouts are recorded as `timeout` errors, other exceptions
+        as `error`. The exception is re-raised. The duration is recorded in the
+        `sipd_step_duration_seconds` histogram under `step`.
+
+        Args:
+            slow_threshold (float, optional): See `success`.
+            step (str, optional): The step name for the metrics, e.g.
+                `goto_aklap`. Defaults to "action".
+        """
+        self.acquire()
+        started_at = time.monotonic()
+        try:
+            yield
+        except PlaywrightTimeoutError:
+            self.error("timeout")
+            raise
+        except Exception:
+            self.error("error")
+            raise
+        finally:
+            shared_metrics().observe(
+                "sipd_step_duration_seconds", time.monotonic() - started_at, step=step
+            )
+        self.success(time.monotonic() - started_at, slow_threshold)
+
+    @contextmanager
+    def paced(self, step: str = "action"):
+        """
+        Pace the enclosed wait without feeding its outcome back to the throttle.
+
+        For waits that may fail because the element is simply absent, not
+        because SIPD-RI is overloaded. Successful waits are recorded in the
+        `sipd_step_duration_seconds` histogram under `step`.
+
+        Args:
+            step (str, optional): The step name for the metrics, e.g.
+                `wait_selector`. Defaults to "action".
+        """
+        self.acquire()
+        started_at = time.monotonic()
+        yield
+        shared_metrics().observe(
+            "sipd_step_duration_seconds", time.monotonic() - started_at, step=step
+        )
+
+    def stats(self) -> dict:
+        """
+        Get the current throttle state.
+
+        Returns:
+            dict: Rate and counters.
+        """
+        with self._lock:
+            return {"rate": round(self.rate, 2), **self.counters}
+
+    def _decrease(self, kind: str, latency: float = None):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._decreased_at < self.cooldown:
+                return
+            self._decreased_at = now
+            self.rate = max(self.min_rate, self.rate / 2)
+        logger.warning(
+            "Throttle: %s%s, backing off to %.2f actions/s",
+            kind,
+            f" ({latency:.1f}s)" if latency is not None else "",
+            self.rate,
+        )
+
+
+_shared_throttle = Throttle()
+
+
+def _collect_throttle(metrics):
+    stats = _shared_throttle.stats()
+    metrics.set("sipd_throttle_rate", stats["rate"])
+
+
+shared_metrics().add_collector(_collect_throttle)
+
+
+def shared_throttle() -> Throttle:
+    """
+    Get the process-wide throttle shared by every SIPDBot.
+
+    Returns:
+        Throttle: The shared throttle.
+    """
+    return _shared_throttle
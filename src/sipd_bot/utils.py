@@ -2,10 +2,15 @@
 This module provides the UtilityMixin class for the SIPDBot automation framework.
 
 Includes page recovery methods such as auto-reloading, 404 detection,
-and navigating to specific modules like AKLAP.
+navigating to specific modules like AKLAP, and processing work items with
+failure capture and a retry pass.
 """
 
+import time
 import logging
+from .failures import FailureQueue
+from .session import SessionExpiredError
+from .metrics import shared_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +36,9 @@ class UtilsMixin:
         """
         for attempt in range(retries):
             try:
-                self.page.wait_for_selector(selector, timeout=3_000)
+                # An absent selector is not a sign of server load
+                with self.throttle.paced(step="wait_selector"):
+                    self.page.wait_for_selector(selector, timeout=3_000)
                 return True
             except Exception:
                 logger.warning(
@@ -40,9 +47,11 @@ class UtilsMixin:
                     attempt + 1,
                     retries,
                 )
+                shared_metrics().inc("sipd_selector_reloads_total")
                 self.page.reload()
                 self.page.wait_for_timeout(delay * 1_000)
         logger.error("Failed to find selector after %s retries: %s", retries, selector)
+        shared_metrics().inc("sipd_selector_failures_total")
         return False
 
     def is_404(self) -> bool:
@@ -96,17 +105,126 @@ class UtilsMixin:
         if self.ensure_element_visible(menu_akuntansi):
             logger.info("Accessing AKLAP menu...")
             url_aklap = "https://sipd.kemendagri.go.id/penatausahaan/aklap"
-            self.page.goto(url_aklap, wait_until="domcontentloaded")
+            with self.throttle.action(step="goto_aklap"):
+                self.page.goto(url_aklap, wait_until="domcontentloaded")
 
             for attempt in range(attempts):
                 if not self.is_404():
                     break
+                self.throttle.error("404")
+                shared_metrics().inc("sipd_aklap_reloads_total")
                 logger.warning(
                     "Reloading AKLAP page (attempt %s/%s)", attempt + 1, attempts
                 )
-                self.page.goto(url_aklap, wait_until="domcontentloaded")
+                with self.throttle.action(step="goto_aklap"):
+                    self.page.goto(url_aklap, wait_until="domcontentloaded")
             else:
                 logger.error("Failed to load AKLAP after %s attempts", attempts)
                 raise RuntimeError("Could not load AKLAP page")
 
             logger.info("AKLAP menu accessed")
+
+    def process_with_retry(
+        self,
+        task: str,
+        items: list,
+        process,
+        reset=None,
+        describe=str,
+        recycle=None,
+        restore=None,
+    ) -> list:
+        """
+        Process work items one by one, keeping going when an item fails.
+
+        Failed items are captured into a FailureQueue (exception, screenshot,
+        DOM snippet). After the main pass, `reset` restores a fresh page state
+        and the failed items are retried once. Every item waits for the
+        shared throttle before it starts.
+
+        Item latencies feed `self.page_health`. When the page crosses a memory
+        or latency threshold it is recycled and `recycle` restores the screen
+        before the next item. Tasks that cannot leave their page (unsaved
+        forms) pass no `recycle` and only get a warning.
+
+        The session is kept alive between items. When an item fails because
+        the session dropped, the bot logs in again, restores the screen with
+        `restore` (by default `recycle`, or `reset`) and resumes the item.
+        Without any, or when `restore` raises SessionExpiredError, the task is
+        aborted with SessionExpiredError.
+
+        Args:
+            task (str): The task name used for logs and failure artifacts.
+            items (iterable): The work items, iterated once. A generator may
+                yield items found while working, e.g. the next table page.
+            process (callable): Called with each item, raises on failure.
+            reset (callable, optional): Called once before the retry pass.
+            describe (callable, optional): Turns an item into its log label.
+            recycle (callable, optional): Called after the page was recycled, to
+                reopen the task's screen.
+            restore (callable, optional): Called after a re-authentication, to
+                reopen the task's screen. Defaults to `recycle` or `reset`.
+
+        Returns:
+            list: The items that failed in the retry pass too.
+        """
+        failures = FailureQueue(task, self.run_id)
+        restore = restore or recycle or reset
+
+        for item in items:
+            self.throttle.acquire()
+            self.keep_alive()
+            started_at = time.monotonic()
+            try:
+                self.resume_after_reauth(lambda: process(item), restore)
+            except SessionExpiredError:
+                raise
+            except Exception as exc:
+                failures.add(item, exc, self.page, label=describe(item))
+            self.page_health.record(time.monotonic() - started_at)
+            self.check_page_health(recycle)
+
+        if not failures:
+            return []
+
+        retry_items = failures.drain()
+        logger.info("[%s] Retrying %d failed item(s)...", task, len(retry_items))
+        if reset:
+            reset()
+
+        for item in retry_items:
+            shared_metrics().inc("sipd_retries_total", task=task)
+            self.throttle.acquire()
+            self.keep_alive()
+            try:
+                self.resume_after_reauth(lambda: process(item), restore)
+                logger.info("[%s] Retry succeeded: %s", task, describe(item))
+            except SessionExpiredError:
+                raise
+            except Exception as exc:
+                failures.add(item, exc, self.page, attempt=2, label=describe(item))
+
+        failures.save_report()
+        return failures.drain()
+
+    def check_page_health(self, recycle=None) -> bool:
+        """
+        Recycle the page if `self.page_health` says it degraded.
+
+        Args:
+            recycle (callable, optional): Called after the page was recycled, to
+                reopen the task's screen. Without it, the bot only warns.
+
+        Returns:
+            bool: True if the page was recycled.
+        """
+        reason = self.page_health.check(self.page)
+        if not reason:
+            return False
+        if recycle is None:
+            logger.warning("Page degraded (%s), cannot recycle in this task", reason)
+            return False
+
+        self.recycle_page(reason)
+        recycle()
+        return True
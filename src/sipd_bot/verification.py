@@ -0,0 +1,234 @@
+"""
+Amount parsing and line reconciliation for the SIPDBot automation framework.
+
+`input_jurnal_umum` reads the entered lines back from the form and verifies
+them against the source rows with `verify_jurnal_lines`. The same parsing and
+per-key comparison back the `reconcile` CLI (`src.reconcile`), the watcher's
+workbook validation and the posting queue snapshots.
+
+Every step is a grouped, vectorized pandas operation keyed by SKPD and kode
+rekening, so full-year, province-wide data reconciles in seconds.
+"""
+
+import pandas as pd
+
+
+KEY_COLUMNS = ["skpd", "kode_rekening"]
+
+COLUMN_ALIASES = {
+    "kode": "kode_rekening",
+    "kode_akun": "kode_rekening",
+    "kode_rek": "kode_rekening",
+    "nama_skpd": "skpd",
+    "unit": "skpd",
+    "saldo": "nilai",
+    "jumlah": "nilai",
+    "realisasi": "nilai",
+}
+
+
+def parse_amounts(values: pd.Series) -> pd.Series:
+    """
+    Convert amount strings to floats, vectorized.
+
+    Accepts plain numbers (`1500000.5`), Indonesian formatting (`1.500.000,50`,
+    `1.500.000`, `(1.500,00)` or `-1.500` for negatives) with an optional `Rp`
+    prefix, and English grouping with decimals (`1,500,000.50`). A dot followed
+    by exactly three digit groups (`1.500`) is thousands grouping, not a
+    decimal point. Empty values and a lone `-` (accounting zero) become 0.
+
+    Args:
+        values (pd.Series): The amounts as strings or numbers.
+
+    Returns:
+        pd.Series: The amounts as floats, NaN where a value cannot be parsed.
+        See `invalid_amounts`.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.fillna(0).astype(float)
+
+    text = (
+        values.astype("string").str.replace(r"[\s\u00a0]+", "", regex=True).fillna("")
+    )
+    blank = text.isin(["", "-"])
+    text = text.str.replace(r"^(\(?-?)Rp\.?", r"\1", case=False, regex=True)
+    negative = text.str.match(r"^\(.*\)$") | text.str.startswith("-")
+    text = text.str.replace(r"^\(|\)$|^-", "", regex=True)
+
+    english = text.str.fullmatch(r"\d{1,3}(,\d{3})+\.\d+")
+    grouped = text.str.fullmatch(r"\d{1,3}(\.\d{3})+")
+    indonesian = text.str.contains(",", regex=False) & ~english
+    text = text.mask(english, text.str.replace(",", "", regex=False))
+    text = text.mask(grouped, text.str.replace(".", "", regex=False))
+    text = text.mask(
+        indonesian,
+        text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+    text = text.where(text.str.fullmatch(r"\d+(\.\d+)?"))
+
+    amounts = pd.to_numeric(text, errors="coerce").astype(float)
+    return amounts.where(~negative, -amounts).mask(blank, 0.0)
+
+
+def invalid_amounts(values: pd.Series) -> pd.Series:
+    """
+    Flag the non-empty values `parse_amounts` cannot read.
+
+    Args:
+        values (pd.Series): The amounts as strings or numbers.
+
+    Returns:
+        pd.Series: True where the value is not empty and not an amount.
+    """
+    return parse_amounts(values).isna() & values.notna()
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lowercase and snake_case column names and apply the known aliases.
+
+    Args:
+        df (pd.DataFrame): The raw data.
+
+    Returns:
+        pd.DataFrame: The data with normalized column names.
+    """
+    columns = (
+        df.columns.astype(str)
+        .str.strip()
+        .str.lower()
+        .str.replace(r"\W+", "_", regex=True)
+    )
+    df = df.set_axis(columns, axis=1)
+    return df.rename(columns=COLUMN_ALIASES)
+
+
+def reconcile(
+    jurnal: pd.DataFrame, reference: pd.DataFrame, tolerance: float = 0.5
+) -> pd.DataFrame:
+    """
+    Compare journal totals with reference totals per SKPD and kode rekening.
+
+    A key with an amount that could not be parsed (NaN) on either side gets
+    the `invalid_amount` status whatever its totals, since they are incomplete.
+
+    Args:
+        jurnal (pd.DataFrame): Journal lines, see
+            `src.reconcile.load_jurnal_workbooks`.
+        reference (pd.DataFrame): Reference lines, see
+            `src.reconcile.load_reference`.
+        tolerance (float, optional): Maximum absolute difference still counted
+            as a match. Defaults to 0.5.
+
+    Returns:
+        pd.DataFrame: One row per key with the totals of both sides, the
+        differences and a `status` of `ok`, `missing_in_sipd`,
+        `missing_in_jurnal`, `amount_mismatch` or `invalid_amount`.
+    """
+    keys = [k for k in KEY_COLUMNS if k in jurnal and k in reference]
+    invalid = pd.concat(
+        [
+            side.loc[side[["debit", "kredit"]].isna().any(axis=1), keys]
+            for side in (jurnal, reference)
+        ]
+    )
+
+    jurnal_totals = jurnal.groupby(keys, sort=False)[["debit", "kredit"]].sum()
+    reference_totals = reference.groupby(keys, sort=False)[["debit", "kredit"]].sum()
+
+    merged = jurnal_totals.join(
+        reference_totals, how="outer", lsuffix="_jurnal", rsuffix="_sipd"
+    )
+    in_jurnal = merged.index.isin(jurnal_totals.index)
+    in_sipd = merged.index.isin(reference_totals.index)
+    merged = merged.fillna(0.0)
+
+    merged["selisih_debit"] = merged["debit_jurnal"] - merged["debit_sipd"]
+    merged["selisih_kredit"] = merged["kredit_jurnal"] - merged["kredit_sipd"]
+    mismatch = (merged["selisih_debit"].abs() > tolerance) | (
+        merged["selisih_kredit"].abs() > tolerance
+    )
+
+    merged["status"] = "ok"
+    merged.loc[mismatch, "status"] = "amount_mismatch"
+    merged.loc[~in_sipd, "status"] = "missing_in_sipd"
+    merged.loc[~in_jurnal, "status"] = "missing_in_jurnal"
+    merged.loc[merged.index.isin(invalid.set_index(keys).index), "status"] = (
+        "invalid_amount"
+    )
+
+    return merged.reset_index()
+
+
+def _jurnal_lines(rows: list) -> pd.DataFrame:
+    df = pd.DataFrame(
+        [list(row[:3]) for row in rows],
+        columns=["kode_rekening", "debit", "kredit"],
+        dtype="string",
+    )
+    return df.assign(
+        kode_rekening=df["kode_rekening"].str.strip(),
+        debit=parse_amounts(df["debit"]),
+        kredit=parse_amounts(df["kredit"]),
+    )
+
+
+def verify_jurnal_lines(expected: list, entered: list, tolerance: float = 0.5) -> dict:
+    """
+    Check the lines entered in the Jurnal Umum form against the source rows.
+
+    Lines are compared per kode rekening: line counts, debit and kredit totals
+    (see `reconcile`), plus the debit/kredit balance of the entered journal.
+    An amount that cannot be parsed on either side fails the verification,
+    since the totals it would be part of are unknown.
+
+    Args:
+        expected (list): The source rows, `[kode_rekening, debit, kredit]`.
+        entered (list): The lines read back from the form, same layout.
+        tolerance (float, optional): Maximum absolute difference still counted
+            as a match. Defaults to 0.5.
+
+    Returns:
+        dict: `ok`, `lines_expected`, `lines_entered`, `debit`, `kredit`,
+        `balanced`, the number of `invalid_amounts` and `issues`, one dict
+        per kode rekening with a `status`
+        of `missing_in_sipd`, `missing_in_jurnal`, `amount_mismatch`,
+        `invalid_amount` or `count_mismatch`.
+    """
+    expected_lines = _jurnal_lines(expected)
+    entered_lines = _jurnal_lines(entered)
+
+    result = reconcile(expected_lines, entered_lines, tolerance).set_index(
+        "kode_rekening"
+    )
+    counts = pd.concat(
+        [
+            expected_lines.groupby("kode_rekening").size().rename("baris_jurnal"),
+            entered_lines.groupby("kode_rekening").size().rename("baris_sipd"),
+        ],
+        axis=1,
+    )
+    result = result.join(counts.fillna(0).astype(int))
+    wrong_count = (result["status"] == "ok") & (
+        result["baris_jurnal"] != result["baris_sipd"]
+    )
+    result.loc[wrong_count, "status"] = "count_mismatch"
+
+    amounts = ["debit", "kredit"]
+    invalid = int(
+        expected_lines[amounts].isna().to_numpy().sum()
+        + entered_lines[amounts].isna().to_numpy().sum()
+    )
+    debit, kredit = entered_lines["debit"].sum(), entered_lines["kredit"].sum()
+    balanced = abs(debit - kredit) <= tolerance
+    issues = result[result["status"] != "ok"].reset_index()
+    return {
+        "ok": issues.empty and balanced and not invalid,
+        "lines_expected": len(expected_lines),
+        "lines_entered": len(entered_lines),
+        "debit": round(float(debit), 2),
+        "kredit": round(float(kredit), 2),
+        "balanced": bool(balanced),
+        "invalid_amounts": invalid,
+        "issues": issues.round(2).to_dict("records"),
+    }
@@ -0,0 +1,335 @@
+"""
+Watch-folder daemon for Jurnal Umum workbooks.
+
+Operators drop `.xlsx` journal workbooks into an inbox folder. The daemon
+polls the folder, validates every new workbook once it has finished copying,
+and processes the queue in arrival order with a single logged-in SIPDBot
+session, so the browser start and login are paid once instead of per file.
+
+Inbox layout:
+
+    inbox/
+    ├─ <new files>.xlsx
+    ├─ done/    processed and saved journals + `<name>.result.json`
+    └─ failed/  invalid or failed journals + `<name>.result.json`
+
+Workbook format is the one of menu 1 (Input Jurnal Umum): the first sheet holds
+kode rekening, debit and kredit in its first three columns. An optional
+`Header` sheet holds the header form as label/value pairs in its first two
+columns (e.g. `Tanggal | 31-12-2025`), since nobody is there to fill it in.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from datetime import datetime, time as time_of_day, timedelta
+import pandas as pd
+from src.sipd_bot import SIPDBot
+from src.sipd_bot.ledger import hash_key
+from src.sipd_bot.verification import invalid_amounts
+
+
+logger = logging.getLogger(__name__)
+
+INBOX_DIR = "inbox"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+HEADER_SHEET = "Header"
+OPERATION = "watch_jurnal"
+
+KODE_REKENING = re.compile(r"^\d+(\.\d+)*$")
+
+
+def validate_jurnal_workbook(path: str) -> tuple:
+    """
+    Read and validate a Jurnal Umum workbook.
+
+    Menu 1, the watcher and `plan_jurnal` all load journals with this, so
+    they get the same rows and therefore the same ledger keys.
+
+    Args:
+        path (str): The workbook path.
+
+    Returns:
+        tuple: `(jurnal_umum, header, errors)`. `jurnal_umum` is the row list
+        expected by `SIPDBot.input_jurnal_umum`, `header` the header form
+        values and `errors` a list of messages, empty when the file is valid.
+    """
+    try:
+        sheets = pd.read_excel(path, sheet_name=None, dtype=str)
+    except Exception as e:
+        return [], {}, [f"File tidak dapat dibaca: {e}"]
+
+    header = {}
+    if HEADER_SHEET in sheets:
+        header_df = pd.read_excel(
+            path, sheet_name=HEADER_SHEET, header=None, dtype=str
+        ).dropna(how="all")
+        if header_df.shape[1] >= 2:
+            header_df = header_df.dropna(subset=[0])
+            header = dict(zip(header_df[0].str.strip(), header_df[1].fillna("")))
+        del sheets[HEADER_SHEET]
+
+    if not sheets:
+        return [], header, ["Tidak ada sheet jurnal"]
+
+    df = next(iter(sheets.values())).dropna(how="all")
+    if df.shape[1] < 3:
+        return [], header, ["Jurnal harus berisi kolom kode rekening, debit, kredit"]
+    if df.empty:
+        return [], header, ["Jurnal kosong"]
+
+    kode = df.iloc[:, 0].astype("string").str.strip()
+    debit = df.iloc[:, 1].astype("string").str.strip()
+    kredit = df.iloc[:, 2].astype("string").str.strip()
+    # Excel row numbers: header is row 1
+    excel_rows = df.index + 2
+
+    checks = [
+        (kode.isna(), "kode rekening kosong"),
+        (
+            kode.notna() & ~kode.str.match(KODE_REKENING).fillna(False),
+            "kode rekening tidak valid",
+        ),
+        (debit.isna() & kredit.isna(), "debit dan kredit kosong"),
+        (invalid_amounts(debit), "debit bukan angka"),
+        (invalid_amounts(kredit), "kredit bukan angka"),
+    ]
+    errors = sorted(
+        (row, f"Baris {row}: {message}")
+        for mask, message in checks
+        for row in excel_rows[mask.to_numpy()]
+    )
+    errors = [message for _, message in errors]
+    return df.values.tolist(), header, errors
+
+
+def parse_time_of_day(text: str) -> time_of_day:
+    """
+    Parse a `HH:MM` time of day, e.g. `17:00` or `9:00`.
+
+    Args:
+        text (str): The time of day.
+
+    Returns:
+        datetime.time: The parsed time.
+
+    Raises:
+        ValueError: If the text is not a valid `HH:MM` time.
+    """
+    return datetime.strptime(text.strip(), "%H:%M").time()
+
+
+def _next_occurrence(at: time_of_day) -> datetime:
+    now = datetime.now()
+    deadline = datetime.combine(now.date(), at)
+    # Started after the stop time: stop at that time tomorrow
+    return deadline if deadline > now else deadline + timedelta(days=1)
+
+
+def _move_with_report(path: str, target_dir: str, report: dict) -> str:
+    os.makedirs(target_dir, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    if os.path.exists(os.path.join(target_dir, stem + ext)):
+        stem = f"{stem}-{datetime.now():%Y%m%d-%H%M%S}"
+
+    target = os.path.join(target_dir, stem + ext)
+    # done/ and failed/ are inside the inbox, so this is a rename and never
+    # leaves a partial copy behind when the file is locked (open in Excel)
+    os.rename(path, target)
+    with open(
+        os.path.join(target_dir, f"{stem}.result.json"), "w", encoding="utf-8"
+    ) as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return target
+
+
+class JurnalWatcher:
+    """
+    Poll an inbox folder and input every dropped journal with one SIPDBot.
+
+    Attributes:
+        inbox (str): The watched folder.
+        interval (float): Seconds between polls.
+        bot_options (dict): Keyword options for the SIPDBot session.
+    """
+
+    def __init__(
+        self, inbox: str = INBOX_DIR, interval: float = 10.0, bot_options: dict = None
+    ):
+        self.inbox = inbox
+        self.interval = interval
+        self.bot_options = bot_options or {}
+        self.bot = None
+        self._sizes = {}
+        # Processed files that could not be moved yet, with their report
+        self._unmoved = {}
+
+    def poll(self) -> list:
+        """
+        List the inbox workbooks that finished copying, oldest first.
+
+        A file is ready once its size and modification time did not change
+        between two polls.
+
+        Returns:
+            list: The ready workbook paths.
+        """
+        sizes = {}
+        for entry in os.scandir(self.inbox):
+            if (
+                not entry.is_file()
+                or not entry.name.lower().endswith(".xlsx")
+                or entry.name.startswith(("~$", "."))
+                or entry.path in self._unmoved
+            ):
+                continue
+            stat = entry.stat()
+            sizes[entry.path] = (stat.st_size, stat.st_mtime)
+
+        ready = [path for path, size in sizes.items() if self._sizes.get(path) == size]
+        self._sizes = sizes
+        return sorted(ready, key=lambda path: sizes[path][1])
+
+    def process(self, path: str) -> dict:
+        """
+        Validate, input and save one workbook, then move it to done/ or failed/.
+
+        Args:
+            path (str): The workbook path.
+
+        Returns:
+            dict: The result report written next to the moved file.
+        """
+        report = {
+            "file": os.path.basename(path),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "status": "failed",
+            "errors": [],
+        }
+        jurnal_umum, header, errors = validate_jurnal_workbook(path)
+        report["rows"] = len(jurnal_umum)
+
+        if errors:
+            report["errors"] = errors
+        else:
+            key = hash_key(*(tuple(jurnal[:3]) for jurnal in jurnal_umum))
+            try:
+                bot = self._session()
+                report["run_id"] = bot.run_id
+                if key in bot.ledger.done_keys(OPERATION):
+                    raise RuntimeError("Jurnal yang sama sudah pernah disimpan")
+
+                with bot.ledger.track(OPERATION, key):
+                    result = bot.input_jurnal_umum(
+                        jurnal_umum,
+                        skip_done=False,
+                        interactive=False,
+                        header=header,
+                    )
+                    report.update(result)
+                    if result["failed"]:
+                        raise RuntimeError(
+                            f"{len(result['failed'])} baris gagal diinput"
+                        )
+                    if not result["saved"]:
+                        raise RuntimeError("Verifikasi jurnal gagal, tidak disimpan")
+                report["status"] = "done"
+            except Exception as e:
+                logger.exception("Watched journal failed: %s", path)
+                report["errors"].append(str(e))
+                self._check_session()
+
+        report["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        print(f"[{report['finished_at']}] {report['status'].upper()}: {report['file']}")
+        self._move(path, report)
+        return report
+
+    def _move(self, path: str, report: dict):
+        target_dir = DONE_DIR if report["status"] == "done" else FAILED_DIR
+        try:
+            target = _move_with_report(
+                path, os.path.join(self.inbox, target_dir), report
+            )
+        except OSError as e:
+            # Typically a workbook still open in Excel: keep the report and
+            # retry on the next poll instead of processing the file again
+            logger.warning("Cannot move %s yet, retrying next poll: %s", path, e)
+            if path not in self._unmoved:
+                print(f"File {report['file']} masih dibuka, akan dipindahkan nanti")
+            self._unmoved[path] = report
+            return
+
+        self._unmoved.pop(path, None)
+        logger.info("Watched journal %s: %s", report["status"], target)
+
+    def _retry_moves(self):
+        for path, report in list(self._unmoved.items()):
+            if os.path.exists(path):
+                self._move(path, report)
+            else:
+                logger.warning("Unmoved journal disappeared: %s", path)
+                del self._unmoved[path]
+
+    def run(self, until: str | time_of_day = None):
+        """
+        Watch the inbox until interrupted or until a time of day.
+
+        Args:
+            until (str | datetime.time, optional): Stop time, e.g. `17:00`.
+                When already past, the watcher stops at that time tomorrow.
+                Defaults to running until Ctrl+C.
+        """
+        if isinstance(until, str):
+            until = parse_time_of_day(until)
+        deadline = _next_occurrence(until) if until else None
+
+        os.makedirs(self.inbox, exist_ok=True)
+        logger.info("Watching %s every %.0fs", self.inbox, self.interval)
+        print(f"Memantau folder {os.path.abspath(self.inbox)} (Ctrl+C untuk berhenti)")
+        if deadline:
+            print(f"Berhenti pada {deadline:%d-%m-%Y %H:%M}")
+
+        try:
+            while deadline is None or datetime.now() < deadline:
+                self._retry_moves()
+                for path in self.poll():
+                    self.process(path)
+                if self.bot and not self.bot.keep_alive():
+                    # Session dropped while idle, the next item logs in again
+                    self.close()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            logger.info("Watcher interrupted")
+        finally:
+            self.close()
+
+    def close(self):
+        """Close the SIPDBot session if one is open."""
+        if self.bot:
+            self.bot.__exit__(None, None, None)
+            self.bot = None
+
+    def _session(self) -> SIPDBot:
+        if self.bot is None:
+            bot = SIPDBot(**self.bot_options).__enter__()
+            try:
+                bot.login()
+            except Exception:
+                bot.__exit__(None, None, None)
+                raise
+            self.bot = bot
+        return self.bot
+
+    def _check_session(self):
+        # Start a fresh session for the next file if the browser went away
+        if self.bot and (
+            not self.bot.browser.is_connected() or self.bot.page.is_closed()
+        ):
+            logger.warning("Browser session lost, restarting on next file")
+            try:
+                self.close()
+            except Exception:
+                self.bot = None
@@ -0,0 +1,395 @@
+"""
+Shared work queue for distributing bot jobs over several workers.
+
+A job (a task run over a list of SKPD) is split into one work item per SKPD.
+Workers, in other processes, each drive their own browser and claim items from
+the queue:
+
+- Claims are leases: an item leased by a worker that stops renewing it (crash,
+  closed laptop) becomes claimable again when its lease expires.
+- Workers claim a small batch to save round trips. Items of a batch that the
+  owner has not started yet can be stolen by an idle worker once the queue has
+  no pending items left, so a slow worker does not hold the end of a job.
+- A failed item goes back to the queue, possibly to another worker, until it
+  has been attempted `max_attempts` times.
+
+Brokers are pluggable: `open_queue` picks the implementation from the URL
+scheme in `BROKERS`. The only broker is the built-in `sqlite://` one, which is
+for processes on one PC: its WAL journal relies on shared memory and is not
+safe on a network folder. Distributing a job over several PCs is therefore not
+supported; it needs a server broker registered in `BROKERS`, which does not
+exist yet.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_URL = "sqlite:///data/queue.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    params TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    skpd TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_job_status ON items (job_id, status);
+CREATE INDEX IF NOT EXISTS idx_items_worker ON items (worker, status);
+"""
+
+
+def worker_name() -> str:
+    """
+    Get a unique name for a worker process.
+
+    Returns:
+        str: `<hostname>-<random id>`.
+    """
+    return f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    Interface of a work queue broker.
+
+    Item statuses: `pending`, `leased` (claimed, not started), `running`,
+    `done` and `failed`.
+    """
+
+    def submit(self, task: str, skpd_list: list, params: dict = None) -> str:
+        """
+        Create a job with one work item per SKPD.
+
+        Args:
+            task (str): The task name, see `queue_worker.TASKS`.
+            skpd_list (list): The SKPD names.
+            params (dict, optional): Task parameters shared by every item.
+
+        Returns:
+            str: The job id.
+        """
+        raise NotImplementedError
+
+    def claim(
+        self, worker: str, job_id: str = None, batch: int = 1, lease: float = 900
+    ):
+        """
+        Lease up to `batch` pending (or expired) items, stealing when none are left.
+
+        Args:
+            worker (str): The claiming worker.
+            job_id (str, optional): Only claim items of this job.
+            batch (int, optional): Items to lease at once. Defaults to 1.
+            lease (float, optional): Lease duration in seconds. Defaults to 900.
+
+        Returns:
+            list: The leased items as dicts with `item_id`, `job_id`, `task`,
+            `skpd` and `params`.
+        """
+        raise NotImplementedError
+
+    def start(self, item_id: int, worker: str, lease: float = 900) -> bool:
+        """
+        Mark a leased item as running, unless it was stolen meanwhile.
+
+        Returns:
+            bool: True if the worker still owns the item.
+        """
+        raise NotImplementedError
+
+    def renew(self, worker: str, lease: float = 900) -> list:
+        """
+        Extend the leases of every leased or running item of a worker.
+
+        Returns:
+            list: The ids of the items the worker still holds; an item missing
+            from it expired and was claimed by another worker.
+        """
+        raise NotImplementedError
+
+    def finish(self, item_id: int, worker: str, result: dict) -> bool:
+        """
+        Record a successful item.
+
+        Returns:
+            bool: False if the worker no longer owned the item (lease lost),
+            in which case nothing is recorded.
+        """
+        raise NotImplementedError
+
+    def fail(
+        self, item_id: int, worker: str, result: dict, max_attempts: int = 3
+    ) -> bool:
+        """
+        Record a failed attempt; the item is queued again below `max_attempts`.
+
+        Returns:
+            bool: False if the worker no longer owned the item (lease lost),
+            in which case nothing is recorded.
+        """
+        raise NotImplementedError
+
+    def release(self, worker: str):
+        """
+        Give back the items a stopping worker leased but did not start.
+        """
+        raise NotImplementedError
+
+    def items(self, job_id: str) -> pd.DataFrame:
+        """
+        Get every item of a job with its status and result.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Close the broker connection.
+        """
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Work queue stored in a SQLite database file.
+
+    Every state change runs in an immediate transaction, so concurrent
+    workers never lease the same item.
+
+    Attributes:
+        path (str): The SQLite database file.
+    """
+
+    def __init__(self, path: str = "data/queue.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def submit(self, task: str, skpd_list: list, params: dict = None) -> str:
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, task, params, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, task, json.dumps(params or {}), time.time()),
+            )
+            conn.executemany(
+                "INSERT INTO items (job_id, skpd) VALUES (?, ?)",
+                [(job_id, skpd) for skpd in skpd_list],
+            )
+        logger.info("Job %s submitted: %s x %d SKPD", job_id, task, len(skpd_list))
+        return job_id
+
+    def claim(
+        self, worker: str, job_id: str = None, batch: int = 1, lease: float = 900
+    ):
+        now = time.time()
+        job_filter = "AND job_id = :job_id" if job_id else ""
+        params = {"worker": worker, "job_id": job_id, "now": now, "batch": batch}
+
+        with self._transaction() as conn:
+            ids = [
+                row[0]
+                for row in conn.execute(
+                    f"""
+                    SELECT item_id FROM items
+                    WHERE (status = 'pending'
+                           OR (status IN ('leased', 'running') AND lease_until < :now))
+                    {job_filter}
+                    ORDER BY item_id LIMIT :batch
+                    """,
+                    params,
+                )
+            ]
+            if not ids:
+                # Steal the not yet started items of the most loaded worker
+                ids = [
+                    row[0]
+                    for row in conn.execute(
+                        f"""
+                        SELECT item_id FROM items
+                        WHERE status = 'leased' AND worker != :worker {job_filter}
+                          AND worker = (
+                              SELECT worker FROM items
+                              WHERE status = 'leased' AND worker != :worker {job_filter}
+                              GROUP BY worker HAVING COUNT(*) > 1
+                              ORDER BY COUNT(*) DESC LIMIT 1
+                          )
+                        ORDER BY item_id DESC LIMIT 1
+                        """,
+                        params,
+                    )
+                ]
+                if not ids:
+                    return []
+                logger.info("Worker %s steals item %s", worker, ids[0])
+
+            conn.executemany(
+                "UPDATE items SET status = 'leased', worker = ?, lease_until = ? "
+                "WHERE item_id = ?",
+                [(worker, now + lease, item_id) for item_id in ids],
+            )
+            rows = conn.execute(
+                f"""
+                SELECT items.item_id, items.job_id, jobs.task, items.skpd, jobs.params
+                FROM items JOIN jobs USING (job_id)
+                WHERE items.item_id IN ({",".join("?" * len(ids))})
+                ORDER BY items.item_id
+                """,
+                ids,
+            ).fetchall()
+
+        return [{**dict(row), "params": json.loads(row["params"])} for row in rows]
+
+    def start(self, item_id: int, worker: str, lease: float = 900) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE items SET status = 'running', started_at = ?, lease_until = ?, "
+                "attempts = attempts + 1 "
+                "WHERE item_id = ? AND worker = ? AND status = 'leased'",
+                (time.time(), time.time() + lease, item_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, worker: str, lease: float = 900) -> list:
+        held = "WHERE worker = ? AND status IN ('leased', 'running')"
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE items SET lease_until = ? {held}",
+                (time.time() + lease, worker),
+            )
+            rows = conn.execute(
+                f"SELECT item_id FROM items {held} ORDER BY item_id", (worker,)
+            )
+            return [row[0] for row in rows]
+
+    def finish(self, item_id: int, worker: str, result: dict) -> bool:
+        return self._close_item(item_id, worker, "'done'", result)
+
+    def fail(
+        self, item_id: int, worker: str, result: dict, max_attempts: int = 3
+    ) -> bool:
+        # Attempts are read by the UPDATE itself, in the same transaction
+        status = "CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END"
+        return self._close_item(item_id, worker, status, result, max_attempts)
+
+    def _close_item(
+        self,
+        item_id: int,
+        worker: str,
+        status: str,
+        result: dict,
+        max_attempts: int = None,
+    ) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE items SET status = {status}, finished_at = :now, "
+                "result = :result, lease_until = NULL "
+                "WHERE item_id = :item_id AND worker = :worker AND status = 'running'",
+                {
+                    "now": time.time(),
+                    "result": json.dumps(result),
+                    "item_id": item_id,
+                    "worker": worker,
+                    "max_attempts": max_attempts,
+                },
+            )
+        if cursor.rowcount != 1:
+            logger.warning(
+                "Item %s is no longer held by %s, result not recorded", item_id, worker
+            )
+            return False
+        return True
+
+    def release(self, worker: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE items SET status = 'pending', worker = NULL, lease_until = NULL "
+                "WHERE worker = ? AND status = 'leased'",
+                (worker,),
+            )
+
+    def items(self, job_id: str) -> pd.DataFrame:
+        return pd.read_sql_query(
+            "SELECT items.*, jobs.task FROM items JOIN jobs USING (job_id) "
+            "WHERE job_id = ? ORDER BY item_id",
+            self.conn,
+            params=(job_id,),
+        )
+
+    def latest_job(self) -> str:
+        """
+        Get the id of the most recently submitted job.
+
+        Returns:
+            str: The job id, or None if the queue is empty.
+        """
+        row = self.conn.execute(
+            "SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.conn.close()
+
+
+# URL scheme -> broker factory taking the parsed URL. As in SQLAlchemy,
+# `sqlite:///data/queue.db` is relative and `sqlite:////srv/queue.db` absolute.
+BROKERS = {
+    "sqlite": lambda url: SQLiteWorkQueue(url.path[1:] or "data/queue.db"),
+}
+
+
+def open_queue(url: str = DEFAULT_QUEUE_URL) -> WorkQueue:
+    """
+    Open the work queue broker of a URL, e.g. `sqlite:///data/queue.db`.
+
+    Args:
+        url (str, optional): The broker URL. Defaults to `DEFAULT_QUEUE_URL`.
+
+    Returns:
+        WorkQueue: The broker.
+
+    Raises:
+        ValueError: If no broker is registered for the URL scheme.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in BROKERS:
+        raise ValueError(
+            f"Unknown work queue broker: {parsed.scheme}:// "
+            f"(available: {', '.join(f'{scheme}://' for scheme in BROKERS)})"
+        )
+    return BROKERS[parsed.scheme](parsed)
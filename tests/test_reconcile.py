@@ -0,0 +1,113 @@
+import math
+
+import pandas as pd
+import pytest
+
+from src.sipd_bot.verification import (
+    invalid_amounts,
+    parse_amounts,
+    reconcile,
+    verify_jurnal_lines,
+)
+
+
+@pytest.mark.parametrize(
+    "text, amount",
+    [
+        ("1500000", 1500000.0),
+        ("1500000.5", 1500000.5),
+        ("1.5", 1.5),
+        ("1.500", 1500.0),
+        ("1.500.000", 1500000.0),
+        ("1.500.000,50", 1500000.5),
+        ("1,5", 1.5),
+        ("1,500,000.50", 1500000.5),
+        ("-3.000", -3000.0),
+        ("- 2.000", -2000.0),
+        ("(1.500,00)", -1500.0),
+        ("Rp 1.500.000,00", 1500000.0),
+        ("Rp. 2.500", 2500.0),
+        ("rp1.000", 1000.0),
+        ("-Rp 1.000", -1000.0),
+        ("1 500 000", 1500000.0),
+        ("", 0.0),
+        ("-", 0.0),
+        (None, 0.0),
+    ],
+)
+def test_parse_amounts(text, amount):
+    assert parse_amounts(pd.Series([text], dtype=object))[0] == amount
+
+
+@pytest.mark.parametrize("text", ["abc", "1.5.0", "12.34.567", "1,2,3", "Rp", "--"])
+def test_parse_amounts_unparseable_is_nan(text):
+    values = pd.Series([text])
+    assert math.isnan(parse_amounts(values)[0])
+    assert invalid_amounts(values)[0]
+
+
+def test_parse_amounts_numeric():
+    amounts = parse_amounts(pd.Series([1500, None, -2.5]))
+    assert amounts.tolist() == [1500.0, 0.0, -2.5]
+
+
+def test_invalid_amounts_ignores_empty():
+    values = pd.Series(["1.000", None, "", "x"])
+    assert invalid_amounts(values).tolist() == [False, False, False, True]
+
+
+def _lines(rows):
+    return pd.DataFrame(rows, columns=["kode_rekening", "debit", "kredit"])
+
+
+def test_reconcile_statuses():
+    jurnal = _lines(
+        [
+            ["1.1", 100.0, 0.0],
+            ["1.1", 50.0, 0.0],
+            ["2.1", 0.0, 10.0],
+            ["3.1", 5.0, 0.0],
+            ["4.1", float("nan"), 0.0],
+        ]
+    )
+    reference = _lines(
+        [
+            ["1.1", 150.0, 0.0],
+            ["2.1", 0.0, 20.0],
+            ["4.1", 7.0, 0.0],
+            ["5.1", 1.0, 0.0],
+        ]
+    )
+    result = reconcile(jurnal, reference).set_index("kode_rekening")["status"]
+    assert result.to_dict() == {
+        "1.1": "ok",
+        "2.1": "amount_mismatch",
+        "3.1": "missing_in_sipd",
+        "4.1": "invalid_amount",
+        "5.1": "missing_in_jurnal",
+    }
+
+
+def test_verify_jurnal_lines_thousands_grouping():
+    expected = [["1.1", "1.000.000", ""], ["2.1", "", "1.000.000"]]
+    entered = [["1.1", "1.000.000,00", "0,00"], ["2.1", "0,00", "1.000.000,00"]]
+    assert verify_jurnal_lines(expected, entered)["ok"]
+
+    entered = [["1.1", "0", "0"], ["2.1", "0", "0"]]
+    assert not verify_jurnal_lines(expected, entered)["ok"]
+
+
+def test_verify_jurnal_lines_unparseable_amount_fails():
+    expected = [["1.1", "1.000", ""], ["2.1", "", "1.000"]]
+    entered = [["1.1", "1.000", "0"], ["2.1", "0", "???"]]
+    result = verify_jurnal_lines(expected, entered)
+    assert not result["ok"]
+    assert [issue["status"] for issue in result["issues"]] == ["invalid_amount"]
+
+
+def test_verify_jurnal_lines_unparseable_source_amount_fails():
+    expected = [["1.1", "1.000", ""], ["2.1", "", "satu juta"]]
+    entered = [["1.1", "1.000", "0"], ["2.1", "0", "1.000"]]
+    result = verify_jurnal_lines(expected, entered)
+    assert not result["ok"]
+    assert result["invalid_amounts"] == 1
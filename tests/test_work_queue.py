@@ -0,0 +1,113 @@
+import pytest
+
+from src.work_queue import SQLiteWorkQueue, open_queue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    yield queue
+    queue.close()
+
+
+def _statuses(queue, job_id):
+    return queue.items(job_id).set_index("skpd")["status"].to_dict()
+
+
+def test_claim_leases_a_batch_in_order(queue):
+    job_id = queue.submit("posting_belanja", ["A", "B", "C"], {"x": 1})
+
+    items = queue.claim("w1", job_id, batch=2)
+
+    assert [item["skpd"] for item in items] == ["A", "B"]
+    assert items[0]["task"] == "posting_belanja"
+    assert items[0]["params"] == {"x": 1}
+    assert _statuses(queue, job_id) == {"A": "leased", "B": "leased", "C": "pending"}
+    assert [item["skpd"] for item in queue.claim("w2", job_id, batch=2)] == ["C"]
+
+
+def test_idle_worker_steals_unstarted_items(queue):
+    job_id = queue.submit("posting_belanja", ["A", "B", "C"])
+    queue.claim("w1", job_id, batch=3)
+    assert queue.start(1, "w1")
+
+    stolen = queue.claim("w2", job_id)
+
+    # The last not yet started item of the busiest worker
+    assert [item["skpd"] for item in stolen] == ["C"]
+    assert not queue.start(3, "w1")
+    assert queue.start(3, "w2")
+    assert queue.renew("w1") == [1, 2]
+
+
+def test_no_steal_from_a_worker_with_one_item(queue):
+    job_id = queue.submit("posting_belanja", ["A"])
+    queue.claim("w1", job_id)
+
+    assert queue.claim("w2", job_id) == []
+
+
+def test_expired_lease_is_claimed_again(queue):
+    job_id = queue.submit("posting_belanja", ["A"])
+    queue.claim("w1", job_id, lease=-1)
+    assert queue.start(1, "w1", lease=-1)
+
+    items = queue.claim("w2", job_id)
+
+    assert [item["skpd"] for item in items] == ["A"]
+    assert queue.renew("w1") == []
+    assert not queue.finish(1, "w1", {"worker": "w1"})
+    assert queue.start(1, "w2")
+    assert queue.finish(1, "w2", {"worker": "w2"})
+    assert _statuses(queue, job_id) == {"A": "done"}
+
+
+def test_renew_keeps_a_lease_alive(queue):
+    job_id = queue.submit("posting_belanja", ["A"])
+    queue.claim("w1", job_id, lease=-1)
+
+    assert queue.renew("w1", lease=900) == [1]
+    assert queue.claim("w2", job_id) == []
+
+
+def test_fail_requeues_until_max_attempts(queue):
+    job_id = queue.submit("posting_belanja", ["A"])
+    for attempt in range(1, 3):
+        queue.claim("w1", job_id)
+        assert queue.start(1, "w1")
+        assert queue.fail(1, "w1", {"error": "x"}, max_attempts=2)
+        expected = "pending" if attempt < 2 else "failed"
+        assert _statuses(queue, job_id) == {"A": expected}
+
+    assert queue.claim("w1", job_id) == []
+    assert queue.items(job_id)["attempts"].tolist() == [2]
+
+
+def test_close_requires_a_running_item(queue):
+    job_id = queue.submit("posting_belanja", ["A"])
+    queue.claim("w1", job_id)
+
+    assert not queue.finish(1, "w1", {})
+    assert not queue.fail(1, "w2", {})
+    assert _statuses(queue, job_id) == {"A": "leased"}
+
+
+def test_release_gives_back_unstarted_items(queue):
+    job_id = queue.submit("posting_belanja", ["A", "B"])
+    queue.claim("w1", job_id, batch=2)
+    queue.start(1, "w1")
+
+    queue.release("w1")
+
+    assert _statuses(queue, job_id) == {"A": "running", "B": "pending"}
+
+
+def test_open_queue_url(tmp_path):
+    queue = open_queue(f"sqlite:///{tmp_path}/queue.db")
+    try:
+        assert queue.path == f"{tmp_path}/queue.db"
+    finally:
+        queue.close()
+
+    with pytest.raises(ValueError):
+        open_queue("redis://localhost")